@@ -1,13 +1,27 @@
+import functools
+import hashlib
 import json
 
+class ImmutableObjectException(AttributeError):
+    pass
+
 class BasicAction:
+    '''An immutable action whose hash is computed once and whose json and talon script forms are computed at most once'''
+    __slots__ = ('name', 'arguments', 'hash', 'key', 'json', 'talon_script')
+
     def __init__(self, name, arguments):
-        self.name = name
-        self.arguments = arguments
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'arguments', tuple(arguments))
+        object.__setattr__(self, 'hash', hash((name, tuple(compute_argument_for_hashing(argument) for argument in self.arguments))))
+        object.__setattr__(self, 'key', None)
+        object.__setattr__(self, 'json', None)
+        object.__setattr__(self, 'talon_script', None)
     
     def compute_talon_script(self):
-        code = self.name + '(' + ', '.join(self.compute_arguments_converted_to_talon_script_string()) + ')'
-        return code
+        if self.talon_script is None:
+            code = self.name + '(' + ', '.join(self.compute_arguments_converted_to_talon_script_string()) + ')'
+            object.__setattr__(self, 'talon_script', code)
+        return self.talon_script
     
     def compute_arguments_converted_to_talon_script_string(self):
         result = []
@@ -31,8 +45,16 @@ class BasicAction:
     def get_arguments(self):
         return self.arguments
     
+    def get_key(self):
+        '''Obtains a hashable key that distinguishes actions the same way their json representations do'''
+        if self.key is None:
+            object.__setattr__(self, 'key', compute_action_key(self))
+        return self.key
+    
     def to_json(self) -> str:
-        return json.dumps({'name': self.name, 'arguments': self.arguments}, cls = BasicActionEncoder)
+        if self.json is None:
+            object.__setattr__(self, 'json', json.dumps({'name': self.name, 'arguments': self.arguments}, cls = BasicActionEncoder))
+        return self.json
     
     @staticmethod
     def from_json(text: str):
@@ -40,8 +62,18 @@ class BasicAction:
         return BasicAction(representation['name'], representation['arguments'])
     
     def __eq__(self, other) -> bool:
+        if self is other: return True
         return other is not None and self.name == other.name and self.arguments == other.arguments
     
+    def __hash__(self):
+        return self.hash
+    
+    def __setattr__(self, name, value):
+        raise ImmutableObjectException('BasicAction is immutable')
+    
+    def __reduce__(self):
+        return (BasicAction, (self.name, self.arguments))
+    
     def __repr__(self):
         return self.__str__()
     
@@ -60,10 +92,13 @@ def compute_talon_script_boolean_value(value: bool):
     return 0
 
 class TalonCapture:
+    __slots__ = ('name', 'instance', 'postfix', 'hash')
+
     def __init__(self, name: str, instance: int, postfix: str = ''):
-        self.name = name
-        self.instance = instance
-        self.postfix = postfix
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'instance', instance)
+        object.__setattr__(self, 'postfix', postfix)
+        object.__setattr__(self, 'hash', hash((TalonCapture, name, instance, postfix)))
     
     def __repr__(self):
         return self.__str__()
@@ -78,12 +113,98 @@ class TalonCapture:
         return json.dumps({'name': self.name, 'instance': self.instance})
     
     @staticmethod
-    def from_json(json):
-        attributes = json.loads(json)
+    def from_json(text: str):
+        attributes = json.loads(text)
         return TalonCapture(attributes['name'], attributes['instance'])
 
     def __eq__(self, other) -> bool:
+        if not isinstance(other, TalonCapture): return NotImplemented
         return self.name == other.name and self.instance == other.instance and self.postfix == other.postfix
+    
+    def __hash__(self):
+        return self.hash
+    
+    def __setattr__(self, name, value):
+        raise ImmutableObjectException('TalonCapture is immutable')
+    
+    def __reduce__(self):
+        return (TalonCapture, (self.name, self.instance, self.postfix))
+
+def compute_argument_for_hashing(argument):
+    '''Converts the argument to a hashable value that is equal for arguments that compare equal'''
+    argument_type = type(argument)
+    if argument_type == list or argument_type == tuple:
+        return tuple(compute_argument_for_hashing(element) for element in argument)
+    if argument_type == dict:
+        return frozenset((key, compute_argument_for_hashing(value)) for key, value in argument.items())
+    return argument
+
+def compute_hashable_argument(argument):
+    argument_type = type(argument)
+    if argument_type == str or argument_type == int:
+        return argument
+    if argument_type == list or argument_type == tuple:
+        return (list, tuple(compute_hashable_argument(element) for element in argument))
+    if argument_type == dict:
+        return (dict, tuple((key, compute_hashable_argument(value)) for key, value in argument.items()))
+    if argument_type == TalonCapture:
+        return (TalonCapture, argument.name, argument.instance, argument.postfix)
+    return (argument_type, argument)
+
+def compute_action_key(action):
+    '''Computes a hashable key that distinguishes actions the same way their json representations do'''
+    return (action.get_name(), tuple(compute_hashable_argument(argument) for argument in action.get_arguments()))
+
+FINGERPRINT_MASK = (1 << 64) - 1
+FINGERPRINT_MULTIPLIER = 0x100000001b3
+
+def compute_text_fingerprint(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size = 8).digest(), 'little')
+
+def compute_action_fingerprint(action) -> int:
+    '''Computes a 64 bit fingerprint of the action that is the same in every process and vocabulary'''
+    return compute_text_fingerprint(action.to_json())
+
+class ActionVocabulary:
+    '''Maps every distinct action to a small integer identifier so that action sequences can be compared without serializing them'''
+    def __init__(self):
+        self.identifiers = {}
+        self.actions = []
+        self.fingerprints = []
+    
+    def compute_identifier(self, action) -> int:
+        key = action.get_key()
+        identifier = self.identifiers.get(key)
+        if identifier is None:
+            identifier = len(self.actions)
+            self.identifiers[key] = identifier
+            self.actions.append(action)
+        return identifier
+    
+    def compute_identifiers(self, actions):
+        return tuple(self.compute_identifier(action) for action in actions)
+    
+    def intern(self, action):
+        return self.actions[self.compute_identifier(action)]
+    
+    def get_action(self, identifier: int):
+        return self.actions[identifier]
+    
+    def get_actions(self, identifiers):
+        return [self.actions[identifier] for identifier in identifiers]
+    
+    def get_size(self):
+        return len(self.actions)
+    
+    def get_fingerprint(self, identifier: int) -> int:
+        while len(self.fingerprints) <= identifier: self.fingerprints.append(compute_action_fingerprint(self.actions[len(self.fingerprints)]))
+        return self.fingerprints[identifier]
+    
+    def compute_sequence_fingerprint(self, identifiers) -> int:
+        '''Computes a 64 bit fingerprint of the action sequence that does not depend on the identifiers this vocabulary assigned'''
+        fingerprint = len(identifiers)
+        for identifier in identifiers: fingerprint = (fingerprint*FINGERPRINT_MULTIPLIER + self.get_fingerprint(identifier)) & FINGERPRINT_MASK
+        return fingerprint
 
 class Command:
     def __init__(self, name: str, actions, seconds_since_action: int = None):
@@ -125,10 +246,11 @@ class Command:
         return representation
 
 class CommandChain(Command):
-    def __init__(self, name: str, actions, chain_number: int = 0, chain_size: int = 0):
+    def __init__(self, name: str, actions, chain_number: int = 0, chain_size: int = 0, number_of_words: int = None):
         super().__init__(name, actions)
         self.chain_number: int = chain_number
         self.chain_size: int = chain_size
+        self.number_of_words = number_of_words
 
     def append_command(self, command):
         if self.name is None:
@@ -137,6 +259,13 @@ class CommandChain(Command):
             self.name += f' {command.get_name()}'
         self.actions.extend(command.get_actions())
         self.chain_size += 1
+        if self.number_of_words is not None:
+            self.number_of_words += compute_number_of_words(command.get_name())
+    
+    def get_number_of_words(self) -> int:
+        if self.number_of_words is None:
+            return compute_number_of_words(self.name)
+        return self.number_of_words
     
     def get_chain_number(self):
         return self.chain_number
@@ -150,6 +279,9 @@ class CommandChain(Command):
     def get_size(self):
         return self.chain_size
 
+def compute_number_of_words(dictation: str) -> int:
+    return len(dictation.split(' '))
+
 class RecordingStart:
     def is_command_record(self):
         return False
@@ -158,28 +290,83 @@ COMMAND_NAME_PREFIX = 'Command: '
 RECORDING_START_MESSAGE = 'START'
 TIME_DIFFERENCE_PREFIX = 'T'
 
+DEFAULT_ACTION_DECODE_CACHE_SIZE = 65536
+
+class ActionDecodeCache:
+    '''Decodes action lines, sharing one action instance between identical lines so that repeated lines skip json decoding'''
+    def __init__(self, vocabulary: ActionVocabulary, maximum_size: int = DEFAULT_ACTION_DECODE_CACHE_SIZE):
+        self.vocabulary = vocabulary
+        self.decode = functools.lru_cache(maxsize = maximum_size)(self.decode_without_cache)
+    
+    def decode_without_cache(self, line_without_trailing_newline: str):
+        return self.vocabulary.intern(BasicAction.from_json(line_without_trailing_newline))
+    
+    def get_number_of_hits(self) -> int:
+        return self.decode.cache_info().hits
+    
+    def get_number_of_misses(self) -> int:
+        return self.decode.cache_info().misses
+    
+    def get_size(self) -> int:
+        return self.decode.cache_info().currsize
+
+class RecordParserResumePoint:
+    '''The parser state right after a line that ends a command. Every entry parsed before this point is final even if the record grows'''
+    def __init__(self, byte_offset: int, current_command_name: str, seconds_since_last_action_for_next_command: int):
+        self.byte_offset = byte_offset
+        self.current_command_name = current_command_name
+        self.seconds_since_last_action_for_next_command = seconds_since_last_action_for_next_command
+
 class RecordParser:
-    def __init__(self, path: str):
+    def __init__(self, path: str, vocabulary: ActionVocabulary = None, resume_point: RecordParserResumePoint = None):
+        self.path = path
+        self.record = None
         self.commands = []
+        self.vocabulary = vocabulary if vocabulary is not None else ActionVocabulary()
+        self.action_decode_cache = ActionDecodeCache(self.vocabulary)
         self.current_command_name = ''
         self.current_command_actions = []
         self.seconds_since_last_action = None
         self.seconds_since_last_action_for_next_command = None
         self.time_information_found_after_command = False
-        self.parse_path(path)
-
-    def parse_path(self, path: str):
-        self.process_file_lines(path)
+        self.byte_offset: int = 0
+        if resume_point is not None: self.restore_resume_point(resume_point)
+        self.resume_point = self.compute_resume_point()
+
+    def restore_resume_point(self, resume_point: RecordParserResumePoint):
+        self.byte_offset = resume_point.byte_offset
+        self.current_command_name = resume_point.current_command_name
+        self.seconds_since_last_action_for_next_command = resume_point.seconds_since_last_action_for_next_command
+
+    def compute_resume_point(self):
+        return RecordParserResumePoint(self.byte_offset, self.current_command_name, self.seconds_since_last_action_for_next_command)
+
+    def get_resume_point(self):
+        return self.resume_point
+
+    def generate_entries(self, include_unfinished_command: bool = True):
+        '''Parses the record file one line at a time yielding every entry as soon as it is complete.
+        The final command is only yielded if requested because lines appended to the record could still add to it.
+        A final line without a newline could still be being written, so it is left for a later parse once its newline arrives'''
+        with open(self.path, 'rb') as file:
+            file.seek(self.byte_offset)
+            for line in file:
+                if not line.endswith(b'\n'): break
+                self.byte_offset += len(line)
+                line_without_trailing_newline = line.decode('utf-8').strip()
+                self.process_line(line_without_trailing_newline)
+                yield from self.take_parsed_entries()
+        if include_unfinished_command: yield from self.take_unfinished_command()
+    
+    def take_unfinished_command(self):
         if self.is_command_found():
-            self.add_current_command() 
+            self.add_current_command()
+        return self.take_parsed_entries()
     
-    def process_file_lines(self, path: str):
-        with open(path, 'r') as file:
-            line = file.readline()
-            while line:
-                line_without_trailing_newline = line.strip()
-                self.process_line(line_without_trailing_newline)
-                line = file.readline()
+    def take_parsed_entries(self):
+        entries = self.commands
+        if entries: self.commands = []
+        return entries
 
     def process_line(self, line: str):
         if is_action(line):
@@ -192,9 +379,10 @@ class RecordParser:
             self.process_recording_start()
         if is_line_command_ending(line):
             self.reset_command_information_except_name()
+            self.resume_point = self.compute_resume_point()
      
     def add_action_based_on_line(self, line_without_trailing_newline: str):
-        self.current_command_actions.append(BasicAction.from_json(line_without_trailing_newline))
+        self.current_command_actions.append(self.action_decode_cache.decode(line_without_trailing_newline))
 
     def process_command_start(self, line_without_trailing_newline: str):
         self.add_current_command_if_available()
@@ -231,11 +419,25 @@ class RecordParser:
         self.time_information_found_after_command = False
 
     def get_record(self):
-        return self.commands
-
-def read_file_record(path: str):
-    '''Obtains a list of the basic actions performed by the commands in the specified record file'''
-    parser = RecordParser(path)
+        if self.record is None:
+            self.record = list(self.generate_entries())
+        return self.record
+    
+    def get_vocabulary(self):
+        return self.vocabulary
+    
+    def get_action_decode_cache(self):
+        return self.action_decode_cache
+
+def stream_file_record(path: str, vocabulary: ActionVocabulary = None):
+    '''Yields the entries of the specified record file without holding the whole record in memory'''
+    parser = RecordParser(path, vocabulary)
+    return parser.generate_entries()
+
+def read_file_record(path: str, vocabulary: ActionVocabulary = None):
+    '''Obtains a list of the basic actions performed by the commands in the specified record file.
+    Identical actions are shared instances registered in the vocabulary if one is given'''
+    parser = RecordParser(path, vocabulary)
     return parser.get_record()
 
 def compute_command_name_without_prefix(command_name: str):
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import pickle
+
+from action_records import RecordParserResumePoint
+from record_cache import update_hasher_with_file_contents, replace_file_with_written_file, remove_file_if_present, compute_file_size_in_bytes, evict_files_over_maximum_size
+
+CHECKPOINT_DIRECTORY_NAME = 'Checkpoints'
+CHECKPOINT_FILE_EXTENSION = '.pickle'
+CHECKPOINT_VERSION = 4
+BOUNDARY_DIGEST_SIZE_IN_BYTES = 64*1024
+DEFAULT_MAXIMUM_CHECKPOINT_DIRECTORY_SIZE_IN_BYTES = 1024*1024*1024
+
+def compute_file_digest(path: str) -> str:
+    hasher = hashlib.sha256()
+    update_hasher_with_file_contents(hasher, path)
+    return hasher.hexdigest()
+
+def compute_digest_before_byte_offset(path: str, byte_offset: int) -> str:
+    '''Computes a digest of the bytes right before the offset, which changes if the record was rewritten instead of appended to'''
+    starting_offset = max(0, byte_offset - BOUNDARY_DIGEST_SIZE_IN_BYTES)
+    with open(path, 'rb') as file:
+        file.seek(starting_offset)
+        contents = file.read(byte_offset - starting_offset)
+    return hashlib.sha256(contents).hexdigest()
+
+class AnalysisCheckpoint:
+    '''The state of mining a text record up to the last command that appending to the record cannot change'''
+    def __init__(self, input_path: str, max_command_chain_considered: int, commands_to_ignore_digest: str, parser_resume_point: RecordParserResumePoint, miner):
+        self.version = CHECKPOINT_VERSION
+        self.input_path = os.path.abspath(input_path)
+        self.max_command_chain_considered = max_command_chain_considered
+        self.commands_to_ignore_digest = commands_to_ignore_digest
+        self.parser_resume_point = parser_resume_point
+        self.boundary_digest = compute_digest_before_byte_offset(input_path, parser_resume_point.byte_offset)
+        self.miner = miner
+
+    def can_resume(self, input_path: str, max_command_chain_considered: int, commands_to_ignore_digest: str) -> bool:
+        byte_offset = self.parser_resume_point.byte_offset
+        return self.version == CHECKPOINT_VERSION and self.input_path == os.path.abspath(input_path) and \
+            self.max_command_chain_considered == max_command_chain_considered and self.commands_to_ignore_digest == commands_to_ignore_digest and \
+            os.path.getsize(input_path) >= byte_offset and compute_digest_before_byte_offset(input_path, byte_offset) == self.boundary_digest
+
+    def get_parser_resume_point(self):
+        return self.parser_resume_point
+
+    def get_miner(self):
+        return self.miner
+
+def compute_checkpoint_path(data_directory: str, input_path: str) -> str:
+    name = hashlib.sha256(os.path.abspath(input_path).encode('utf-8')).hexdigest()
+    return os.path.join(data_directory, CHECKPOINT_DIRECTORY_NAME, name + CHECKPOINT_FILE_EXTENSION)
+
+def save_checkpoint(path: str, checkpoint: AnalysisCheckpoint, maximum_directory_size_in_bytes: int = DEFAULT_MAXIMUM_CHECKPOINT_DIRECTORY_SIZE_IN_BYTES):
+    '''Replaces the checkpoint at the path and then evicts the least recently saved checkpoints of other records until the directory fits the maximum size.
+    A checkpoint that does not fit the maximum size by itself is removed as well'''
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    replace_file_with_written_file(path, lambda temporary_path: write_checkpoint(temporary_path, checkpoint))
+    if compute_file_size_in_bytes(path) > maximum_directory_size_in_bytes: remove_checkpoint(path)
+    evict_checkpoints_over_maximum_size(os.path.dirname(path), maximum_directory_size_in_bytes, path)
+
+def write_checkpoint(path: str, checkpoint: AnalysisCheckpoint):
+    with open(path, 'wb') as file:
+        pickle.dump(checkpoint, file, protocol = pickle.HIGHEST_PROTOCOL)
+
+def compute_checkpoint_paths(directory: str):
+    if not os.path.exists(directory): return []
+    return [os.path.join(directory, filename) for filename in os.listdir(directory) if filename.endswith(CHECKPOINT_FILE_EXTENSION)]
+
+def evict_checkpoints_over_maximum_size(directory: str, maximum_size_in_bytes: int, path_to_keep: str = None):
+    evict_files_over_maximum_size(compute_checkpoint_paths(directory), maximum_size_in_bytes, path_to_keep)
+
+def compute_checkpoint_directory_size_in_bytes(directory: str) -> int:
+    return sum(compute_file_size_in_bytes(path) for path in compute_checkpoint_paths(directory))
+
+def load_checkpoint(path: str):
+    '''Loads the checkpoint at the path or returns None if there is no usable checkpoint there'''
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except (FileNotFoundError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+def remove_checkpoint(path: str):
+    remove_file_if_present(path)
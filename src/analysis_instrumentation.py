@@ -0,0 +1,131 @@
+import contextlib
+import json
+import os
+import time
+
+PARSING_STAGE = 'parsing'
+IGNORE_FILTERING_STAGE = 'ignore_filtering'
+CHAIN_MINING_STAGE = 'chain_mining'
+ABSTRACTION_STAGE = 'abstraction'
+FILTERING_STAGE = 'filtering'
+SORTING_STAGE = 'sorting'
+OUTPUT_STAGE = 'output'
+REPORT_FILENAME_SUFFIX = ' report.json'
+
+class StageTiming:
+    def __init__(self):
+        self.wall_time_in_seconds: float = 0
+        self.processor_time_in_seconds: float = 0
+        self.number_of_entries: int = 0
+
+    def compute_description(self):
+        return {'wall_time_in_seconds': self.wall_time_in_seconds, 'processor_time_in_seconds': self.processor_time_in_seconds, 'number_of_entries': self.number_of_entries}
+
+class AnalysisInstrumentation:
+    '''Measures the wall and processor time spent in the stages of an analysis and collects counters about it.
+    Time spent in a stage entered inside another stage only counts toward the inner stage'''
+    def __init__(self):
+        self.stage_timings = {}
+        self.counters = {}
+        self.stage_stack = []
+        self.starting_wall_time = time.perf_counter()
+        self.starting_processor_time = time.process_time()
+        self.last_wall_time = self.starting_wall_time
+        self.last_processor_time = self.starting_processor_time
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def _charge_elapsed_time_to_current_stage(self):
+        wall_time = time.perf_counter()
+        processor_time = time.process_time()
+        if self.stage_stack:
+            timing = self.stage_timings[self.stage_stack[-1]]
+            timing.wall_time_in_seconds += wall_time - self.last_wall_time
+            timing.processor_time_in_seconds += processor_time - self.last_processor_time
+        self.last_wall_time = wall_time
+        self.last_processor_time = processor_time
+
+    def enter_stage(self, stage: str):
+        self._charge_elapsed_time_to_current_stage()
+        self.stage_stack.append(stage)
+        if stage not in self.stage_timings: self.stage_timings[stage] = StageTiming()
+        self.stage_timings[stage].number_of_entries += 1
+
+    def exit_stage(self):
+        self._charge_elapsed_time_to_current_stage()
+        self.stage_stack.pop()
+
+    @contextlib.contextmanager
+    def time_stage(self, stage: str):
+        self.enter_stage(stage)
+        try:
+            yield
+        finally:
+            self.exit_stage()
+
+    def generate_timed_entries(self, entries, stage: str):
+        '''Yields the entries while charging the time spent producing them to the stage'''
+        iterator = iter(entries)
+        while True:
+            with self.time_stage(stage):
+                entry = next(iterator, StopIteration)
+            if entry is StopIteration: return
+            yield entry
+
+    def set_counter(self, name: str, value):
+        self.counters[name] = value
+
+    def add_to_counter(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def compute_report(self):
+        return {
+            'wall_time_in_seconds': time.perf_counter() - self.starting_wall_time,
+            'processor_time_in_seconds': time.process_time() - self.starting_processor_time,
+            'stages': {stage: timing.compute_description() for stage, timing in self.stage_timings.items()},
+            'counters': dict(self.counters),
+        }
+
+    def write_report(self, path: str):
+        with open(path, 'w') as file: json.dump(self.compute_report(), file, indent = 4)
+
+class DisabledAnalysisInstrumentation:
+    '''Stands in for the instrumentation while it is disabled so that instrumented code costs close to nothing'''
+    def __init__(self):
+        self.null_context = contextlib.nullcontext()
+
+    def is_enabled(self) -> bool:
+        return False
+
+    def time_stage(self, stage: str):
+        return self.null_context
+
+    def generate_timed_entries(self, entries, stage: str):
+        return entries
+
+    def set_counter(self, name: str, value):
+        pass
+
+    def add_to_counter(self, name: str, amount: int = 1):
+        pass
+
+DISABLED_INSTRUMENTATION = DisabledAnalysisInstrumentation()
+current_instrumentation = DISABLED_INSTRUMENTATION
+
+def get_instrumentation():
+    return current_instrumentation
+
+def start_instrumentation() -> AnalysisInstrumentation:
+    '''Enables instrumentation for the analysis in this process until it is stopped'''
+    global current_instrumentation
+    current_instrumentation = AnalysisInstrumentation()
+    return current_instrumentation
+
+def stop_instrumentation():
+    global current_instrumentation
+    current_instrumentation = DISABLED_INSTRUMENTATION
+
+def compute_report_path(output_path: str) -> str:
+    '''Computes the path of the report that goes alongside the recommendations file'''
+    return os.path.splitext(output_path)[0] + REPORT_FILENAME_SUFFIX
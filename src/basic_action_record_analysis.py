@@ -1,12 +1,33 @@
+import copy
 import math
 import datetime
+import itertools
+import json
+import sys
+import time
+from array import array
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import PurePath
 from typing import List
 import os
 
-from action_records import BasicAction, read_file_record, TalonCapture, CommandChain, RecordingStart
-from text_separation import TextSeparationAnalyzer
-from input_parsing import InputParameters, get_input_parameters_from_user
+from action_records import BasicAction, read_file_record, stream_file_record, TalonCapture, CommandChain, RecordingStart, ActionVocabulary, compute_number_of_words, RecordParser, \
+    FINGERPRINT_MASK, FINGERPRINT_MULTIPLIER, compute_text_fingerprint
+from analysis_checkpoints import AnalysisCheckpoint, compute_checkpoint_path, compute_file_digest, load_checkpoint, save_checkpoint
+from analysis_instrumentation import get_instrumentation, start_instrumentation, stop_instrumentation, compute_report_path, PARSING_STAGE, IGNORE_FILTERING_STAGE, \
+    CHAIN_MINING_STAGE, ABSTRACTION_STAGE, FILTERING_STAGE, SORTING_STAGE, OUTPUT_STAGE
+from memory_profiling import get_memory_profiler, start_memory_profiling, stop_memory_profiling, compute_memory_profile_path
+from progress_reporting import create_progress_reporter, DISABLED_PROGRESS_REPORTER
+from binary_records import is_binary_record_file, read_binary_record, stream_binary_record
+from candidate_statistics import CandidateStatisticsColumns, compute_rows_meeting_basic_command_filter, sort_rows_by_usage, is_vectorized_filtering_available, NO_CHAIN, \
+    CONCRETE_COMMAND_NUMBER_OF_INSTANTIATIONS
+from record_cache import RecordCache, compute_record_cache_key, generate_entries_while_caching
+from rolling_hash_mining import find_repeated_runs_with_rolling_hashes, is_rolling_hash_mining_available, UnchangedChainGroups
+from suffix_array_mining import BoundedSuffixArray, find_repeated_runs, compute_longest_repeated_lengths
+from text_separation import TextSeparationAnalyzer, compute_prose_window_matcher
+from input_parsing import InputParameters, get_input_parameters_from_user, parse_command_line_arguments, DEFAULT_CHAIN_PIPELINE_CACHE_SIZE, TRIE_MINING_ENGINE, SUFFIX_ARRAY_MINING_ENGINE, ROLLING_HASH_MINING_ENGINE, \
+    TEXT_OUTPUT_FORMAT, JSON_OUTPUT_FORMAT
 
 RECOMMENDATION_OUTPUT_DIRECTORY = 'Recommendations'
 DATA_DIRECTORY = 'Data'
@@ -14,17 +35,70 @@ EXPECTED_GRANDPARENT = 'talon'
 INPUT_FILENAME = 'record.txt'
 OUTPUT_FILENAME_PREFIX = 'recommendations '
 OUTPUT_FILE_EXTENSION = '.txt'
+JSON_FILE_EXTENSION = '.json'
+BATCH_SUMMARY_FILENAME_PREFIX = 'batch summary '
 COMMANDS_TO_IGNORE_FILENAME = 'commands_to_ignore.txt'
 FIVE_MINUTES_IN_SECONDS = 5*60
+SHARDS_PER_WORKER = 4
+MEMORY_SAMPLING_INTERVAL_IN_CHAINS = 10000
+LONGEST_CHAIN_OF_SHORT_MINING_PASS = 2
+NUMBER_OF_SHORT_MINING_CHUNKS = 8
+#leaves room for the short chains mined last taking longer than the ones mined first because garbage collection takes longer as the command set grows
+TIME_BUDGET_SAFETY_FACTOR = 2
+DEFAULT_MAXIMUM_EXACT_INSTANTIATION_COUNT = 100
+#basic_command_filter only recommends abstract commands with more than 2 instantiations
+MINIMUM_NUMBER_OF_INSTANTIATIONS_TO_RECOMMEND = 3
+INSERT_SHAPE_PLACEHOLDER_FINGERPRINT = compute_text_fingerprint('insert shape placeholder')
+REPEAT_SHAPE_PLACEHOLDER_FINGERPRINT = compute_text_fingerprint('repeat shape placeholder')
+INSERT_SKELETON_TOKEN = -1
+REPEAT_SKELETON_TOKEN = -2
+INSERT_RUN_TOKEN = 0
+MAXIMUM_NUMBER_OF_NEIGHBORING_SKELETONS_COMPARED = 32
 
 class PotentialCommandInformation:
+    '''Until the candidate is inserted into a command set, its usage statistics are plain counters.
+    Afterwards they are kept in a row of the candidate statistics columns of the set'''
     def __init__(self, actions):
         self.actions = actions
-        self.number_of_times_used: int = 0
-        self.total_number_of_words_dictated: int = 0
         self.number_of_actions: int = len(self.actions)
         self.count_repetitions_appropriately_for_number_of_actions()
-        self.chain = None
+        self.statistics = None
+        self.row = None
+        self.unplaced_number_of_times_used: int = 0
+        self.unplaced_total_number_of_words_dictated: int = 0
+        self.unplaced_chain: int = NO_CHAIN
+    
+    def move_statistics_to(self, statistics: CandidateStatisticsColumns):
+        if self.statistics is None:
+            self.row = statistics.add_row(self.unplaced_number_of_times_used, self.unplaced_total_number_of_words_dictated, len(self.actions), self.unplaced_chain,
+                                          self.compute_number_of_instantiations_for_statistics())
+            self.unplaced_number_of_times_used = self.unplaced_total_number_of_words_dictated = self.unplaced_chain = None
+        else:
+            self.row = statistics.copy_row_from(self.statistics, self.row)
+        self.statistics = statistics
+    
+    def compute_number_of_instantiations_for_statistics(self):
+        return CONCRETE_COMMAND_NUMBER_OF_INSTANTIATIONS
+    
+    @property
+    def number_of_times_used(self) -> int:
+        if self.statistics is None: return self.unplaced_number_of_times_used
+        return self.statistics.numbers_of_times_used[self.row]
+    
+    @property
+    def total_number_of_words_dictated(self) -> int:
+        if self.statistics is None: return self.unplaced_total_number_of_words_dictated
+        return self.statistics.total_numbers_of_words_dictated[self.row]
+    
+    @property
+    def last_chain(self) -> int:
+        if self.statistics is None: return self.unplaced_chain
+        return self.statistics.last_chains[self.row]
+    
+    @property
+    def chain(self):
+        chain = self.last_chain
+        return None if chain == NO_CHAIN else chain
         
     def count_repetitions_appropriately_for_number_of_actions(self):
         for action in self.actions: self.count_repetition_appropriately_for_a_number_of_actions(action)
@@ -54,51 +128,140 @@ class PotentialCommandInformation:
             self.process_relevant_usage(command_chain)
     
     def should_process_usage(self, chain):
-        return self.chain is None or chain > self.chain
+        return chain > self.last_chain
 
     def process_relevant_usage(self, command_chain):
-        self.number_of_times_used += 1
-        self.chain = command_chain.get_chain_ending_index()
-        words = command_chain.get_name().split(' ')
-        self.total_number_of_words_dictated += len(words)
+        self.record_usage(command_chain.get_chain_ending_index(), command_chain.get_number_of_words())
+    
+    def record_usage(self, chain_ending_index: int, number_of_words: int):
+        statistics = self.statistics
+        if statistics is None:
+            self.unplaced_number_of_times_used += 1
+            self.unplaced_chain = chain_ending_index
+            self.unplaced_total_number_of_words_dictated += number_of_words
+            return
+        row = self.row
+        statistics.numbers_of_times_used[row] += 1
+        statistics.last_chains[row] = chain_ending_index
+        statistics.total_numbers_of_words_dictated[row] += number_of_words
+    
+    def record_usages(self, number_of_times_used: int, total_number_of_words_dictated: int, last_chain_ending_index: int):
+        '''Records usages counted all at once, the last of which ends at the chain ending index'''
+        statistics = self.statistics
+        if statistics is None:
+            self.unplaced_number_of_times_used += number_of_times_used
+            self.unplaced_chain = last_chain_ending_index
+            self.unplaced_total_number_of_words_dictated += total_number_of_words_dictated
+            return
+        row = self.row
+        statistics.numbers_of_times_used[row] += number_of_times_used
+        statistics.last_chains[row] = last_chain_ending_index
+        statistics.total_numbers_of_words_dictated[row] += total_number_of_words_dictated
+
+    def merge(self, other, chain_index_offset: int = 0):
+        '''Merges in the usage of the same command in a later part of the record whose chain indices start at the offset.
+        Usage counts and words dictated add up because no chain in the later part overlaps a chain in the earlier part'''
+        statistics = self.statistics
+        if statistics is None:
+            self.unplaced_number_of_times_used += other.number_of_times_used
+            self.unplaced_total_number_of_words_dictated += other.total_number_of_words_dictated
+            if other.chain is not None: self.unplaced_chain = other.chain + chain_index_offset
+            return
+        statistics.numbers_of_times_used[self.row] += other.number_of_times_used
+        statistics.total_numbers_of_words_dictated[self.row] += other.total_number_of_words_dictated
+        if other.chain is not None: statistics.last_chains[self.row] = other.chain + chain_index_offset
 
     def __repr__(self):
         return self.__str__()
     
     def __str__(self):
-        return f'actions: {CommandInformationSet.compute_representation(self)}, number of times used: {self.number_of_times_used}, total number of words dictated: {self.total_number_of_words_dictated}'
+        return f'actions: {compute_string_representation_of_actions(self.actions)}, number of times used: {self.number_of_times_used}, total number of words dictated: {self.total_number_of_words_dictated}'
 
 class ActionSequenceSet:
-    def __init__(self):
+    def __init__(self, vocabulary: ActionVocabulary = None):
         self.set = set()
+        self.vocabulary = vocabulary if vocabulary is not None else ActionVocabulary()
     
     def insert(self, actions):
-        representation = compute_string_representation_of_actions(actions)
+        representation = self.vocabulary.compute_identifiers(actions)
         self.set.add(representation)
     
     def contains(self, actions):
-        return compute_string_representation_of_actions(actions) in self.set
+        return self.vocabulary.compute_identifiers(actions) in self.set
     
     def contains_command_actions(self, command):
         return self.contains(command.get_actions())
     
+    def merge(self, other):
+        if other.vocabulary is self.vocabulary:
+            self.set.update(other.set)
+        else:
+            for identifiers in other.set: self.set.add(self.vocabulary.compute_identifiers(other.vocabulary.get_actions(identifiers)))
+    
     def get_size(self):
         return len(self.set)
 
 
+class InstantiationFingerprintSet:
+    '''Stores 64 bit fingerprints of the distinct instantiations of an abstract command.
+    Counting stops at the maximum exact count because the filters only compare the count against small thresholds'''
+    def __init__(self, vocabulary: ActionVocabulary = None, maximum_exact_count: int = DEFAULT_MAXIMUM_EXACT_INSTANTIATION_COUNT):
+        self.fingerprints = set()
+        self.vocabulary = vocabulary if vocabulary is not None else ActionVocabulary()
+        self.maximum_exact_count = maximum_exact_count
+    
+    def insert(self, actions):
+        self.insert_fingerprint(self.vocabulary.compute_sequence_fingerprint(self.vocabulary.compute_identifiers(actions)))
+    
+    def insert_fingerprint(self, fingerprint: int):
+        if len(self.fingerprints) < self.maximum_exact_count: self.fingerprints.add(fingerprint)
+    
+    def merge(self, other):
+        for fingerprint in other.fingerprints:
+            if self.is_count_capped(): return
+            self.insert_fingerprint(fingerprint)
+    
+    def is_count_capped(self) -> bool:
+        return len(self.fingerprints) >= self.maximum_exact_count
+    
+    def get_size(self):
+        return len(self.fingerprints)
+
 class PotentialAbstractCommandInformation(PotentialCommandInformation):
-    def __init__(self, actions):
-        self.instantiation_set = ActionSequenceSet()
+    def __init__(self, actions, vocabulary: ActionVocabulary = None, maximum_exact_instantiation_count: int = DEFAULT_MAXIMUM_EXACT_INSTANTIATION_COUNT):
+        self.instantiation_set = InstantiationFingerprintSet(vocabulary, maximum_exact_instantiation_count)
         super().__init__(actions)
     
     def process_usage(self, command_chain, instantiation):
         if self.should_process_usage(command_chain.get_chain_number()):
             self.instantiation_set.insert(instantiation.get_actions())
+            self.update_number_of_instantiations_in_statistics()
             self.process_relevant_usage(command_chain)
     
+    def process_usage_of_instantiation_fingerprint(self, chain_number: int, chain_ending_index: int, number_of_words: int, instantiation_fingerprint: int):
+        if self.should_process_usage(chain_number):
+            self.instantiation_set.insert_fingerprint(instantiation_fingerprint)
+            self.update_number_of_instantiations_in_statistics()
+            self.record_usage(chain_ending_index, number_of_words)
+    
+    def merge(self, other, chain_index_offset: int = 0):
+        super().merge(other, chain_index_offset)
+        self.instantiation_set.merge(other.instantiation_set)
+        self.update_number_of_instantiations_in_statistics()
+    
+    def compute_number_of_instantiations_for_statistics(self):
+        return self.instantiation_set.get_size()
+    
+    def update_number_of_instantiations_in_statistics(self):
+        if self.statistics is not None: self.statistics.numbers_of_instantiations[self.row] = self.instantiation_set.get_size()
+
     def get_number_of_instantiations(self):
+        '''Counts the distinct instantiations up to the maximum exact instantiation count'''
         return self.instantiation_set.get_size()
     
+    def is_number_of_instantiations_capped(self):
+        return self.instantiation_set.is_count_capped()
+    
     def is_abstract(self):
         return True
 
@@ -135,6 +298,72 @@ def compute_insert_simplified_command_chain(command_chain):
     new_command = CommandChain(command_chain.get_name(), new_actions, command_chain.get_chain_number(), command_chain.get_size())
     return new_command
 
+class SimplifiedCommandChainBuilder:
+    '''Builds the insert and then repeat simplified form of a command chain incrementally so that appending a command
+    only costs time proportional to the actions of that command'''
+    def __init__(self, chain_number: int):
+        self.name = None
+        self.chain_number: int = chain_number
+        self.chain_size: int = 0
+        self.number_of_words: int = 0
+        self.simplified_actions = []
+        self.pending_insert_text: str = ''
+        self.last_non_repeat_action = None
+        self.repeat_count: int = 0
+    
+    def append_command(self, command):
+        name = command.get_name()
+        if self.name is None: self.name = name
+        else: self.name += ' ' + name
+        self.number_of_words += compute_number_of_words(name)
+        self.append_actions_of_command(command)
+    
+    def append_actions_of_command(self, command):
+        '''Appends the command without tracking the name of the chain'''
+        for action in command.get_actions(): self._process_action(action)
+        self.chain_size += 1
+    
+    def _process_action(self, action):
+        if action.get_name() == 'insert':
+            self.pending_insert_text += action.get_arguments()[0]
+        else:
+            self._add_pending_insert()
+            self._process_action_for_repeat_simplification(action)
+    
+    def _add_pending_insert(self):
+        if self.pending_insert_text:
+            self._process_action_for_repeat_simplification(BasicAction('insert', [self.pending_insert_text]))
+            self.pending_insert_text = ''
+    
+    def _process_action_for_repeat_simplification(self, action):
+        if action == self.last_non_repeat_action:
+            self.repeat_count += 1
+        else:
+            self._add_pending_repeat()
+            self.simplified_actions.append(action)
+            self.last_non_repeat_action = action
+    
+    def _add_pending_repeat(self):
+        if self.repeat_count > 0:
+            self.simplified_actions.append(BasicAction('repeat', [self.repeat_count]))
+            self.repeat_count = 0
+    
+    def compute_pending_actions(self):
+        '''Computes the actions that later commands could still change: the repeat count in progress followed by the insert text in progress'''
+        pending_actions = []
+        if self.repeat_count > 0: pending_actions.append(BasicAction('repeat', [self.repeat_count]))
+        if self.pending_insert_text: pending_actions.append(BasicAction('insert', [self.pending_insert_text]))
+        return pending_actions
+    
+    def get_simplified_actions(self):
+        '''Obtains the simplified actions that appending commands can no longer change'''
+        return self.simplified_actions
+    
+    def compute_command_chain(self, pending_actions = None):
+        if pending_actions is None: pending_actions = self.compute_pending_actions()
+        actions = self.simplified_actions + pending_actions
+        return CommandChain(self.name, actions, self.chain_number, self.chain_size, self.number_of_words)
+
 def compute_string_representation_of_actions(actions):
     representation = ''
     for action in actions:
@@ -242,40 +471,12 @@ def generate_prose_command_command_name(words, starting_index: int, prose_size:
     command_name = ' '.join(command_name_parts)
     return command_name
 
-def generate_prose_from_words(words, starting_index: int, prose_size: int) -> str:
-    prose = ' '.join(words[starting_index:starting_index + prose_size])
-    return prose
-
-def compute_text_analyzer_for_prose_and_insert(prose: str, insert: InsertAction):
-    analyzer = TextSeparationAnalyzer(insert.text)
-    analyzer.search_for_prose_in_separated_part(prose)
-    return analyzer
-
-class ValidProseNotFoundException(Exception):
-    pass
-
-def find_prose_match_for_command_given_insert_at_interval(words, insert, starting_index, prose_size):
-    prose = generate_prose_from_words(words, starting_index, prose_size)
-    analyzer = compute_text_analyzer_for_prose_and_insert(prose, insert)
-    if analyzer.is_prose_separator_consistent() and analyzer.has_found_prose() and has_valid_case(analyzer):
-        command_name = generate_prose_command_command_name(words, starting_index, prose_size)
-        return ProseMatch(analyzer, command_name)
-    raise ValidProseNotFoundException()
-
-def find_prose_matches_for_command_given_insert_at_starting_index(words, insert, starting_index, max_prose_size_to_consider):
-    matches = []
-    maximum_size = min(max_prose_size_to_consider, len(words) - starting_index + 1)
-    for prose_size in range(1, maximum_size):
-        try: matches.append(find_prose_match_for_command_given_insert_at_interval(words, insert, starting_index, prose_size))
-        except ValidProseNotFoundException: break
-    return matches
-
 def find_prose_matches_for_command_given_insert(command_chain, insert, max_prose_size_to_consider):
     dictation: str = command_chain.get_name()
     words = dictation.split(' ')
-    matches = []
-    for starting_index in range(len(words)): matches.extend(find_prose_matches_for_command_given_insert_at_starting_index(words, insert, starting_index, max_prose_size_to_consider))
-    return matches
+    matcher = compute_prose_window_matcher(insert.text)
+    windows = matcher.find_prose_windows(words, max_prose_size_to_consider - 1, has_valid_case)
+    return [ProseMatch(analyzer, generate_prose_command_command_name(words, starting_index, prose_size)) for starting_index, prose_size, analyzer in windows]
 
 def is_acceptable_abstract_representation(representation):
     return len(representation.get_actions()) > 1
@@ -309,27 +510,588 @@ def basic_command_filter(command: PotentialCommandInformation):
 def is_record_entry_recording_start(record_entry) -> bool:
     return type(record_entry) == RecordingStart
 
-def is_command_after_chain_start_exceeding_time_gap_threshold(record_entry, chain_start_index, current_chain_index) -> bool:
-    return current_chain_index > chain_start_index and record_entry.is_command_record() and record_entry.is_time_information_available() \
-    and record_entry.get_seconds_since_action() > FIVE_MINUTES_IN_SECONDS
+def is_command_exceeding_time_gap_threshold(record_entry, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS) -> bool:
+    return record_entry.is_command_record() and record_entry.is_time_information_available() and record_entry.get_seconds_since_action() > gap_threshold_in_seconds
 
-def should_command_chain_not_cross_entry_at_record_index(record, chain_start_index, current_chain_index) -> bool:
+def is_command_after_chain_start_exceeding_time_gap_threshold(record_entry, chain_start_index, current_chain_index, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS) -> bool:
+    return current_chain_index > chain_start_index and is_command_exceeding_time_gap_threshold(record_entry, gap_threshold_in_seconds)
+
+def should_command_chain_not_cross_entry_at_record_index(record, chain_start_index, current_chain_index, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS) -> bool:
     record_entry = record[current_chain_index]
     return is_record_entry_recording_start(record_entry) or \
-        is_command_after_chain_start_exceeding_time_gap_threshold(record_entry, chain_start_index, current_chain_index)
+        is_command_after_chain_start_exceeding_time_gap_threshold(record_entry, chain_start_index, current_chain_index, gap_threshold_in_seconds)
+
+def is_record_entry_session_start(record_entry, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS) -> bool:
+    '''Determines if no chain starting before the entry can reach it'''
+    return is_record_entry_recording_start(record_entry) or is_command_exceeding_time_gap_threshold(record_entry, gap_threshold_in_seconds)
+
+class RecordSegmentation:
+    '''Splits a record into sessions at its chain barriers once, so that where a chain has to stop is found in constant time.
+    A recording start belongs to no session, while a command after a long enough gap starts a new session'''
+    def __init__(self, record, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS):
+        self.gap_threshold_in_seconds = gap_threshold_in_seconds
+        self.recording_start_flags = array('b')
+        self.barrier_indices = []
+        for index, entry in enumerate(record):
+            self.recording_start_flags.append(is_record_entry_recording_start(entry))
+            if index > 0 and is_record_entry_session_start(entry, gap_threshold_in_seconds): self.barrier_indices.append(index)
+        self.size: int = len(self.recording_start_flags)
+        self.next_barrier_indices = self._compute_next_barrier_indices()
+
+    def _compute_next_barrier_indices(self):
+        '''Computes the first barrier after every index'''
+        next_barrier_indices = array('q', bytes(8*self.size))
+        barrier_indices = self.barrier_indices + [self.size]
+        barrier_number = 0
+        for index in range(self.size):
+            if barrier_indices[barrier_number] <= index: barrier_number += 1
+            next_barrier_indices[index] = barrier_indices[barrier_number]
+        return next_barrier_indices
+
+    def compute_chain_target(self, chain: int, max_command_chain_considered: int) -> int:
+        '''Computes the index right after the last entry the chain starting at the index can reach'''
+        if self.recording_start_flags[chain]: return chain
+        return min(self.next_barrier_indices[chain], chain + max_command_chain_considered)
+
+    def is_chain_barrier(self, index: int) -> bool:
+        '''Determines if no chain starting before the index can reach the entry at the index'''
+        return index > 0 and self.next_barrier_indices[index - 1] == index
+
+    def get_barrier_indices(self):
+        return self.barrier_indices
+
+    def compute_sessions(self):
+        '''Computes the starting and ending index of every session with at least one command'''
+        sessions = []
+        for start, ending in zip([0] + self.barrier_indices, self.barrier_indices + [self.size]):
+            if start < ending and self.recording_start_flags[start]: start += 1
+            if start < ending: sessions.append((start, ending))
+        return sessions
+
+    def get_gap_threshold_in_seconds(self) -> int:
+        return self.gap_threshold_in_seconds
+
+class StreamingRecordSegmentation:
+    '''Finds where chains have to stop in a streamed record by keeping the barriers that chains not processed yet can still reach.
+    Chains must be processed in order once every entry they can reach has been added'''
+    def __init__(self, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS):
+        self.gap_threshold_in_seconds = gap_threshold_in_seconds
+        self.barriers = deque()
+        self.size: int = 0
+
+    def add_entry(self, entry):
+        if is_record_entry_session_start(entry, self.gap_threshold_in_seconds): self.barriers.append((self.size, is_record_entry_recording_start(entry)))
+        self.size += 1
+
+    def compute_chain_target(self, chain: int, max_command_chain_considered: int) -> int:
+        while self.barriers and self.barriers[0][0] < chain: self.barriers.popleft()
+        target = min(self.size, chain + max_command_chain_considered)
+        for index, is_recording_start in itertools.islice(self.barriers, 2):
+            if index > chain or is_recording_start: return min(index, target)
+        return target
+
+    def get_gap_threshold_in_seconds(self) -> int:
+        return self.gap_threshold_in_seconds
+
+def compute_chain_target(record, chain: int, max_command_chain_considered: int, segmentation = None) -> int:
+    '''Computes the index right after the last entry the chain starting at the index can reach, checking every entry if the record is not segmented'''
+    if segmentation is not None: return segmentation.compute_chain_target(chain, max_command_chain_considered)
+    chain_target = min(len(record), chain + max_command_chain_considered)
+    for chain_ending_index in range(chain, chain_target):
+        if should_command_chain_not_cross_entry_at_record_index(record, chain, chain_ending_index): return chain_ending_index
+    return chain_target
+
+class CandidateTrieNode:
+    def __init__(self):
+        self.children = {}
+        self.information = None
+    
+    def compute_child(self, identifier: int):
+        child = self.children.get(identifier)
+        if child is None:
+            child = CandidateTrieNode()
+            self.children[identifier] = child
+        return child
+    
+    def find_child(self, identifier: int):
+        return self.children.get(identifier)
+    
+    def get_information(self):
+        return self.information
+    
+    def set_information(self, information):
+        self.information = information
 
-class CommandInformationSet:
+class CandidateTrie:
+    '''Stores potential command information keyed on action identifiers so that candidates sharing a prefix share the nodes for it'''
     def __init__(self):
-        self.commands = {}
+        self.root = CandidateTrieNode()
+    
+    def get_root(self):
+        return self.root
+    
+    def compute_node(self, identifiers, starting_node: CandidateTrieNode = None):
+        node = self.root if starting_node is None else starting_node
+        for identifier in identifiers: node = node.compute_child(identifier)
+        return node
+    
+    def find_node(self, identifiers):
+        node = self.root
+        for identifier in identifiers:
+            node = node.find_child(identifier)
+            if node is None: return None
+        return node
+
+class CandidateTrieCursor:
+    '''Follows the committed simplified actions of a growing command chain through the candidate trie
+    so that extending the chain only walks the actions added since the previous extension'''
+    def __init__(self, trie: CandidateTrie, vocabulary: ActionVocabulary):
+        self.node = trie.get_root()
+        self.vocabulary = vocabulary
+        self.number_of_actions_followed: int = 0
+    
+    def follow_committed_actions(self, committed_actions):
+        for index in range(self.number_of_actions_followed, len(committed_actions)):
+            self.node = self.node.compute_child(self.vocabulary.compute_identifier(committed_actions[index]))
+        self.number_of_actions_followed = len(committed_actions)
+    
+    def compute_node_with_pending_actions(self, pending_actions):
+        node = self.node
+        for action in pending_actions: node = node.compute_child(self.vocabulary.compute_identifier(action))
+        return node
+
+def compute_abstraction_shape_fingerprints(identifiers, vocabulary: ActionVocabulary):
+    '''Computes the fingerprint of the action sequence along with the fingerprints of its abstraction shapes.
+    A shape is the sequence with one insert or with every repeat replaced by a placeholder. Every chain that makes the same abstract command shares
+    one of its shapes. Substituting a placeholder only changes one term of the polynomial fingerprint, so every shape costs constant time'''
+    fingerprint = 0
+    weight = 1
+    insert_differences = []
+    repeat_difference = 0
+    has_repeat = False
+    for index in range(len(identifiers) - 1, -1, -1):
+        identifier = identifiers[index]
+        action_fingerprint = vocabulary.get_fingerprint(identifier)
+        fingerprint += action_fingerprint*weight
+        name = vocabulary.get_action(identifier).get_name()
+        if name == 'insert':
+            insert_differences.append((INSERT_SHAPE_PLACEHOLDER_FINGERPRINT - action_fingerprint)*weight)
+        elif name == 'repeat':
+            has_repeat = True
+            repeat_difference += (REPEAT_SHAPE_PLACEHOLDER_FINGERPRINT - action_fingerprint)*weight
+        weight = (weight*FINGERPRINT_MULTIPLIER) & FINGERPRINT_MASK
+    fingerprint = (fingerprint + len(identifiers)*weight) & FINGERPRINT_MASK
+    shapes = [(fingerprint + difference) & FINGERPRINT_MASK for difference in insert_differences]
+    if len(identifiers) > 2 and has_repeat: shapes.append((fingerprint + repeat_difference) & FINGERPRINT_MASK)
+    return fingerprint, shapes
+
+class AbstractionShapeStatistics:
+    '''Finds the abstraction shapes shared by enough distinct simplified chains for an abstract command with that shape to be recommended.
+    Counting for a shape stops once it has enough instantiations. Until then, the shape keeps fewer fingerprints than the minimum in a tuple,
+    since most shapes never become viable and a tuple of a few fingerprints takes a fraction of the memory of a set'''
+    def __init__(self, vocabulary: ActionVocabulary, minimum_number_of_instantiations: int = MINIMUM_NUMBER_OF_INSTANTIATIONS_TO_RECOMMEND):
+        self.vocabulary = vocabulary
+        self.minimum_number_of_instantiations = minimum_number_of_instantiations
+        self.instantiations = {}
+        self.viable_shapes = set()
+    
+    def add_chain(self, identifiers):
+        instantiation, shapes = compute_abstraction_shape_fingerprints(identifiers, self.vocabulary)
+        for shape in shapes:
+            if shape in self.viable_shapes: continue
+            instantiations = self.instantiations.get(shape, ())
+            if instantiation in instantiations: continue
+            instantiations += (instantiation,)
+            if len(instantiations) >= self.minimum_number_of_instantiations:
+                self.viable_shapes.add(shape)
+                self.instantiations.pop(shape, None)
+            else:
+                self.instantiations[shape] = instantiations
+    
+    def add_chains_starting_at(self, record, chain, max_command_chain_considered, segmentation: RecordSegmentation = None):
+        chain_builder = SimplifiedCommandChainBuilder(chain)
+        committed_identifiers = []
+        for chain_ending_index in range(chain, compute_chain_target(record, chain, max_command_chain_considered, segmentation)):
+            chain_builder.append_actions_of_command(record[chain_ending_index])
+            pending_actions = chain_builder.compute_pending_actions()
+            simplified_actions = chain_builder.get_simplified_actions()
+            committed_identifiers.extend(self.vocabulary.compute_identifiers(simplified_actions[len(committed_identifiers):]))
+            self.add_chain(tuple(committed_identifiers) + self.vocabulary.compute_identifiers(pending_actions))
+    
+    def get_viable_shapes(self):
+        return frozenset(self.viable_shapes)
+
+def compute_viable_abstraction_shapes(record, max_command_chain_considered, vocabulary: ActionVocabulary, segmentation: RecordSegmentation = None):
+    '''Computes the fingerprints of the abstraction shapes that abstract commands need in order to have enough instantiations to be recommended'''
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    statistics = AbstractionShapeStatistics(vocabulary)
+    for chain in range(len(record)): statistics.add_chains_starting_at(record, chain, max_command_chain_considered, segmentation)
+    return statistics.get_viable_shapes()
+
+def compute_skeleton_token(action, vocabulary: ActionVocabulary) -> int:
+    name = action.get_name()
+    if name == 'insert': return INSERT_SKELETON_TOKEN
+    if name == 'repeat': return REPEAT_SKELETON_TOKEN
+    return vocabulary.compute_identifier(action)
+
+def compute_longest_chain_skeleton_starting_at(record, chain, max_command_chain_considered, vocabulary: ActionVocabulary, segmentation: RecordSegmentation = None):
+    '''Computes the skeleton of the longest chain starting at the index, which is the simplified actions with the text of inserts and the counts of repeats left out.
+    The skeleton of every shorter chain starting at the index is a prefix of it, and chains making the same concrete or abstract command share their skeleton'''
+    chain_builder = SimplifiedCommandChainBuilder(chain)
+    for chain_ending_index in range(chain, compute_chain_target(record, chain, max_command_chain_considered, segmentation)):
+        chain_builder.append_actions_of_command(record[chain_ending_index])
+    actions = chain_builder.get_simplified_actions() + chain_builder.compute_pending_actions()
+    return tuple(compute_skeleton_token(action, vocabulary) for action in actions)
+
+class ChainSkeletonStream:
+    '''The skeletons of the simplified actions of every session of a record in one token sequence with a separator token at every chain barrier.
+    Simplification merges every run of inserts into one insert, dropping it if it has no text, and every run of equal actions into the action and a repeat.
+    Each merged run is a unit of the stream. A chain starting within a unit sees a shorter run, whose skeleton is that of the unit or its first token,
+    and a chain ending within a unit sees a run whose skeleton is a prefix of that of the unit, so every chain skeleton is its first token followed by a substring of the stream'''
+    def __init__(self, record, vocabulary: ActionVocabulary, segmentation: RecordSegmentation):
+        self.tokens = []
+        self.unit_skeleton_starts = array('q')
+        self.unit_sizes = array('q')
+        #the unit of every action, which is -1 for an insert in a run without text, and the place in its unit of every action that is not an insert, which is 0 for inserts
+        self.action_units = array('q')
+        self.action_ordinals = array('q')
+        #the start and ending of the run of every insert, which are 0 for other actions
+        self.insert_run_starts = array('q')
+        self.insert_run_endings = array('q')
+        self.numbers_of_inserts_with_text_before_actions = array('q', [0])
+        self.numbers_of_other_actions_before_actions = array('q', [0])
+        self.segment_skeleton_starts = {}
+        self.unit = None
+        self.unit_identifier = None
+        self.unit_token = None
+        self.insert_run_start = None
+        self.entry_action_starts = array('q')
+        self.entry_action_endings = array('q')
+        for index, entry in enumerate(record):
+            if index == 0 or segmentation.is_chain_barrier(index): self._start_segment()
+            self.entry_action_starts.append(len(self.action_units))
+            if not is_record_entry_recording_start(entry):
+                for action in entry.get_actions(): self._add_action(action, vocabulary)
+            self.entry_action_endings.append(len(self.action_units))
+        self._end_insert_run()
+        self._end_unit()
+        self.skeleton_endings = self._compute_skeleton_endings()
+
+    def _start_segment(self):
+        self._end_insert_run()
+        self._end_unit()
+        if self.segment_skeleton_starts: self.tokens.append(REPEAT_SKELETON_TOKEN - len(self.segment_skeleton_starts))
+        self.segment_skeleton_starts[len(self.action_units)] = len(self.tokens)
+        self.unit_identifier = None
+
+    def _add_action(self, action, vocabulary: ActionVocabulary):
+        if action.get_name() == 'insert':
+            if self.insert_run_start is None: self.insert_run_start = len(self.action_units)
+            self._append_action(-1, 0, self.insert_run_start, 1 if action.get_arguments()[0] else 0, 0)
+            return
+        self._end_insert_run()
+        identifier = vocabulary.compute_identifier(action)
+        if identifier == self.unit_identifier: self.unit_sizes[self.unit] += 1
+        else: self._start_unit(identifier, compute_skeleton_token(action, vocabulary))
+        self._append_action(self.unit, self.unit_sizes[self.unit], 0, 0, 1)
+
+    def _append_action(self, unit: int, ordinal: int, insert_run_start: int, number_of_inserts_with_text: int, number_of_other_actions: int):
+        self.action_units.append(unit)
+        self.action_ordinals.append(ordinal)
+        self.insert_run_starts.append(insert_run_start)
+        self.insert_run_endings.append(0)
+        self.numbers_of_inserts_with_text_before_actions.append(self.numbers_of_inserts_with_text_before_actions[-1] + number_of_inserts_with_text)
+        self.numbers_of_other_actions_before_actions.append(self.numbers_of_other_actions_before_actions[-1] + number_of_other_actions)
+
+    def _start_unit(self, identifier, token: int):
+        self._end_unit()
+        self.unit = len(self.unit_sizes)
+        self.unit_identifier = identifier
+        self.unit_token = token
+        self.unit_sizes.append(1)
+        self.unit_skeleton_starts.append(0)
+
+    def _end_unit(self):
+        if self.unit is None: return
+        self.unit_skeleton_starts[self.unit] = len(self.tokens)
+        self.tokens.append(self.unit_token)
+        if self.unit_sizes[self.unit] > 1: self.tokens.append(REPEAT_SKELETON_TOKEN)
+        self.unit = None
+
+    def _end_insert_run(self):
+        '''Makes the run of inserts a unit of its own if it has text, while a run without text is dropped and lets equal actions around it form one unit'''
+        start = self.insert_run_start
+        if start is None: return
+        ending = len(self.action_units)
+        self.insert_run_start = None
+        for position in range(start, ending): self.insert_run_endings[position] = ending
+        if not self._has_insert_text(start, ending): return
+        self._start_unit(None, INSERT_SKELETON_TOKEN)
+        for position in range(start, ending): self.action_units[position] = self.unit
+        self._end_unit()
+
+    def _has_insert_text(self, start: int, ending: int) -> bool:
+        return self.numbers_of_inserts_with_text_before_actions[ending] > self.numbers_of_inserts_with_text_before_actions[start]
+
+    def _compute_skeleton_endings(self):
+        '''Computes for every action where the skeleton of the actions of its session up to and including it ends in the stream'''
+        skeleton_endings = array('q', bytes(8*len(self.action_units)))
+        skeleton_ending = 0
+        skeleton_ending_before_insert_run = 0
+        for position, unit in enumerate(self.action_units):
+            skeleton_ending = self.segment_skeleton_starts.get(position, skeleton_ending)
+            ordinal = self.action_ordinals[position]
+            if ordinal > 0: skeleton_ending = self.unit_skeleton_starts[unit] + min(ordinal, 2)
+            else:
+                insert_run_start = self.insert_run_starts[position]
+                if insert_run_start == position: skeleton_ending_before_insert_run = skeleton_ending
+                if self._has_insert_text(insert_run_start, position + 1): skeleton_ending = self.unit_skeleton_starts[unit] + 1
+                else: skeleton_ending = skeleton_ending_before_insert_run
+            skeleton_endings[position] = skeleton_ending
+        return skeleton_endings
+
+    def get_tokens(self):
+        return self.tokens
+
+    def compute_chain_skeleton_placement(self, chain: int, chain_target: int):
+        '''Computes the first token of the skeleton of the chain, where the rest of it starts in the stream, and its length, which is 0 for an empty skeleton'''
+        if chain_target == chain: return None, 0, 0
+        start = self.entry_action_starts[chain]
+        ending = self.entry_action_endings[chain_target - 1]
+        if start < ending and self.action_ordinals[start] == 0:
+            if self._has_insert_text(start, self.insert_run_endings[start]):
+                unit_skeleton_ending = self.unit_skeleton_starts[self.action_units[start]] + 1
+                skeleton_ending = self.skeleton_endings[ending - 1]
+                if skeleton_ending <= unit_skeleton_ending: return INSERT_SKELETON_TOKEN, unit_skeleton_ending, 1 if self._has_insert_text(start, ending) else 0
+                return INSERT_SKELETON_TOKEN, unit_skeleton_ending, 1 + skeleton_ending - unit_skeleton_ending
+            start = self.insert_run_endings[start]
+        if start >= ending: return None, 0, 0
+        unit = self.action_units[start]
+        unit_size = self.unit_sizes[unit]
+        unit_skeleton_start = self.unit_skeleton_starts[unit]
+        unit_skeleton_ending = unit_skeleton_start + min(unit_size, 2)
+        token = self.tokens[unit_skeleton_start]
+        if unit_size - self.action_ordinals[start] >= 1 or unit_size == 1: first_unit_skeleton_length = unit_skeleton_ending - unit_skeleton_start
+        else: first_unit_skeleton_length = 1
+        rest_start = unit_skeleton_ending - first_unit_skeleton_length + 1
+        skeleton_ending = self.skeleton_endings[ending - 1]
+        if skeleton_ending <= unit_skeleton_ending:
+            return token, rest_start, min(self.numbers_of_other_actions_before_actions[ending] - self.numbers_of_other_actions_before_actions[start], 2)
+        return token, rest_start, first_unit_skeleton_length + skeleton_ending - unit_skeleton_ending
+
+class ChainSkeletonPlacements:
+    '''The first token of the skeleton of the chain from every start of a record, where the rest of it starts in the skeleton stream, and its length'''
+    def __init__(self, record, stream: ChainSkeletonStream, max_command_chain_considered, segmentation: RecordSegmentation):
+        self.first_tokens = array('q')
+        self.rest_starts = array('q')
+        self.skeleton_lengths = array('q')
+        for chain in range(len(record)):
+            first_token, rest_start, skeleton_length = stream.compute_chain_skeleton_placement(chain, compute_chain_target(record, chain, max_command_chain_considered, segmentation))
+            self.first_tokens.append(first_token if first_token is not None else 0)
+            self.rest_starts.append(rest_start)
+            self.skeleton_lengths.append(skeleton_length)
+
+    def compute_sort_key(self, chain: int, ranks):
+        rest_start = self.rest_starts[chain]
+        return self.first_tokens[chain], ranks[rest_start] if rest_start < len(ranks) else -1
+
+    def compute_common_prefix_length(self, first: int, second: int, suffix_array: BoundedSuffixArray) -> int:
+        '''Computes the length of the common prefix of the skeletons of the chains from the starts had they not ended early, up to the maximum length of the suffix array'''
+        if self.first_tokens[first] != self.first_tokens[second]: return 0
+        first_rest_start = self.rest_starts[first]
+        second_rest_start = self.rest_starts[second]
+        if first_rest_start >= suffix_array.size or second_rest_start >= suffix_array.size: return 1
+        return 1 + suffix_array.compute_common_prefix_length(first_rest_start, second_rest_start)
+
+def compute_frequent_chain_skeleton_lengths(record, max_command_chain_considered, vocabulary: ActionVocabulary, segmentation: RecordSegmentation = None):
+    '''Computes for every chain start the length of the longest skeleton prefix that a chain starting somewhere else shares.
+    A longer chain from the start has a skeleton no other start has, so it is used at most once and basic_command_filter rejects everything made from it.
+    The skeletons are never built. A bounded suffix array over the skeleton stream of the record sorts the skeletons the chains would have without ending early,
+    and the skeleton of a chain is a prefix of that, so a start shares at most the common prefix with another start, capped by both skeleton lengths.
+    Starts next to each other in that order are compared until the common prefix drops to what the start already shares,
+    and a start whose comparisons do not settle within a bounded number of neighbors is given its whole skeleton length, which only prunes less'''
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    stream = ChainSkeletonStream(record, vocabulary, segmentation)
+    placements = ChainSkeletonPlacements(record, stream, max_command_chain_considered, segmentation)
+    skeleton_lengths = placements.skeleton_lengths
+    lengths = [0]*len(record)
+    starts = [chain for chain in range(len(record)) if skeleton_lengths[chain] > 0]
+    if not starts: return lengths
+    suffix_array = BoundedSuffixArray(stream.get_tokens(), max(skeleton_lengths))
+    ranks = suffix_array.get_ranks()
+    starts.sort(key = lambda chain: placements.compute_sort_key(chain, ranks))
+    common_prefix_lengths = [0] + [placements.compute_common_prefix_length(previous, current, suffix_array) for previous, current in zip(starts, starts[1:])]
+    for index, chain in enumerate(starts):
+        lengths[chain] = max(compute_longest_shared_skeleton_length_in_direction(starts, skeleton_lengths, common_prefix_lengths, index, direction) for direction in (-1, 1))
+    return lengths
+
+def compute_longest_shared_skeleton_length_in_direction(starts, skeleton_lengths, common_prefix_lengths, index: int, direction: int) -> int:
+    '''Computes the longest skeleton prefix the start at the index shares with the starts after it in sorted order, or before it if the direction is -1'''
+    skeleton_length = skeleton_lengths[starts[index]]
+    longest_shared_length = 0
+    common_prefix_length = skeleton_length
+    for number_compared in range(1, MAXIMUM_NUMBER_OF_NEIGHBORING_SKELETONS_COMPARED + 1):
+        neighbor_index = index + direction*number_compared
+        if neighbor_index < 0 or neighbor_index >= len(starts): return longest_shared_length
+        common_prefix_length = min(common_prefix_length, common_prefix_lengths[neighbor_index if direction > 0 else neighbor_index + 1])
+        if common_prefix_length <= longest_shared_length: return longest_shared_length
+        longest_shared_length = max(longest_shared_length, min(common_prefix_length, skeleton_lengths[starts[neighbor_index]]))
+        if longest_shared_length >= skeleton_length: return longest_shared_length
+    return skeleton_length
+
+class AbstractCommandTemplate:
+    '''An abstract command made from a command chain along with the candidate trie node it is stored at'''
+    def __init__(self, node: CandidateTrieNode, actions, number_of_words: int):
+        self.node = node
+        self.actions = actions
+        self.number_of_words = number_of_words
+
+class ChainAbstraction:
+    '''The abstract commands made from a command chain and the fingerprint of the chain they instantiate'''
+    def __init__(self, abstract_commands, instantiation_fingerprint: int):
+        self.abstract_commands = abstract_commands
+        self.instantiation_fingerprint = instantiation_fingerprint
+
+class ChainPipelineCache:
+    '''Remembers the abstractions of the most recently seen command chains so that a recurring chain skips making its abstract commands.
+    Keys pair the dictation with the candidate trie node of the simplified actions, which identifies those actions within one command set'''
+    def __init__(self, maximum_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+        self.maximum_size = maximum_size
+        self.entries = OrderedDict()
+        self.number_of_hits: int = 0
+        self.number_of_misses: int = 0
+    
+    def find(self, key):
+        abstraction = self.entries.get(key)
+        if abstraction is None:
+            self.number_of_misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.number_of_hits += 1
+        return abstraction
+    
+    def store(self, key, abstraction: ChainAbstraction):
+        if self.maximum_size <= 0: return
+        self.entries[key] = abstraction
+        if len(self.entries) > self.maximum_size: self.entries.popitem(last = False)
+    
+    def set_maximum_size(self, maximum_size: int):
+        self.maximum_size = maximum_size
+        while len(self.entries) > max(maximum_size, 0): self.entries.popitem(last = False)
+    
+    def merge_statistics(self, other):
+        self.number_of_hits += other.number_of_hits
+        self.number_of_misses += other.number_of_misses
+    
+    def get_number_of_hits(self) -> int:
+        return self.number_of_hits
+    
+    def get_number_of_misses(self) -> int:
+        return self.number_of_misses
+    
+    def get_number_of_lookups(self) -> int:
+        return self.number_of_hits + self.number_of_misses
+    
+    def get_hit_rate(self) -> float:
+        if self.get_number_of_lookups() == 0: return 0.0
+        return self.number_of_hits/self.get_number_of_lookups()
+    
+    def get_size(self) -> int:
+        return len(self.entries)
+    
+    def __getstate__(self):
+        return {'maximum_size': self.maximum_size, 'number_of_hits': self.number_of_hits, 'number_of_misses': self.number_of_misses}
+    
+    def __setstate__(self, state):
+        self.__init__(state['maximum_size'])
+        self.number_of_hits = state['number_of_hits']
+        self.number_of_misses = state['number_of_misses']
+
+class MiningStatistics:
+    '''Counts the work done while mining a record'''
+    def __init__(self):
+        self.number_of_chains_processed: int = 0
+        self.number_of_partial_chains_processed: int = 0
+        self.number_of_text_separation_analyzers_constructed: int = 0
+
+    def merge(self, other):
+        self.number_of_chains_processed += other.number_of_chains_processed
+        self.number_of_partial_chains_processed += other.number_of_partial_chains_processed
+        self.number_of_text_separation_analyzers_constructed += other.number_of_text_separation_analyzers_constructed
+
+class UnsupportedTimeBudgetException(ValueError): pass
+
+class MiningCoverage:
+    '''How much of the search space of command chains was mined within the time budget.
+    Every chain start with every length up to where the chain has to stop is a partial chain of the search space.
+    The short partial chains are those up to the length of the short mining pass and the long ones are the rest'''
+    def __init__(self, short_chain_length: int, max_command_chain_considered: int, total_number_of_short_partial_chains: int, total_number_of_long_partial_chains: int):
+        self.short_chain_length: int = short_chain_length
+        self.max_command_chain_considered: int = max_command_chain_considered
+        self.total_number_of_short_partial_chains: int = total_number_of_short_partial_chains
+        self.total_number_of_long_partial_chains: int = total_number_of_long_partial_chains
+        self.number_of_short_partial_chains_mined: int = 0
+        self.number_of_long_partial_chains_mined: int = 0
+
+    def compute_fraction_mined(self) -> float:
+        total = self.total_number_of_short_partial_chains + self.total_number_of_long_partial_chains
+        if total == 0: return 1.0
+        return (self.number_of_short_partial_chains_mined + self.number_of_long_partial_chains_mined)/total
+
+    def compute_fraction_of_short_partial_chains_mined(self) -> float:
+        if self.total_number_of_short_partial_chains == 0: return 1.0
+        return self.number_of_short_partial_chains_mined/self.total_number_of_short_partial_chains
+
+    def compute_fraction_of_long_partial_chains_mined(self) -> float:
+        if self.total_number_of_long_partial_chains == 0: return 1.0
+        return self.number_of_long_partial_chains_mined/self.total_number_of_long_partial_chains
+
+    def is_complete(self) -> bool:
+        return self.compute_fraction_mined() == 1.0
+
+    def compute_description(self) -> str:
+        if self.is_complete(): return f'mined every command chain of up to {self.max_command_chain_considered} commands within the time budget'
+        return f'the time budget allowed mining {self.compute_fraction_mined():.1%} of the command chains of up to {self.max_command_chain_considered} commands, ' + \
+            f'including {self.compute_fraction_of_short_partial_chains_mined():.1%} of the chains of up to {self.short_chain_length} commands ' + \
+            f'and {self.compute_fraction_of_long_partial_chains_mined():.1%} of the longer chains, sampled from sessions across the record'
+
+    def compute_summary(self):
+        return {
+            'fraction_mined': self.compute_fraction_mined(),
+            'fraction_of_short_chains_mined': self.compute_fraction_of_short_partial_chains_mined(),
+            'fraction_of_long_chains_mined': self.compute_fraction_of_long_partial_chains_mined(),
+            'short_chain_length': self.short_chain_length,
+        }
+
+class CommandInformationSet:
+    def __init__(self, vocabulary: ActionVocabulary = None, chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE, viable_abstraction_shapes = None,
+                 frequent_chain_skeleton_lengths = None):
+        '''If the viable abstraction shapes are given, only chains with one of those shapes are abstracted.
+        If the frequent chain skeleton lengths are given, chains stop growing once their skeleton is longer than the length for their start'''
+        self.candidate_trie = CandidateTrie()
+        self.commands = []
+        #row i of the statistics belongs to commands[i]
+        self.candidate_statistics = CandidateStatisticsColumns()
+        self.vocabulary = vocabulary if vocabulary is not None else ActionVocabulary()
+        self.chain_pipeline_cache = ChainPipelineCache(chain_pipeline_cache_size)
+        self.mining_statistics = MiningStatistics()
+        self.mining_coverage = None
+        self.viable_abstraction_shapes = viable_abstraction_shapes
+        self.frequent_chain_skeleton_lengths = frequent_chain_skeleton_lengths
 
     def insert_command(self, command, representation):
-        self.commands[representation] = command
+        self.insert_command_at_node(command, self.candidate_trie.compute_node(representation))
+    
+    def insert_command_at_node(self, command, node: CandidateTrieNode):
+        node.set_information(command)
+        command.move_statistics_to(self.candidate_statistics)
+        self.commands.append(command)
     
     def process_abstract_command_usage(self, command_chain, abstract_command_chain):
-        representation = CommandInformationSet.compute_representation(abstract_command_chain)
-        if representation not in self.commands:
-            self.insert_command(PotentialAbstractCommandInformation(abstract_command_chain.get_actions()), representation)
-        self.commands[representation].process_usage(abstract_command_chain, command_chain)
+        node = self.candidate_trie.compute_node(self.compute_representation(abstract_command_chain))
+        if node.get_information() is None:
+            self.insert_command_at_node(PotentialAbstractCommandInformation(abstract_command_chain.get_actions(), self.vocabulary), node)
+        node.get_information().process_usage(abstract_command_chain, command_chain)
 
     def create_abstract_commands(self, command_chain):
         commands = []
@@ -340,57 +1102,146 @@ class CommandInformationSet:
         commands.extend(abstract_prose_commands)
         return commands
     
-    def handle_needed_abstract_commands(self, command_chain):
-        abstract_commands = self.create_abstract_commands(command_chain)
-        for abstract_command in abstract_commands: self.process_abstract_command_usage(command_chain, abstract_command)
+    def handle_needed_abstract_commands(self, command_chain, node: CandidateTrieNode = None):
+        if node is None: node = self.candidate_trie.compute_node(self.compute_representation(command_chain))
+        key = (command_chain.get_name(), node)
+        abstraction = self.chain_pipeline_cache.find(key)
+        if abstraction is None:
+            with get_instrumentation().time_stage(ABSTRACTION_STAGE):
+                number_of_text_separation_analyzers_constructed = TextSeparationAnalyzer.number_of_constructions
+                abstraction = self.compute_chain_abstraction(command_chain)
+                self.mining_statistics.number_of_text_separation_analyzers_constructed += TextSeparationAnalyzer.number_of_constructions - number_of_text_separation_analyzers_constructed
+            self.chain_pipeline_cache.store(key, abstraction)
+        self.process_chain_abstraction_usage(command_chain, abstraction)
+    
+    def compute_chain_abstraction(self, command_chain):
+        instantiation_fingerprint, shapes = compute_abstraction_shape_fingerprints(self.compute_representation(command_chain), self.vocabulary)
+        if self.viable_abstraction_shapes is not None and not any(shape in self.viable_abstraction_shapes for shape in shapes): return ChainAbstraction([], None)
+        abstract_commands = [
+            AbstractCommandTemplate(self.candidate_trie.compute_node(self.compute_representation(abstract_command)), abstract_command.get_actions(), abstract_command.get_number_of_words())
+            for abstract_command in self.create_abstract_commands(command_chain)
+        ]
+        return ChainAbstraction(abstract_commands, instantiation_fingerprint)
+    
+    def process_chain_abstraction_usage(self, command_chain, abstraction: ChainAbstraction):
+        chain_number = command_chain.get_chain_number()
+        chain_ending_index = command_chain.get_chain_ending_index()
+        for abstract_command in abstraction.abstract_commands:
+            node = abstract_command.node
+            if node.get_information() is None:
+                self.insert_command_at_node(PotentialAbstractCommandInformation(abstract_command.actions, self.vocabulary), node)
+            node.get_information().process_usage_of_instantiation_fingerprint(chain_number, chain_ending_index, abstract_command.number_of_words, abstraction.instantiation_fingerprint)
 
     def process_command_usage(self, command_chain):
-        representation = CommandInformationSet.compute_representation(command_chain)
-        if representation not in self.commands:
-            self.insert_command(PotentialCommandInformation(command_chain.get_actions()), representation)
-        self.commands[representation].process_usage(command_chain)
-        self.handle_needed_abstract_commands(command_chain)
-    
-    def process_partial_chain_usage(self, record, command_chain):
-        command_chain.append_command(record[command_chain.get_next_chain_index()])
-        simplified_command_chain = compute_insert_simplified_command_chain(command_chain)
-        simplified_command_chain = compute_repeat_simplified_command_chain(simplified_command_chain)
-        self.process_command_usage(simplified_command_chain)
-
-    def process_chain_usage(self, record, chain, max_command_chain_considered, verbose = False):
-        command_chain: CommandChain = CommandChain(None, [], chain)
-        chain_target = min(len(record), chain + max_command_chain_considered)
-        for chain_ending_index in range(chain, chain_target): 
-            if should_command_chain_not_cross_entry_at_record_index(record, chain, chain_ending_index): break
-            self.process_partial_chain_usage(record, command_chain)
-        if verbose: print('chain', chain + 1, 'out of', len(record), 'target: ', chain_target)
-
-    @staticmethod
-    def compute_representation(command):
+        node = self.candidate_trie.compute_node(self.compute_representation(command_chain))
+        self.process_command_usage_at_node(command_chain, node)
+    
+    def process_command_usage_at_node(self, command_chain, node: CandidateTrieNode):
+        if node.get_information() is None:
+            self.insert_command_at_node(PotentialCommandInformation(command_chain.get_actions()), node)
+        node.get_information().process_usage(command_chain)
+        self.handle_needed_abstract_commands(command_chain, node)
+    
+    def process_partial_chain_usage(self, record, chain_builder: SimplifiedCommandChainBuilder, cursor: CandidateTrieCursor, maximum_skeleton_length: int = None) -> bool:
+        '''Extends the chain by a command and processes its usage unless its skeleton exceeds the maximum length, returning whether it was processed.
+        A rejected command stays appended to the chain builder, so the chain cannot be extended any further'''
+        chain_builder.append_command(record[chain_builder.chain_number + chain_builder.chain_size])
+        pending_actions = chain_builder.compute_pending_actions()
+        if maximum_skeleton_length is not None and len(chain_builder.get_simplified_actions()) + len(pending_actions) > maximum_skeleton_length: return False
+        cursor.follow_committed_actions(chain_builder.get_simplified_actions())
+        node = cursor.compute_node_with_pending_actions(pending_actions)
+        self.process_command_usage_at_node(chain_builder.compute_command_chain(pending_actions), node)
+        return True
+
+    def process_chain_usage(self, record, chain, max_command_chain_considered, segmentation = None):
+        '''The segmentation of the record finds where the chain has to stop without checking every entry it reaches'''
+        chain_builder = SimplifiedCommandChainBuilder(chain)
+        cursor = CandidateTrieCursor(self.candidate_trie, self.vocabulary)
+        maximum_skeleton_length = self.frequent_chain_skeleton_lengths[chain] if self.frequent_chain_skeleton_lengths is not None else None
+        chain_target = compute_chain_target(record, chain, max_command_chain_considered, segmentation)
+        number_of_partial_chains_processed: int = 0
+        for _ in range(chain, chain_target):
+            if not self.process_partial_chain_usage(record, chain_builder, cursor, maximum_skeleton_length): break
+            number_of_partial_chains_processed += 1
+        self.mining_statistics.number_of_chains_processed += 1
+        self.mining_statistics.number_of_partial_chains_processed += number_of_partial_chains_processed
+        if self.mining_statistics.number_of_chains_processed % MEMORY_SAMPLING_INTERVAL_IN_CHAINS == 0: self.sample_structure_sizes(record)
+
+    def sample_structure_sizes(self, record):
+        '''Samples the estimated deep sizes of the record and the candidates if memory is being profiled. The candidates include their instantiation sets'''
+        memory_profiler = get_memory_profiler()
+        if not memory_profiler.is_enabled(): return
+        abstract_instantiation_sets = [command.instantiation_set for command in self.commands if command.is_abstract()]
+        structures = {'record': record, 'commands': self.commands, 'abstract_instantiation_sets': abstract_instantiation_sets, 'candidate_statistics': self.candidate_statistics}
+        memory_profiler.sample_structure_sizes(self.mining_statistics.number_of_chains_processed, structures, excluded_values = (self.vocabulary, self.candidate_statistics))
+
+    def compute_representation(self, command):
         actions = command.get_actions()
-        representation = compute_string_representation_of_actions(actions)
+        representation = self.vocabulary.compute_identifiers(actions)
         return representation
     
+    def can_filter_over_statistics_columns(self, condition) -> bool:
+        return condition is basic_command_filter and is_vectorized_filtering_available()
+    
     def get_commands_meeting_condition(self, condition):
-        commands_to_output = [command for command in self.commands.values() if condition(command)]
+        if self.can_filter_over_statistics_columns(condition):
+            return self.get_commands_in_rows(compute_rows_meeting_basic_command_filter(self.candidate_statistics))
+        commands_to_output = [command for command in self.commands if condition(command)]
         return commands_to_output
     
-    def contains_command_with_representation(self, representation: str):
-        return representation in self.commands
+    def get_commands_in_rows(self, rows):
+        return [self.commands[row] for row in rows]
+    
+    def contains_command_with_representation(self, representation):
+        node = self.candidate_trie.find_node(representation)
+        return node is not None and node.get_information() is not None
     
     def contains_command(self, command):
-        representation = CommandInformationSet.compute_representation(command)
+        representation = self.compute_representation(command)
         return self.contains_command_with_representation(representation)
 
+    def create_empty_copy_of_information(self, command):
+        if command.is_abstract(): return PotentialAbstractCommandInformation(command.get_actions(), self.vocabulary)
+        return PotentialCommandInformation(command.get_actions())
+
+    def merge(self, other, chain_index_offset: int = 0):
+        '''Merges in the commands found in a later part of the record whose chain indices start at the offset'''
+        for command in other.commands:
+            node = self.candidate_trie.compute_node(self.compute_representation(command))
+            if node.get_information() is None:
+                self.insert_command_at_node(self.create_empty_copy_of_information(command), node)
+            node.get_information().merge(command, chain_index_offset)
+        self.chain_pipeline_cache.merge_statistics(other.chain_pipeline_cache)
+        self.mining_statistics.merge(other.mining_statistics)
+
     def get_size(self):
         return len(self.commands)
+    
+    def get_chain_pipeline_cache(self):
+        return self.chain_pipeline_cache
+    
+    def get_mining_statistics(self):
+        return self.mining_statistics
+    
+    def get_mining_coverage(self):
+        '''Returns how much of the record was mined within the time budget, or None if there was no time budget'''
+        return self.mining_coverage
+
+    def __getstate__(self):
+        return {'commands': self.commands, 'vocabulary': self.vocabulary, 'chain_pipeline_cache': self.chain_pipeline_cache, 'mining_statistics': self.mining_statistics}
+    
+    def __setstate__(self, state):
+        self.__init__(state['vocabulary'])
+        if 'chain_pipeline_cache' in state: self.chain_pipeline_cache = state['chain_pipeline_cache']
+        if 'mining_statistics' in state: self.mining_statistics = state['mining_statistics']
+        for command in state['commands']: self.insert_command(command, self.compute_representation(command))
 
     def __repr__(self):
         return self.__str__()
     
     def __str__(self):
         representation: str = ''
-        for command in self.commands.values():
+        for command in self.commands:
             representation += str(command) + '\n'
         return representation
 
@@ -417,10 +1268,18 @@ def create_file_at_directory_if_nonexistent(directory, file):
     path = os.path.join(directory, file)
     create_file_if_nonexistent(path)
 
-def read_commands_to_ignore(directory):
+def compute_commands_to_ignore_path(directory):
     create_file_at_directory_if_nonexistent(directory, COMMANDS_TO_IGNORE_FILENAME)
-    path = os.path.join(directory, COMMANDS_TO_IGNORE_FILENAME)
-    commands = ActionSequenceSet()
+    return os.path.join(directory, COMMANDS_TO_IGNORE_FILENAME)
+
+def compute_commands_to_ignore_path_or_default(directory, commands_to_ignore_path: str = None):
+    '''Uses the commands to ignore in the directory unless another file is given'''
+    if commands_to_ignore_path: return commands_to_ignore_path
+    return compute_commands_to_ignore_path(directory)
+
+def read_commands_to_ignore(directory, vocabulary: ActionVocabulary = None, commands_to_ignore_path: str = None):
+    path = compute_commands_to_ignore_path_or_default(directory, commands_to_ignore_path)
+    commands = ActionSequenceSet(vocabulary)
     current_command_actions = []
     with open(path, 'r') as file:
         line = file.readline()
@@ -436,64 +1295,875 @@ def read_commands_to_ignore(directory):
             commands.insert(current_command_actions)
     return commands
 
-def compute_record_without_stuff_to_ignore(directory, record):
-    commands_to_ignore = read_commands_to_ignore(directory)
-    filtered_record = [command for command in record if not command.is_command_record() or not commands_to_ignore.contains_command_actions(command)]
+def generate_record_without_commands_to_ignore(record, commands_to_ignore: ActionSequenceSet):
+    for command in record:
+        if not command.is_command_record() or not commands_to_ignore.contains_command_actions(command): yield command
+
+def generate_timed_record_without_commands_to_ignore(record, commands_to_ignore: ActionSequenceSet):
+    '''Filters a streamed record while charging the time spent reading it to parsing and the time spent filtering it to ignore filtering'''
+    instrumentation = get_instrumentation()
+    record = instrumentation.generate_timed_entries(record, PARSING_STAGE)
+    return instrumentation.generate_timed_entries(generate_record_without_commands_to_ignore(record, commands_to_ignore), IGNORE_FILTERING_STAGE)
+
+def compute_record_without_stuff_to_ignore(directory, record, vocabulary: ActionVocabulary = None, commands_to_ignore_path: str = None):
+    commands_to_ignore = read_commands_to_ignore(directory, vocabulary, commands_to_ignore_path)
+    filtered_record = list(generate_record_without_commands_to_ignore(record, commands_to_ignore))
+    return filtered_record
+
+def read_record_in_detected_format(input_path, vocabulary: ActionVocabulary = None):
+    if is_binary_record_file(input_path): return read_binary_record(input_path, vocabulary)
+    return read_file_record(input_path, vocabulary)
+
+def stream_record_in_detected_format(input_path, vocabulary: ActionVocabulary = None):
+    if is_binary_record_file(input_path): return stream_binary_record(input_path, vocabulary)
+    return stream_file_record(input_path, vocabulary)
+
+def find_cached_record(data_directory, input_path, refresh_cache: bool, commands_to_ignore_path: str = None):
+    '''Obtains the record cache with the key for the filtered record and the path to the cached record if one can be used'''
+    cache = RecordCache(data_directory)
+    key = compute_record_cache_key(input_path, compute_commands_to_ignore_path_or_default(data_directory, commands_to_ignore_path))
+    if refresh_cache: cache.remove_entry(key)
+    cached_record_path = cache.find_entry(key)
+    get_instrumentation().add_to_counter('record_cache_hits' if cached_record_path else 'record_cache_misses')
+    return cache, key, cached_record_path
+
+def obtain_file_record(data_directory, input_path, vocabulary: ActionVocabulary = None, *, use_cache: bool = True, refresh_cache: bool = False, commands_to_ignore_path: str = None):
+    instrumentation = get_instrumentation()
+    if use_cache:
+        cache, key, cached_record_path = find_cached_record(data_directory, input_path, refresh_cache, commands_to_ignore_path)
+        if cached_record_path:
+            try:
+                with instrumentation.time_stage(PARSING_STAGE): return read_binary_record(cached_record_path, vocabulary)
+            except FileNotFoundError:
+                #another analysis evicted the cached record after it was found
+                pass
+    with instrumentation.time_stage(PARSING_STAGE): record = read_record_in_detected_format(input_path, vocabulary)
+    with instrumentation.time_stage(IGNORE_FILTERING_STAGE): filtered_record = compute_record_without_stuff_to_ignore(data_directory, record, vocabulary, commands_to_ignore_path)
+    if use_cache: cache.store(key, filtered_record)
     return filtered_record
 
-def obtain_file_record(data_directory, input_path):
-    record = read_file_record(input_path)
-    filtered_record = compute_record_without_stuff_to_ignore(data_directory, record)
+def stream_file_record_without_stuff_to_ignore(data_directory, input_path, vocabulary: ActionVocabulary = None, *, use_cache: bool = True, refresh_cache: bool = False,
+                                               commands_to_ignore_path: str = None):
+    instrumentation = get_instrumentation()
+    if use_cache:
+        cache, key, cached_record_path = find_cached_record(data_directory, input_path, refresh_cache, commands_to_ignore_path)
+        if cached_record_path: return instrumentation.generate_timed_entries(stream_binary_record(cached_record_path, vocabulary), PARSING_STAGE)
+    commands_to_ignore = read_commands_to_ignore(data_directory, vocabulary, commands_to_ignore_path)
+    filtered_record = generate_timed_record_without_commands_to_ignore(stream_record_in_detected_format(input_path, vocabulary), commands_to_ignore)
+    if use_cache: return generate_entries_while_caching(filtered_record, cache, key)
     return filtered_record
 
+def compute_number_of_instantiations_description(command) -> str:
+    if command.is_number_of_instantiations_capped(): return f'at least {command.get_number_of_instantiations()}'
+    return str(command.get_number_of_instantiations())
+
 def write_command_to_file(file, command):
     file.write(f'#Number of times used: {command.get_number_of_times_used()}\n')
-    if command.is_abstract(): file.write(f'#Number of instantiations of abstract command: {command.get_number_of_instantiations()}\n')
+    if command.is_abstract(): file.write(f'#Number of instantiations of abstract command: {compute_number_of_instantiations_description(command)}\n')
     for action in command.get_actions(): file.write('\t' + action.compute_talon_script() + '\n')
     file.write('\n\n')
 
-def generate_output_filename(output_directory):
-    timestamp = datetime.datetime.now()
-    formatted_timestamp = str(timestamp).replace('.', ',').replace(':', '-')
-    output_path = os.path.join(output_directory, OUTPUT_FILENAME_PREFIX + formatted_timestamp + OUTPUT_FILE_EXTENSION)
+def compute_command_description(command):
+    description = {'number_of_times_used': command.get_number_of_times_used(), 'average_words_dictated': command.get_average_words_dictated()}
+    if command.is_abstract(): description['number_of_instantiations'] = compute_number_of_instantiations_description(command)
+    description['actions'] = [action.compute_talon_script() for action in command.get_actions()]
+    return description
+
+def write_commands_to_json_file(file, commands):
+    json.dump([compute_command_description(command) for command in commands], file, indent = 4)
+
+def compute_formatted_timestamp() -> str:
+    return str(datetime.datetime.now()).replace('.', ',').replace(':', '-')
+
+def generate_output_filename(output_directory, record_name: str = None, file_extension: str = OUTPUT_FILE_EXTENSION):
+    '''Names the recommendations after the time and, if given, the name of the analyzed record so that concurrent analyses do not collide'''
+    name = OUTPUT_FILENAME_PREFIX
+    if record_name: name += record_name + ' '
+    output_path = os.path.join(output_directory, name + compute_formatted_timestamp() + file_extension)
     return output_path
 
-def output_recommendations(recommended_commands, output_directory):
-    output_path = generate_output_filename(output_directory)
-    with open(output_path, 'w') as file:
-        for command in recommended_commands: write_command_to_file(file, command)
+def compute_mining_engine_caveat(mining_engine: str):
+    '''Describes how the recommendations of the mining engine fall short of those of the trie engine, or returns None for the trie engine'''
+    if mining_engine == TRIE_MINING_ENGINE: return None
+    return f'the {mining_engine} mining engine only recommends concrete commands, so the abstract commands the trie engine would recommend are missing ' + \
+        'and these recommendations only approximate those of the trie engine'
+
+def output_recommendations(recommended_commands, output_directory, output_format: str = TEXT_OUTPUT_FORMAT, record_name: str = None, mining_coverage: MiningCoverage = None,
+                           mining_engine: str = TRIE_MINING_ENGINE) -> str:
+    '''Writes the recommendations to a new file in the directory and returns its path.
+    Text files start with the mining coverage if there is one and with what the recommendations leave out if another engine than the trie engine mined them'''
+    with get_instrumentation().time_stage(OUTPUT_STAGE):
+        if output_format == JSON_OUTPUT_FORMAT:
+            output_path = generate_output_filename(output_directory, record_name, JSON_FILE_EXTENSION)
+            with open(output_path, 'w') as file: write_commands_to_json_file(file, recommended_commands)
+            return output_path
+        output_path = generate_output_filename(output_directory, record_name)
+        with open(output_path, 'w') as file:
+            if mining_coverage is not None: file.write(f'#Coverage: {mining_coverage.compute_description()}\n\n\n')
+            mining_engine_caveat = compute_mining_engine_caveat(mining_engine)
+            if mining_engine_caveat is not None: file.write(f'#Approximate: {mining_engine_caveat}\n\n\n')
+            for command in recommended_commands: write_command_to_file(file, command)
+        return output_path
+
+def compute_record_shard_boundaries(record, number_of_shards: int, segmentation: RecordSegmentation = None):
+    '''Splits the record at chain barriers into at most the specified number of shards of roughly equal size.
+    Returns the starting index of every shard followed by the length of the record'''
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    target_shard_size = len(record)/number_of_shards
+    boundaries = [0]
+    for index in segmentation.get_barrier_indices():
+        if index - boundaries[-1] >= target_shard_size: boundaries.append(index)
+    boundaries.append(len(record))
+    return boundaries
+
+def mine_record_shard(record_shard, max_command_chain_considered, viable_abstraction_shapes = None, frequent_chain_skeleton_lengths = None, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS,
+                      chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    return create_serial_command_information_set_from_record(record_shard, max_command_chain_considered, viable_abstraction_shapes = viable_abstraction_shapes,
+                                                             frequent_chain_skeleton_lengths = frequent_chain_skeleton_lengths, segmentation = RecordSegmentation(record_shard, gap_threshold_in_seconds),
+                                                             chain_pipeline_cache_size = chain_pipeline_cache_size)
+
+class RecordWindow:
+    '''Holds the latest entries of a streamed record while exposing them by their index into the whole record'''
+    def __init__(self, size: int):
+        self.entries = deque(maxlen = size)
+        self.starting_index: int = 0
+    
+    def append(self, entry):
+        if self.is_full(): self.starting_index += 1
+        self.entries.append(entry)
+    
+    def is_full(self) -> bool:
+        return len(self.entries) == self.entries.maxlen
+    
+    def get_starting_index(self) -> int:
+        return self.starting_index
+    
+    def __getitem__(self, index: int):
+        return self.entries[index - self.starting_index]
+    
+    def __len__(self):
+        return self.starting_index + len(self.entries)
+
+class StreamingRecordMiner:
+    '''Mines record entries as they arrive. A chain is processed once every entry it can reach has arrived,
+    so the miner can be saved between entries and continued later with identical results'''
+    def __init__(self, max_command_chain_considered, vocabulary: ActionVocabulary = None, gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS,
+                 chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+        self.command_set: CommandInformationSet = CommandInformationSet(vocabulary, chain_pipeline_cache_size)
+        self.max_command_chain_considered = max_command_chain_considered
+        self.window = RecordWindow(max(max_command_chain_considered, 1))
+        self.segmentation = StreamingRecordSegmentation(gap_threshold_in_seconds)
+    
+    def add_entry(self, entry):
+        if self.window.is_full(): self.process_chain_usage(self.window.get_starting_index())
+        self.window.append(entry)
+        self.segmentation.add_entry(entry)
+    
+    def process_chain_usage(self, chain: int):
+        self.command_set.process_chain_usage(self.window, chain, self.max_command_chain_considered, segmentation = self.segmentation)
+    
+    def add_entries(self, entries, *, verbose = False):
+        '''The progress cannot include a total since the number of entries to come is unknown'''
+        statistics = self.command_set.get_mining_statistics()
+        progress_reporter = create_progress_reporter(verbose, number_of_chains_processed_before = statistics.number_of_chains_processed)
+        for entry in entries:
+            self.add_entry(entry)
+            progress_reporter.update(statistics.number_of_chains_processed, self.command_set.get_size())
+        progress_reporter.finish(statistics.number_of_chains_processed, self.command_set.get_size())
+    
+    def finish(self):
+        '''Processes the chains that have not been processed yet and returns the command set. Entries cannot be added afterwards'''
+        for chain in range(self.window.get_starting_index(), len(self.window)): self.process_chain_usage(chain)
+        self.command_set.sample_structure_sizes(self.window)
+        return self.command_set
+    
+    def get_command_set(self):
+        return self.command_set
+    
+    def get_gap_threshold_in_seconds(self) -> int:
+        return self.segmentation.get_gap_threshold_in_seconds()
+
+def create_command_information_set_from_record_stream(record, max_command_chain_considered, *, verbose = False, vocabulary: ActionVocabulary = None,
+                                                      gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS, chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Mines a record given as an iterable of entries holding only the entries the longest chain can reach in memory'''
+    miner = StreamingRecordMiner(max_command_chain_considered, vocabulary, gap_threshold_in_seconds, chain_pipeline_cache_size)
+    miner.add_entries(record, verbose = verbose)
+    return miner.finish()
+
+def create_command_information_set_from_record_file_with_checkpoint(data_directory, input_path, max_command_chain_considered, *, verbose = False,
+                                                                    gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS, commands_to_ignore_path: str = None,
+                                                                    chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Mines a text record file continuing from the checkpoint of a previous analysis if the file was only appended to since then.
+    Afterwards, saves a checkpoint covering everything except the final command, which lines appended later could still change.
+    The chain pipeline cache only affects speed, so a checkpoint saved with another cache size resumes with the requested one'''
+    checkpoint_path = compute_checkpoint_path(data_directory, input_path)
+    commands_to_ignore_path = compute_commands_to_ignore_path_or_default(data_directory, commands_to_ignore_path)
+    commands_to_ignore_digest = compute_file_digest(commands_to_ignore_path)
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint is not None and checkpoint.can_resume(input_path, max_command_chain_considered, commands_to_ignore_digest) and \
+        checkpoint.get_miner().get_gap_threshold_in_seconds() == gap_threshold_in_seconds:
+        if verbose: print('resuming analysis from checkpoint')
+        miner = checkpoint.get_miner()
+        miner.get_command_set().get_chain_pipeline_cache().set_maximum_size(chain_pipeline_cache_size)
+        parser = RecordParser(input_path, miner.get_command_set().vocabulary, checkpoint.get_parser_resume_point())
+    else:
+        miner = StreamingRecordMiner(max_command_chain_considered, gap_threshold_in_seconds = gap_threshold_in_seconds, chain_pipeline_cache_size = chain_pipeline_cache_size)
+        parser = RecordParser(input_path, miner.get_command_set().vocabulary)
+    commands_to_ignore = read_commands_to_ignore(data_directory, miner.get_command_set().vocabulary, commands_to_ignore_path)
+    miner.add_entries(generate_timed_record_without_commands_to_ignore(parser.generate_entries(include_unfinished_command = False), commands_to_ignore), verbose = verbose)
+    save_checkpoint(checkpoint_path, AnalysisCheckpoint(input_path, max_command_chain_considered, commands_to_ignore_digest, parser.get_resume_point(), miner))
+    miner.add_entries(generate_timed_record_without_commands_to_ignore(parser.take_unfinished_command(), commands_to_ignore), verbose = verbose)
+    return miner.finish()
+
+def create_serial_command_information_set_from_record(record, max_command_chain_considered, *, verbose = False, vocabulary: ActionVocabulary = None, viable_abstraction_shapes = None,
+                                                     frequent_chain_skeleton_lengths = None, segmentation: RecordSegmentation = None, chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    command_set: CommandInformationSet = CommandInformationSet(vocabulary, chain_pipeline_cache_size, viable_abstraction_shapes = viable_abstraction_shapes,
+                                                               frequent_chain_skeleton_lengths = frequent_chain_skeleton_lengths)
+    progress_reporter = create_progress_reporter(verbose, len(record))
+    for chain in range(len(record)):
+        command_set.process_chain_usage(record, chain, max_command_chain_considered, segmentation = segmentation)
+        progress_reporter.update(chain + 1, command_set.get_size())
+    progress_reporter.finish(len(record), command_set.get_size())
+    command_set.sample_structure_sizes(record)
+    return command_set
+
+def create_parallel_command_information_set_from_record(record, max_command_chain_considered, number_of_workers: int, *, verbose = False, vocabulary: ActionVocabulary = None, viable_abstraction_shapes = None,
+                                                       frequent_chain_skeleton_lengths = None, segmentation: RecordSegmentation = None, chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Every shard is segmented again in its worker with the gap threshold of the segmentation of the whole record, and every worker has a chain pipeline cache of the given size'''
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    boundaries = compute_record_shard_boundaries(record, number_of_workers*SHARDS_PER_WORKER, segmentation)
+    shard_starts = boundaries[:-1]
+    shards = [record[start:ending] for start, ending in zip(shard_starts, boundaries[1:])]
+    if frequent_chain_skeleton_lengths is None: shard_skeleton_lengths = itertools.repeat(None)
+    else: shard_skeleton_lengths = [frequent_chain_skeleton_lengths[start:ending] for start, ending in zip(shard_starts, boundaries[1:])]
+    command_set: CommandInformationSet = CommandInformationSet(vocabulary)
+    progress_reporter = create_progress_reporter(verbose, len(record))
+    with ProcessPoolExecutor(max_workers = number_of_workers) as executor:
+        shard_command_sets = executor.map(mine_record_shard, shards, itertools.repeat(max_command_chain_considered), itertools.repeat(viable_abstraction_shapes), shard_skeleton_lengths,
+                                          itertools.repeat(segmentation.get_gap_threshold_in_seconds()), itertools.repeat(chain_pipeline_cache_size))
+        for shard_start, shard_ending, shard_command_set in zip(shard_starts, boundaries[1:], shard_command_sets):
+            command_set.merge(shard_command_set, shard_start)
+            command_set.sample_structure_sizes(record)
+            progress_reporter.update(shard_ending, command_set.get_size())
+    progress_reporter.finish(len(record), command_set.get_size())
+    return command_set
 
-def create_command_information_set_from_record(record, max_command_chain_considered, *, verbose = False):
-    command_set: CommandInformationSet = CommandInformationSet()    
-    for chain in range(len(record)): command_set.process_chain_usage(record, chain, max_command_chain_considered, verbose = verbose)
+def compute_bit_reversal(value: int, number_of_bits: int) -> int:
+    reversal = 0
+    for _ in range(number_of_bits):
+        reversal = (reversal << 1) | (value & 1)
+        value >>= 1
+    return reversal
+
+def compute_spread_out_order(size: int):
+    '''Orders the indices below the size so that every start of the order spreads out evenly over them'''
+    number_of_bits = max(size - 1, 0).bit_length()
+    return sorted(range(size), key = lambda index: compute_bit_reversal(index, number_of_bits))
+
+def compute_record_with_spread_out_sessions(record, segmentation: RecordSegmentation):
+    '''Reorders the sessions of the record so that mining the start of the result samples sessions from the whole record.
+    Chains never cross sessions and every session starts with a recording start, so mining the result counts usage like mining the record'''
+    sessions = segmentation.compute_sessions()
+    reordered_record = []
+    for session_number in compute_spread_out_order(len(sessions)):
+        start, ending = sessions[session_number]
+        reordered_record.append(RecordingStart())
+        reordered_record.extend(record[start:ending])
+    return reordered_record
+
+def mine_chains_before_deadline(command_set: CommandInformationSet, record, starting_chain: int, ending_chain: int, max_command_chain_considered, segmentation: RecordSegmentation,
+                                deadline: float, progress_reporter = DISABLED_PROGRESS_REPORTER, time_to_reserve_per_chain_left: float = 0.0) -> int:
+    '''Mines the chains from the starting chain up to the ending chain in order until the deadline would pass before the time reserved for the chains left.
+    Returns the first chain not mined'''
+    for chain in range(starting_chain, ending_chain):
+        if time.monotonic() + time_to_reserve_per_chain_left*(ending_chain - chain) > deadline: return chain
+        command_set.process_chain_usage(record, chain, max_command_chain_considered, segmentation)
+        progress_reporter.update(chain + 1, command_set.get_size())
+    return ending_chain
+
+def compute_budgeted_mining_coverage(chain_lengths, mined_chain_lengths, short_chain_length: int, max_command_chain_considered) -> MiningCoverage:
+    '''Computes the coverage of mining every chain start with the longest chain length it was mined with, which is 0 for the chain starts that were not mined'''
+    short_chain_lengths = [min(chain_length, short_chain_length) for chain_length in chain_lengths]
+    total_number_of_short_partial_chains = sum(short_chain_lengths)
+    coverage = MiningCoverage(short_chain_length, max_command_chain_considered, total_number_of_short_partial_chains, sum(chain_lengths) - total_number_of_short_partial_chains)
+    for chain_length, short_length, mined_length in zip(chain_lengths, short_chain_lengths, mined_chain_lengths):
+        coverage.number_of_short_partial_chains_mined += min(short_length, mined_length)
+        coverage.number_of_long_partial_chains_mined += max(min(chain_length, mined_length) - short_length, 0)
+    return coverage
+
+def merge_command_sets(command_sets) -> CommandInformationSet:
+    '''Merges command sets mined from parts of the same record that follow each other in the order of the sets'''
+    command_set = command_sets[0]
+    for other in command_sets[1:]: command_set.merge(other)
     return command_set
 
-def compute_recommendations_from_record(record, max_command_chain_considered = 100, *, verbose = False, filter = basic_command_filter):
-    command_set = create_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose)
-    recommended_commands = command_set.get_commands_meeting_condition(filter)
-    sorted_recommended_commands = sorted(recommended_commands, key = lambda command: command.get_number_of_times_used(), reverse = True)
+def create_budgeted_command_information_set_from_record(record, max_command_chain_considered, deadline: float, *, verbose = False, vocabulary: ActionVocabulary = None,
+                                                        segmentation: RecordSegmentation = None, chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Mines the record until time.monotonic passes the deadline, returning a command set with the mining coverage.
+    The sessions of the record are reordered to spread out over it, and the short chains, which are the most likely to be recommended, are mined first
+    into a command set for every chunk of sessions. If that finishes in time, the record is mined again with chains up to the maximum length
+    while there is time left to mine the short chains of the rest of the current chunk again, which the time the short chains took predicts.
+    The result combines the chunks mined with long chains, the short chains of the rest of the chunk where that stopped, and the short chain sets of the chunks after it.
+    Chains never cross chunks and every chain start is mined once in order, so usage gets counted like when mining the record with the lengths every chain start got'''
+    if vocabulary is None: vocabulary = ActionVocabulary()
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    record = compute_record_with_spread_out_sessions(record, segmentation)
+    segmentation = RecordSegmentation(record, segmentation.get_gap_threshold_in_seconds())
+    chain_lengths = [compute_chain_target(record, chain, max_command_chain_considered, segmentation) - chain for chain in range(len(record))]
+    mined_chain_lengths = [0]*len(record)
+    short_chain_length = min(LONGEST_CHAIN_OF_SHORT_MINING_PASS, max_command_chain_considered)
+    chunk_boundaries = compute_record_shard_boundaries(record, NUMBER_OF_SHORT_MINING_CHUNKS, segmentation)
+    short_command_sets = []
+    ending_of_short_chains = 0
+    if verbose: print('mining the chains of up to', short_chain_length, 'commands')
+    progress_reporter = create_progress_reporter(verbose, len(record))
+    starting_time = time.monotonic()
+    for chunk_ending in chunk_boundaries[1:]:
+        short_command_sets.append(CommandInformationSet(vocabulary, chain_pipeline_cache_size))
+        ending_of_short_chains = mine_chains_before_deadline(short_command_sets[-1], record, ending_of_short_chains, chunk_ending, short_chain_length, segmentation, deadline, progress_reporter)
+        if ending_of_short_chains < chunk_ending: break
+    progress_reporter.finish(ending_of_short_chains, short_command_sets[-1].get_size())
+    short_mining_time_per_chain = (time.monotonic() - starting_time)/max(len(record), 1)
+    mined_chain_lengths[:ending_of_short_chains] = [short_chain_length]*ending_of_short_chains
+    if ending_of_short_chains < len(record) or short_chain_length == max_command_chain_considered:
+        command_set = merge_command_sets(short_command_sets)
+    else:
+        if verbose: print('mining the chains of up to', max_command_chain_considered, 'commands')
+        progress_reporter = create_progress_reporter(verbose, len(record))
+        command_set: CommandInformationSet = CommandInformationSet(vocabulary, chain_pipeline_cache_size)
+        ending_of_long_chains = 0
+        number_of_chunks_mined_with_long_chains = 0
+        for chunk_ending in chunk_boundaries[1:]:
+            ending_of_long_chains = mine_chains_before_deadline(command_set, record, ending_of_long_chains, chunk_ending, max_command_chain_considered, segmentation, deadline,
+                                                                progress_reporter, short_mining_time_per_chain*TIME_BUDGET_SAFETY_FACTOR)
+            if ending_of_long_chains < chunk_ending: break
+            short_command_sets[number_of_chunks_mined_with_long_chains] = None
+            number_of_chunks_mined_with_long_chains += 1
+        progress_reporter.finish(ending_of_long_chains, command_set.get_size())
+        mined_chain_lengths[:ending_of_long_chains] = [max_command_chain_considered]*ending_of_long_chains
+        remaining_short_command_sets = short_command_sets[number_of_chunks_mined_with_long_chains:]
+        if ending_of_long_chains == chunk_boundaries[number_of_chunks_mined_with_long_chains]:
+            command_set = merge_command_sets([command_set] + remaining_short_command_sets)
+        else:
+            #the time reserved for this should suffice, and finishing it even after the deadline keeps every short chain, which the chunk set of short chains cannot give once long chains were mined in the chunk
+            chunk_ending = chunk_boundaries[number_of_chunks_mined_with_long_chains + 1]
+            mine_chains_before_deadline(command_set, record, ending_of_long_chains, chunk_ending, short_chain_length, segmentation, math.inf)
+            command_set = merge_command_sets([command_set] + remaining_short_command_sets[1:])
+    command_set.mining_coverage = compute_budgeted_mining_coverage(chain_lengths, mined_chain_lengths, short_chain_length, max_command_chain_considered)
+    command_set.sample_structure_sizes(record)
+    return command_set
+
+def compute_action_run_token(action, vocabulary: ActionVocabulary):
+    '''Computes the token of the action in an action run stream, which is None for repeat actions and inserts without text since they are left out'''
+    name = action.get_name()
+    if name == 'insert': return INSERT_RUN_TOKEN if action.get_arguments()[0] else None
+    if name == 'repeat': return None
+    return vocabulary.compute_identifier(action) + 1
+
+class ActionRunStream:
+    '''The interned actions of a record as tokens, leaving out repeat actions and inserts without text and merging every run of inserts or of equal actions into one token.
+    Every chain barrier gets its own negative separator token so that no run of tokens crosses a barrier.
+    Simplifying a chain only merges inserts, drops inserts without text, merges equal actions into repeats, and keeps repeat actions, none of which changes the tokens the chain covers,
+    so chains simplifying to the same actions cover equal runs of tokens'''
+    def __init__(self, record, vocabulary: ActionVocabulary, segmentation: RecordSegmentation = None):
+        if segmentation is None: segmentation = RecordSegmentation(record)
+        self.tokens = []
+        #the index of the token holding the first action of every entry that has one and of the last token up to every entry
+        self.first_token_indices = [None]*len(record)
+        self.last_token_indices = [0]*len(record)
+        self.words_before_entries = [0]
+        previous_token = None
+        for index, entry in enumerate(record):
+            if segmentation.is_chain_barrier(index):
+                self.tokens.append(-len(self.tokens) - 1)
+                previous_token = None
+            number_of_words = 0
+            if not is_record_entry_recording_start(entry):
+                for action in entry.get_actions():
+                    token = compute_action_run_token(action, vocabulary)
+                    if token is None: continue
+                    if token != previous_token:
+                        self.tokens.append(token)
+                        previous_token = token
+                    if self.first_token_indices[index] is None: self.first_token_indices[index] = len(self.tokens) - 1
+                number_of_words = compute_number_of_words(entry.get_name())
+            self.last_token_indices[index] = len(self.tokens) - 1
+            self.words_before_entries.append(self.words_before_entries[-1] + number_of_words)
+        self.chain_first_token_indices = self._compute_chain_first_token_indices(record, segmentation)
+        self.shared_chain_first_token_indices = self._compute_shared_chain_first_token_indices(record)
+
+    def _compute_chain_first_token_indices(self, record, segmentation: RecordSegmentation):
+        chain_first_token_indices = [None]*len(record)
+        following_first_token_index = None
+        for index in range(len(record) - 1, -1, -1):
+            if segmentation.is_chain_barrier(index + 1): following_first_token_index = None
+            if self.first_token_indices[index] is not None: following_first_token_index = self.first_token_indices[index]
+            chain_first_token_indices[index] = following_first_token_index
+        return chain_first_token_indices
+
+    def _compute_shared_chain_first_token_indices(self, record):
+        seen = set()
+        shared = set()
+        for index, first_token_index in enumerate(self.chain_first_token_indices):
+            if first_token_index is None or is_record_entry_recording_start(record[index]): continue
+            if first_token_index in seen: shared.add(first_token_index)
+            seen.add(first_token_index)
+        return shared
+
+    def get_tokens(self):
+        return self.tokens
+
+    def get_chain_first_token_index(self, chain: int):
+        '''Obtains the index of the first token the chains starting at the index cover once they reach an action, which is None if no entry before the next barrier has one'''
+        return self.chain_first_token_indices[chain]
+
+    def is_chain_first_token_index_shared(self, token_index: int) -> bool:
+        '''Determines if chains from more than one start begin at the token index'''
+        return token_index in self.shared_chain_first_token_indices
+
+    def get_last_token_index(self, index: int) -> int:
+        return self.last_token_indices[index]
+
+    def compute_number_of_words(self, chain: int, chain_target: int) -> int:
+        return self.words_before_entries[chain_target] - self.words_before_entries[chain]
+
+    def compute_longest_chain_length(self, record, max_command_chain_considered, segmentation: RecordSegmentation) -> int:
+        '''Computes the most tokens a chain covers, which is at least 1'''
+        longest_chain_length = 1
+        for chain in range(len(record)):
+            first_token_index = self.chain_first_token_indices[chain]
+            chain_target = compute_chain_target(record, chain, max_command_chain_considered, segmentation)
+            if first_token_index is None or chain_target == chain: continue
+            longest_chain_length = max(longest_chain_length, self.last_token_indices[chain_target - 1] - first_token_index + 1)
+        return longest_chain_length
+
+def generate_chains_that_may_repeat(record, stream: ActionRunStream, longest_repeated_lengths, vocabulary: ActionVocabulary, max_command_chain_considered, segmentation: RecordSegmentation,
+                                    counted_chain_sizes = None):
+    '''Yields the representation and chain builder of every chain that could simplify to the same actions as another chain in the order the trie engine processes chains.
+    That needs another chain starting at the same token or the tokens the chain covers to occur again, which the longest repeated length at its first token tells.
+    Appending commands never covers fewer tokens, so a chain stops being extended once neither holds.
+    The counted chain sizes give for every start how many of the smallest sizes of its chain were counted elsewhere and are left out'''
+    for chain in range(len(record)):
+        first_token_index = stream.get_chain_first_token_index(chain)
+        is_first_token_shared = first_token_index is None or stream.is_chain_first_token_index_shared(first_token_index)
+        chain_target = compute_chain_target(record, chain, max_command_chain_considered, segmentation)
+        counted_chain_size = counted_chain_sizes[chain] if counted_chain_sizes is not None else 0
+        if chain_target - chain <= counted_chain_size: continue
+        chain_builder = SimplifiedCommandChainBuilder(chain)
+        committed_identifiers = []
+        for chain_ending_index in range(chain, chain_target):
+            if not is_first_token_shared and stream.get_last_token_index(chain_ending_index) - first_token_index >= longest_repeated_lengths[first_token_index]: break
+            chain_builder.append_actions_of_command(record[chain_ending_index])
+            if chain_builder.chain_size <= counted_chain_size: continue
+            simplified_actions = chain_builder.get_simplified_actions()
+            committed_identifiers.extend(vocabulary.compute_identifiers(simplified_actions[len(committed_identifiers):]))
+            yield tuple(committed_identifiers) + vocabulary.compute_identifiers(chain_builder.compute_pending_actions()), chain_builder
+
+def insert_commands_of_repeated_actions(command_set: CommandInformationSet, record, stream: ActionRunStream, runs, max_command_chain_considered, segmentation: RecordSegmentation, *, verbose = False):
+    '''Inserts the concrete commands that more than one chain simplifies to given the runs of tokens of the stream that repeat.
+    Usage is counted over every chain simplifying to the actions of a command, so it matches the usage the trie engine counts'''
+    longest_repeated_lengths = compute_longest_repeated_lengths(runs, len(stream.get_tokens()))
+    commands_by_representation = {}
+    numbers_of_chains = {}
+    for representation, chain_builder in generate_chains_that_may_repeat(record, stream, longest_repeated_lengths, command_set.vocabulary, max_command_chain_considered, segmentation):
+        command = commands_by_representation.get(representation)
+        if command is None:
+            command = PotentialCommandInformation(chain_builder.get_simplified_actions() + chain_builder.compute_pending_actions())
+            commands_by_representation[representation] = command
+        numbers_of_chains[representation] = numbers_of_chains.get(representation, 0) + 1
+        chain_number = chain_builder.chain_number
+        if command.should_process_usage(chain_number):
+            command.record_usage(chain_number + chain_builder.chain_size - 1, stream.compute_number_of_words(chain_number, chain_number + chain_builder.chain_size))
+    repeated_representations = [representation for representation in commands_by_representation if numbers_of_chains[representation] > 1]
+    if verbose: print('found', len(repeated_representations), 'commands more than one chain simplifies to')
+    for representation in repeated_representations: command_set.insert_command(commands_by_representation[representation], representation)
+    command_set.sample_structure_sizes(record)
+
+class RecordActionSequence:
+    '''The interned actions of every entry of a record in one sequence, where the actions of every entry are a span,
+    with which actions are inserts and which are inserts without text that simplification drops'''
+    def __init__(self, record, vocabulary: ActionVocabulary):
+        self.identifiers = array('q')
+        self.insert_flags = array('b')
+        self.vanishing_flags = array('b')
+        self.entry_action_starts = array('q')
+        self.entry_action_endings = array('q')
+        for entry in record:
+            self.entry_action_starts.append(len(self.identifiers))
+            if not is_record_entry_recording_start(entry):
+                for action in entry.get_actions():
+                    is_insert = action.get_name() == 'insert'
+                    self.identifiers.append(vocabulary.compute_identifier(action))
+                    self.insert_flags.append(is_insert)
+                    self.vanishing_flags.append(is_insert and not action.get_arguments()[0])
+            self.entry_action_endings.append(len(self.identifiers))
+
+    def compute_chain_representation(self, chain: int, chain_ending_index: int):
+        '''Computes the representation of the actions the chain covers'''
+        return tuple(self.identifiers[self.entry_action_starts[chain]:self.entry_action_endings[chain_ending_index]])
+
+def count_usage_of_chains(chains):
+    '''Counts the usage of a command over the chains simplifying to its actions, given as their chain, chain ending index, and number of words
+    in the order the trie engine processes them. Returns the number of times used, the total number of words dictated, and the last chain ending index'''
+    number_of_times_used = 0
+    total_number_of_words_dictated = 0
+    last_chain_ending_index = NO_CHAIN
+    for chain, chain_ending_index, number_of_words in chains:
+        if chain > last_chain_ending_index:
+            number_of_times_used += 1
+            total_number_of_words_dictated += number_of_words
+            last_chain_ending_index = chain_ending_index
+    return number_of_times_used, total_number_of_words_dictated, last_chain_ending_index
+
+def insert_commands_of_repeated_actions_with_unchanged_chain_groups(command_set: CommandInformationSet, record, stream: ActionRunStream, sequence: RecordActionSequence, runs,
+                                                                    groups: UnchangedChainGroups, max_command_chain_considered, segmentation: RecordSegmentation, *, verbose = False):
+    '''Inserts the same commands as insert_commands_of_repeated_actions, taking the usage of the chains that simplify to the actions they cover from their groups.
+    Only the other chains that could repeat and the members of the groups that collided or overlap are gone through one by one,
+    and the chains of a command are put together from both before counting its usage'''
+    vocabulary = command_set.vocabulary
+    longest_repeated_lengths = compute_longest_repeated_lengths(runs, len(stream.get_tokens()))
+    chains_by_representation = {}
+    for representation, chain_builder in generate_chains_that_may_repeat(record, stream, longest_repeated_lengths, vocabulary, max_command_chain_considered, segmentation,
+                                                                         groups.get_unchanged_chain_sizes()):
+        chain = chain_builder.chain_number
+        chain_ending_index = chain + chain_builder.chain_size - 1
+        chains_by_representation.setdefault(representation, []).append((chain, chain_ending_index, stream.compute_number_of_words(chain, chain_ending_index + 1)))
+    collided_groups, overlapped_groups, counted_groups = groups.find_groups_by_status()
+    for group in collided_groups:
+        for member in groups.get_members(group): chains_by_representation.setdefault(sequence.compute_chain_representation(member[0], member[1]), []).append(member)
+    representations = list(chains_by_representation)
+    merged_groups = set()
+    for representation, group in zip(representations, groups.find_groups(representations)):
+        if group is None: continue
+        chains_by_representation[representation].extend(groups.get_members(group))
+        merged_groups.add(group)
+    commands_by_first_chain = []
+    for representation, chains in chains_by_representation.items():
+        if len(chains) < 2: continue
+        chains.sort()
+        commands_by_first_chain.append((chains[0][:2], representation, count_usage_of_chains(chains)))
+    for group in overlapped_groups:
+        if group in merged_groups: continue
+        chains = groups.get_members(group)
+        commands_by_first_chain.append((chains[0][:2], groups.get_representation(group), count_usage_of_chains(chains)))
+    counted_groups = [group for group in counted_groups if group not in merged_groups]
+    for group, (number_of_times_used, total_number_of_words_dictated, chain, chain_ending_index, last_chain_ending_index) in \
+            zip(counted_groups, groups.compute_statistics_of_groups(counted_groups)):
+        commands_by_first_chain.append(((chain, chain_ending_index), groups.get_representation(group), (number_of_times_used, total_number_of_words_dictated, last_chain_ending_index)))
+    if verbose: print('found', len(commands_by_first_chain), 'commands more than one chain simplifies to')
+    commands_by_first_chain.sort(key = lambda command: command[0])
+    for _, representation, usage in commands_by_first_chain:
+        command = PotentialCommandInformation(vocabulary.get_actions(representation))
+        command.record_usages(*usage)
+        command_set.insert_command(command, representation)
+    command_set.sample_structure_sizes(record)
+
+def create_suffix_array_command_information_set_from_record(record, max_command_chain_considered, *, verbose = False, vocabulary: ActionVocabulary = None,
+                                                            segmentation: RecordSegmentation = None):
+    '''Mines the concrete commands that more than one chain within a session simplifies to. A suffix array over the action run stream of the record
+    finds the runs of tokens that repeat, and only the chains that could repeat because of them are simplified. The commands and their usage match
+    those of the trie engine for every concrete command used more than once. Only finding the runs is near linear. In the worst case, such as a history
+    of dictation or of the same few commands, most chains could repeat, and this takes time proportional to the number of commands times the maximum chain length'''
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    command_set: CommandInformationSet = CommandInformationSet(vocabulary)
+    stream = ActionRunStream(record, command_set.vocabulary, segmentation)
+    runs = find_repeated_runs(stream.get_tokens(), stream.compute_longest_chain_length(record, max_command_chain_considered, segmentation))
+    insert_commands_of_repeated_actions(command_set, record, stream, runs, max_command_chain_considered, segmentation, verbose = verbose)
+    return command_set
+
+def create_rolling_hash_command_information_set_from_record(record, max_command_chain_considered, *, verbose = False, vocabulary: ActionVocabulary = None,
+                                                            segmentation: RecordSegmentation = None):
+    '''Mines the same concrete commands as the suffix array engine with numpy rolling hashes.
+    Simplification only merges inserts and equal actions that follow each other and drops inserts without text, so chains without those simplify to the actions they cover.
+    Those chains are grouped by the hashes of their actions and counted for all groups at once, so only the other chains are simplified one by one,
+    which the repeated runs the rolling hashes find limit like the suffix array does for its engine.
+    Falls back to the suffix array engine with a warning when numpy is not installed'''
+    if not is_rolling_hash_mining_available():
+        print('numpy is not installed, so the suffix array engine is used instead of the rolling hash engine', file = sys.stderr)
+        return create_suffix_array_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary, segmentation = segmentation)
+    if segmentation is None: segmentation = RecordSegmentation(record)
+    command_set: CommandInformationSet = CommandInformationSet(vocabulary)
+    stream = ActionRunStream(record, command_set.vocabulary, segmentation)
+    sequence = RecordActionSequence(record, command_set.vocabulary)
+    runs = find_repeated_runs_with_rolling_hashes(stream.get_tokens(), stream.compute_longest_chain_length(record, max_command_chain_considered, segmentation))
+    chain_targets = array('q', (compute_chain_target(record, chain, max_command_chain_considered, segmentation) for chain in range(len(record))))
+    groups = UnchangedChainGroups(sequence.identifiers, sequence.insert_flags, sequence.vanishing_flags, sequence.entry_action_starts, sequence.entry_action_endings,
+                                  array('q', stream.words_before_entries), chain_targets)
+    insert_commands_of_repeated_actions_with_unchanged_chain_groups(command_set, record, stream, sequence, runs, groups, max_command_chain_considered, segmentation, verbose = verbose)
+    return command_set
+
+def create_command_information_set_from_record(record, max_command_chain_considered, *, verbose = False, vocabulary: ActionVocabulary = None, number_of_workers: int = 1,
+                                                defer_abstraction: bool = False, prune_infrequent_chains: bool = False, mining_engine: str = TRIE_MINING_ENGINE,
+                                                gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS, time_budget_in_seconds: float = None,
+                                                chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Mines the record, which is either a list of entries or an iterable of entries to stream through.
+    Deferring abstraction first finds the abstraction shapes with enough instantiations for basic_command_filter and then only abstracts chains with those shapes.
+    Pruning infrequent chains first finds how far the chains from every start share their skeleton with chains from another start and stops extending chains past that.
+    Both give the same recommendations with basic_command_filter but need the whole record in memory.
+    The suffix array and rolling hash engines mine concrete commands only and ignore the options of the trie engine.
+    Chains never include a command that follows the previous one by more than the gap threshold.
+    With a time budget, the trie engine mines serially without deferring abstraction or pruning, since neither can stop before it is done,
+    and stops once the budget runs out, giving the command set the mining coverage. The other engines do not support a time budget'''
+    deadline = time.monotonic() + time_budget_in_seconds if time_budget_in_seconds is not None else None
+    if deadline is not None and mining_engine != TRIE_MINING_ENGINE: raise UnsupportedTimeBudgetException(f'the {mining_engine} mining engine does not support a time budget')
+    if mining_engine != TRIE_MINING_ENGINE or defer_abstraction or prune_infrequent_chains or number_of_workers > 1 or deadline is not None:
+        if not isinstance(record, list): record = list(record)
+    if not isinstance(record, list):
+        return create_command_information_set_from_record_stream(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary, gap_threshold_in_seconds = gap_threshold_in_seconds,
+                                                                 chain_pipeline_cache_size = chain_pipeline_cache_size)
+    segmentation = RecordSegmentation(record, gap_threshold_in_seconds)
+    if mining_engine == ROLLING_HASH_MINING_ENGINE:
+        return create_rolling_hash_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary, segmentation = segmentation)
+    if mining_engine == SUFFIX_ARRAY_MINING_ENGINE:
+        return create_suffix_array_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary, segmentation = segmentation)
+    if deadline is not None:
+        return create_budgeted_command_information_set_from_record(record, max_command_chain_considered, deadline, verbose = verbose, vocabulary = vocabulary, segmentation = segmentation,
+                                                                   chain_pipeline_cache_size = chain_pipeline_cache_size)
+    viable_abstraction_shapes = None
+    frequent_chain_skeleton_lengths = None
+    if (defer_abstraction or prune_infrequent_chains) and vocabulary is None: vocabulary = ActionVocabulary()
+    if defer_abstraction:
+        viable_abstraction_shapes = compute_viable_abstraction_shapes(record, max_command_chain_considered, vocabulary, segmentation)
+        if verbose: print('found', len(viable_abstraction_shapes), 'abstraction shapes worth abstracting')
+    if prune_infrequent_chains:
+        frequent_chain_skeleton_lengths = compute_frequent_chain_skeleton_lengths(record, max_command_chain_considered, vocabulary, segmentation)
+        if verbose: print('found the frequent chain skeleton lengths')
+    if number_of_workers > 1 and len(record) > 0:
+        return create_parallel_command_information_set_from_record(record, max_command_chain_considered, number_of_workers, verbose = verbose, vocabulary = vocabulary,
+                                                                   viable_abstraction_shapes = viable_abstraction_shapes, frequent_chain_skeleton_lengths = frequent_chain_skeleton_lengths,
+                                                                   segmentation = segmentation, chain_pipeline_cache_size = chain_pipeline_cache_size)
+    return create_serial_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary,
+                                                             viable_abstraction_shapes = viable_abstraction_shapes, frequent_chain_skeleton_lengths = frequent_chain_skeleton_lengths,
+                                                             segmentation = segmentation, chain_pipeline_cache_size = chain_pipeline_cache_size)
+
+def compute_recommendations_from_command_set(command_set: CommandInformationSet, filter = basic_command_filter):
+    if command_set.can_filter_over_statistics_columns(filter): return compute_recommendations_from_statistics_columns(command_set)
+    instrumentation = get_instrumentation()
+    memory_profiler = get_memory_profiler()
+    with instrumentation.time_stage(FILTERING_STAGE): recommended_commands = command_set.get_commands_meeting_condition(filter)
+    memory_profiler.take_snapshot(FILTERING_STAGE)
+    with instrumentation.time_stage(SORTING_STAGE):
+        sorted_recommended_commands = sorted(recommended_commands, key = lambda command: command.get_number_of_times_used(), reverse = True)
+    memory_profiler.take_snapshot(SORTING_STAGE)
+    return sorted_recommended_commands
+
+def compute_recommendations_from_statistics_columns(command_set: CommandInformationSet):
+    '''Filters and ranks the rows of the candidate statistics columns with basic_command_filter, so only the recommended candidates are looked up'''
+    instrumentation = get_instrumentation()
+    memory_profiler = get_memory_profiler()
+    with instrumentation.time_stage(FILTERING_STAGE): recommended_rows = compute_rows_meeting_basic_command_filter(command_set.candidate_statistics)
+    memory_profiler.take_snapshot(FILTERING_STAGE)
+    with instrumentation.time_stage(SORTING_STAGE):
+        sorted_recommended_commands = command_set.get_commands_in_rows(sort_rows_by_usage(command_set.candidate_statistics, recommended_rows))
+    memory_profiler.take_snapshot(SORTING_STAGE)
     return sorted_recommended_commands
 
-def generate_recommendations(recommendation_directory, data_directory, parameters: InputParameters):
-    record = obtain_file_record(data_directory, parameters.input_path)
-    print('finished reading record')
-    recommendations = compute_recommendations_from_record(record, parameters.max_chain_length, verbose = True)
-    print('outputting recommendations')
-    output_recommendations(recommendations, recommendation_directory)
-    print('completed')
+def print_mining_coverage(command_set: CommandInformationSet):
+    coverage = command_set.get_mining_coverage()
+    if coverage is not None: print('coverage:', coverage.compute_description())
+
+def compute_recommendations_from_record(record, max_command_chain_considered = 100, *, verbose = False, filter = basic_command_filter, vocabulary: ActionVocabulary = None, number_of_workers: int = 1,
+                                        defer_abstraction: bool = False, prune_infrequent_chains: bool = False, mining_engine: str = TRIE_MINING_ENGINE,
+                                        gap_threshold_in_seconds: int = FIVE_MINUTES_IN_SECONDS, time_budget_in_seconds: float = None,
+                                        chain_pipeline_cache_size: int = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE):
+    '''Abstraction is only deferred and chains are only pruned with basic_command_filter since both rely on its thresholds.
+    With a time budget, the recommendations come from what was mined before it ran out, and the mining coverage gets printed if verbose'''
+    uses_basic_command_filter = filter is basic_command_filter
+    command_set = create_command_information_set_from_record(record, max_command_chain_considered, verbose = verbose, vocabulary = vocabulary, number_of_workers = number_of_workers,
+                                                             defer_abstraction = defer_abstraction and uses_basic_command_filter,
+                                                             prune_infrequent_chains = prune_infrequent_chains and uses_basic_command_filter, mining_engine = mining_engine,
+                                                             gap_threshold_in_seconds = gap_threshold_in_seconds, time_budget_in_seconds = time_budget_in_seconds,
+                                                             chain_pipeline_cache_size = chain_pipeline_cache_size)
+    if verbose: print_mining_coverage(command_set)
+    return compute_recommendations_from_command_set(command_set, filter)
+
+def should_resume_analysis(parameters: InputParameters) -> bool:
+    return parameters.resume_analysis and parameters.number_of_workers <= 1 and not parameters.defer_abstraction and not parameters.prune_infrequent_chains and \
+        parameters.mining_engine == TRIE_MINING_ENGINE and parameters.time_budget_in_seconds is None and not is_binary_record_file(parameters.input_path)
+
+def should_read_whole_record(parameters: InputParameters) -> bool:
+    return parameters.number_of_workers > 1 or parameters.mining_engine != TRIE_MINING_ENGINE or parameters.time_budget_in_seconds is not None
+
+def compute_remaining_time_budget_in_seconds(parameters: InputParameters, starting_time: float):
+    '''The time budget covers the whole analysis, so the time spent reading the record comes out of the budget for mining'''
+    if parameters.time_budget_in_seconds is None: return None
+    return max(parameters.time_budget_in_seconds - (time.monotonic() - starting_time), 0)
+
+def compute_command_information_set_from_parameters(data_directory, parameters: InputParameters):
+    '''Reading the record counts as chain mining except for the parsing and ignore filtering timed within it'''
+    with get_instrumentation().time_stage(CHAIN_MINING_STAGE):
+        starting_time = time.monotonic()
+        verbose = parameters.verbose
+        if should_resume_analysis(parameters):
+            return create_command_information_set_from_record_file_with_checkpoint(data_directory, parameters.input_path, parameters.max_chain_length, verbose = verbose,
+                                                                                   gap_threshold_in_seconds = parameters.session_gap_threshold_in_seconds,
+                                                                                   commands_to_ignore_path = parameters.commands_to_ignore_path,
+                                                                                   chain_pipeline_cache_size = parameters.chain_pipeline_cache_size)
+        vocabulary = ActionVocabulary()
+        if should_read_whole_record(parameters):
+            record = obtain_file_record(data_directory, parameters.input_path, vocabulary, refresh_cache = parameters.refresh_record_cache, commands_to_ignore_path = parameters.commands_to_ignore_path)
+            get_memory_profiler().take_snapshot(IGNORE_FILTERING_STAGE)
+            if verbose: print('finished reading record')
+        else:
+            record = stream_file_record_without_stuff_to_ignore(data_directory, parameters.input_path, vocabulary, refresh_cache = parameters.refresh_record_cache,
+                                                                commands_to_ignore_path = parameters.commands_to_ignore_path)
+        return create_command_information_set_from_record(record, parameters.max_chain_length, verbose = verbose, vocabulary = vocabulary, number_of_workers = parameters.number_of_workers,
+                                                          defer_abstraction = parameters.defer_abstraction, prune_infrequent_chains = parameters.prune_infrequent_chains,
+                                                          mining_engine = parameters.mining_engine, gap_threshold_in_seconds = parameters.session_gap_threshold_in_seconds,
+                                                          time_budget_in_seconds = compute_remaining_time_budget_in_seconds(parameters, starting_time),
+                                                          chain_pipeline_cache_size = parameters.chain_pipeline_cache_size)
+
+def print_chain_pipeline_cache_statistics(command_set: CommandInformationSet):
+    cache = command_set.get_chain_pipeline_cache()
+    if cache.get_number_of_lookups() > 0:
+        print(f'chain pipeline cache hits: {cache.get_number_of_hits()} out of {cache.get_number_of_lookups()} ({cache.get_hit_rate():.1%})')
+
+def record_mining_counters(command_set: CommandInformationSet, prose_window_matcher_cache_information_before_mining):
+    instrumentation = get_instrumentation()
+    if not instrumentation.is_enabled(): return
+    statistics = command_set.get_mining_statistics()
+    instrumentation.set_counter('chains_processed', statistics.number_of_chains_processed)
+    instrumentation.set_counter('partial_chains_processed', statistics.number_of_partial_chains_processed)
+    instrumentation.set_counter('text_separation_analyzers_constructed', statistics.number_of_text_separation_analyzers_constructed)
+    instrumentation.set_counter('candidates', command_set.get_size())
+    instrumentation.set_counter('abstract_candidates', len(command_set.get_commands_meeting_condition(lambda command: command.is_abstract())))
+    cache = command_set.get_chain_pipeline_cache()
+    instrumentation.set_counter('chain_pipeline_cache_hits', cache.get_number_of_hits())
+    instrumentation.set_counter('chain_pipeline_cache_misses', cache.get_number_of_misses())
+    instrumentation.set_counter('chain_pipeline_cache_hit_rate', cache.get_hit_rate())
+    #the prose window matcher cache lives in this process, so it misses the lookups made by worker processes
+    prose_window_matcher_cache_information = compute_prose_window_matcher.cache_info()
+    hits = prose_window_matcher_cache_information.hits - prose_window_matcher_cache_information_before_mining.hits
+    misses = prose_window_matcher_cache_information.misses - prose_window_matcher_cache_information_before_mining.misses
+    instrumentation.set_counter('prose_window_matcher_cache_hits', hits)
+    instrumentation.set_counter('prose_window_matcher_cache_misses', misses)
+    instrumentation.set_counter('prose_window_matcher_cache_hit_rate', hits/(hits + misses) if hits + misses > 0 else 0.0)
+    coverage = command_set.get_mining_coverage()
+    if coverage is not None: instrumentation.set_counter('mining_coverage', coverage.compute_fraction_mined())
+
+def compute_recommendations_from_parameters(data_directory, parameters: InputParameters):
+    '''Returns the recommendations along with the mining coverage, which is None without a time budget'''
+    prose_window_matcher_cache_information = compute_prose_window_matcher.cache_info()
+    command_set = compute_command_information_set_from_parameters(data_directory, parameters)
+    get_memory_profiler().take_snapshot(CHAIN_MINING_STAGE)
+    record_mining_counters(command_set, prose_window_matcher_cache_information)
+    if parameters.verbose:
+        print_chain_pipeline_cache_statistics(command_set)
+        print_mining_coverage(command_set)
+    return compute_recommendations_from_command_set(command_set), command_set.get_mining_coverage()
+
+def compute_record_name(input_path: str) -> str:
+    return os.path.splitext(os.path.basename(input_path))[0]
+
+def write_analysis_report(output_path: str) -> str:
+    report_path = compute_report_path(output_path)
+    get_instrumentation().write_report(report_path)
+    return report_path
+
+def write_memory_profile(output_path: str) -> str:
+    memory_profiler = get_memory_profiler()
+    memory_profiler.take_snapshot(OUTPUT_STAGE)
+    memory_profile_path = compute_memory_profile_path(output_path)
+    memory_profiler.write_report(memory_profile_path)
+    return memory_profile_path
+
+def start_requested_profiling(parameters: InputParameters):
+    if parameters.write_analysis_report: start_instrumentation()
+    if parameters.profile_memory: start_memory_profiling()
+
+def stop_profiling():
+    stop_instrumentation()
+    stop_memory_profiling()
+
+def generate_recommendations(recommendation_directory, data_directory, parameters: InputParameters) -> str:
+    start_requested_profiling(parameters)
+    try:
+        recommendations, mining_coverage = compute_recommendations_from_parameters(data_directory, parameters)
+        if parameters.verbose: print('outputting recommendations')
+        output_path = output_recommendations(recommendations, recommendation_directory, parameters.output_format, mining_coverage = mining_coverage, mining_engine = parameters.mining_engine)
+        if parameters.write_analysis_report:
+            report_path = write_analysis_report(output_path)
+            if parameters.verbose: print('wrote the analysis report to', report_path)
+        if parameters.profile_memory:
+            memory_profile_path = write_memory_profile(output_path)
+            if parameters.verbose: print('wrote the memory profile to', memory_profile_path)
+    finally:
+        stop_profiling()
+    if parameters.verbose: print('completed')
+    return output_path
+
+def analyze_record_in_batch(recommendation_directory, data_directory, parameters: InputParameters):
+    '''Generates the recommendations for one record of a batch and summarizes how it went.
+    A failure is reported in the summary instead of raised so that the rest of the batch still gets analyzed'''
+    starting_wall_time = time.perf_counter()
+    starting_processor_time = time.process_time()
+    summary = {'input_path': parameters.input_path}
+    start_requested_profiling(parameters)
+    try:
+        recommendations, mining_coverage = compute_recommendations_from_parameters(data_directory, parameters)
+        summary['output_path'] = output_recommendations(recommendations, recommendation_directory, parameters.output_format, compute_record_name(parameters.input_path), mining_coverage,
+                                                        parameters.mining_engine)
+        summary['number_of_recommendations'] = len(recommendations)
+        if mining_coverage is not None: summary['mining_coverage'] = mining_coverage.compute_summary()
+        if parameters.write_analysis_report: summary['report_path'] = write_analysis_report(summary['output_path'])
+        if parameters.profile_memory: summary['memory_profile_path'] = write_memory_profile(summary['output_path'])
+    except Exception as exception:
+        summary['error'] = f'{type(exception).__name__}: {exception}'
+    finally:
+        stop_profiling()
+    summary['wall_time_in_seconds'] = time.perf_counter() - starting_wall_time
+    summary['processor_time_in_seconds'] = time.process_time() - starting_processor_time
+    return summary
+
+def compute_batch_record_parameters(parameters: InputParameters, input_path: str) -> InputParameters:
+    '''Records of a batch are analyzed in parallel with each other, so each one is analyzed by a single process without printing progress'''
+    record_parameters = copy.copy(parameters)
+    record_parameters.input_path = input_path
+    record_parameters.number_of_workers = 1
+    record_parameters.verbose = False
+    return record_parameters
+
+def write_batch_summary(recommendation_directory, record_summaries, wall_time_in_seconds: float) -> str:
+    summary_path = os.path.join(recommendation_directory, BATCH_SUMMARY_FILENAME_PREFIX + compute_formatted_timestamp() + JSON_FILE_EXTENSION)
+    with open(summary_path, 'w') as file:
+        json.dump({'wall_time_in_seconds': wall_time_in_seconds, 'records': record_summaries}, file, indent = 4)
+    return summary_path
+
+def print_record_summary(summary):
+    if 'error' in summary: print(f"{summary['input_path']} failed after {summary['wall_time_in_seconds']:.1f} seconds: {summary['error']}")
+    else: print(f"{summary['input_path']}: {summary['number_of_recommendations']} recommendations in {summary['wall_time_in_seconds']:.1f} seconds")
+
+def generate_batch_recommendations(recommendation_directory, data_directory, parameters: InputParameters, input_paths) -> str:
+    '''Analyzes the records concurrently with as many processes as the parameters have workers, writing one recommendations file per record
+    and a summary of every record. Returns the path to the summary'''
+    starting_wall_time = time.perf_counter()
+    record_parameters = [compute_batch_record_parameters(parameters, input_path) for input_path in input_paths]
+    record_summaries = []
+    with ProcessPoolExecutor(max_workers = min(parameters.number_of_workers, len(input_paths))) as executor:
+        for summary in executor.map(analyze_record_in_batch, itertools.repeat(recommendation_directory), itertools.repeat(data_directory), record_parameters):
+            if parameters.verbose: print_record_summary(summary)
+            record_summaries.append(summary)
+    summary_path = write_batch_summary(recommendation_directory, record_summaries, time.perf_counter() - starting_wall_time)
+    if parameters.verbose: print('wrote the batch summary to', summary_path)
+    return summary_path
 
 def guarantee_directory_exists(directory):
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def main():
+def main(arguments = None):
+    '''Analyzes the records named in the command line arguments, asking for the record to analyze when there are no arguments'''
+    if arguments is None: arguments = sys.argv[1:]
     program_directory = compute_main_program_directory()
-    recommendation_output_directory = compute_recommendation_output_directory(program_directory)
-    guarantee_directory_exists(recommendation_output_directory)
     data_directory = compute_data_directory(program_directory)
     guarantee_directory_exists(data_directory)
-    parameters = get_input_parameters_from_user()
-    generate_recommendations(recommendation_output_directory, data_directory, parameters)
+    request = parse_command_line_arguments(arguments) if arguments else None
+    parameters = request.parameters if request is not None else get_input_parameters_from_user()
+    recommendation_output_directory = parameters.output_directory or compute_recommendation_output_directory(program_directory)
+    guarantee_directory_exists(recommendation_output_directory)
+    if request is not None and request.is_batch: generate_batch_recommendations(recommendation_output_directory, data_directory, parameters, request.input_paths)
+    else: generate_recommendations(recommendation_output_directory, data_directory, parameters)
 
 if __name__ == '__main__':
     main()
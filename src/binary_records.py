@@ -0,0 +1,201 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+from action_records import BasicAction, Command, RecordingStart, ActionVocabulary, stream_file_record
+from input_parsing import InputParameter, get_input_parameter_from_user
+
+BINARY_RECORD_MAGIC = b'BARB'
+BINARY_RECORD_VERSION = 1
+BINARY_RECORD_FILE_EXTENSION = '.barb'
+#magic, version, number of vocabulary actions, number of entries, number of action identifiers, string heap size
+HEADER_FORMAT = struct.Struct('<4sIQQQQ')
+#string heap offset and length of the action json
+VOCABULARY_ENTRY_FORMAT = struct.Struct('<QI')
+#name offset, name length, first action identifier index, number of actions, seconds since action, flags
+RECORD_ENTRY_FORMAT = struct.Struct('<QIQIqI')
+ACTION_IDENTIFIER_FORMAT = struct.Struct('<I')
+RECORDING_START_FLAG = 1
+TIME_INFORMATION_FLAG = 2
+SECTION_MEMORY_LIMIT_IN_BYTES = 16*1024*1024
+
+class InvalidBinaryRecordException(Exception):
+    pass
+
+class BinaryRecordWriter:
+    '''Builds a binary record one entry at a time, moving each section to a temporary file once it outgrows the memory limit'''
+    def __init__(self, section_memory_limit_in_bytes: int = SECTION_MEMORY_LIMIT_IN_BYTES):
+        self.vocabulary = ActionVocabulary()
+        self.entries = tempfile.SpooledTemporaryFile(max_size = section_memory_limit_in_bytes)
+        self.action_identifiers = tempfile.SpooledTemporaryFile(max_size = section_memory_limit_in_bytes)
+        self.string_heap = tempfile.SpooledTemporaryFile(max_size = section_memory_limit_in_bytes)
+        self.string_heap_size: int = 0
+        self.number_of_entries: int = 0
+        self.number_of_action_identifiers: int = 0
+
+    def add_entry(self, entry):
+        if entry.is_command_record(): self.add_command(entry)
+        else: self.add_recording_start()
+        self.number_of_entries += 1
+
+    def add_recording_start(self):
+        self.entries.write(RECORD_ENTRY_FORMAT.pack(0, 0, self.number_of_action_identifiers, 0, 0, RECORDING_START_FLAG))
+
+    def add_command(self, command):
+        name_offset, name_length = self.add_string(command.get_name())
+        first_action_identifier_index = self.number_of_action_identifiers
+        for action in command.get_actions():
+            self.action_identifiers.write(ACTION_IDENTIFIER_FORMAT.pack(self.vocabulary.compute_identifier(action)))
+        self.number_of_action_identifiers += len(command.get_actions())
+        flags = 0
+        seconds_since_action = 0
+        if command.is_time_information_available():
+            flags |= TIME_INFORMATION_FLAG
+            seconds_since_action = command.get_seconds_since_action()
+        self.entries.write(RECORD_ENTRY_FORMAT.pack(name_offset, name_length, first_action_identifier_index, len(command.get_actions()), seconds_since_action, flags))
+
+    def add_string(self, text: str):
+        encoded_text = text.encode('utf-8')
+        offset = self.string_heap_size
+        self.string_heap.write(encoded_text)
+        self.string_heap_size += len(encoded_text)
+        return offset, len(encoded_text)
+
+    def compute_vocabulary_table(self):
+        table = bytearray()
+        for identifier in range(self.vocabulary.get_size()):
+            offset, length = self.add_string(self.vocabulary.get_action(identifier).to_json())
+            table += VOCABULARY_ENTRY_FORMAT.pack(offset, length)
+        return table
+
+    def write(self, path: str):
+        vocabulary_table = self.compute_vocabulary_table()
+        header = HEADER_FORMAT.pack(BINARY_RECORD_MAGIC, BINARY_RECORD_VERSION, self.vocabulary.get_size(), self.number_of_entries, self.number_of_action_identifiers, self.string_heap_size)
+        with open(path, 'wb') as file:
+            file.write(header)
+            file.write(vocabulary_table)
+            for section in (self.entries, self.action_identifiers, self.string_heap):
+                section.seek(0)
+                shutil.copyfileobj(section, file)
+        self.close()
+
+    def close(self):
+        for section in (self.entries, self.action_identifiers, self.string_heap): section.close()
+
+def write_binary_record(path: str, record):
+    '''Writes the record entries to the specified path in the binary record format'''
+    writer = BinaryRecordWriter()
+    for entry in record: writer.add_entry(entry)
+    writer.write(path)
+
+def convert_record_file_to_binary(input_path: str, output_path: str):
+    write_binary_record(output_path, stream_file_record(input_path))
+
+def is_binary_record_file(path: str) -> bool:
+    with open(path, 'rb') as file:
+        return file.read(len(BINARY_RECORD_MAGIC)) == BINARY_RECORD_MAGIC
+
+class BinaryRecord:
+    '''A record in the binary format loaded with mmap. Commands are only constructed when accessed and every distinct action is decoded once'''
+    def __init__(self, path: str, vocabulary: ActionVocabulary = None):
+        self.vocabulary = vocabulary if vocabulary is not None else ActionVocabulary()
+        self.file = open(path, 'rb')
+        try:
+            self.memory = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise InvalidBinaryRecordException(f'{path} is empty')
+        self.read_header(path)
+        self.actions = [None]*self.number_of_vocabulary_actions
+
+    def read_header(self, path: str):
+        if len(self.memory) < HEADER_FORMAT.size:
+            self.close()
+            raise InvalidBinaryRecordException(f'{path} is too small to be a binary record')
+        magic, version, self.number_of_vocabulary_actions, self.number_of_entries, number_of_action_identifiers, string_heap_size = HEADER_FORMAT.unpack_from(self.memory, 0)
+        if magic != BINARY_RECORD_MAGIC or version != BINARY_RECORD_VERSION:
+            self.close()
+            raise InvalidBinaryRecordException(f'{path} is not a version {BINARY_RECORD_VERSION} binary record')
+        self.vocabulary_table_offset = HEADER_FORMAT.size
+        self.entries_offset = self.vocabulary_table_offset + self.number_of_vocabulary_actions*VOCABULARY_ENTRY_FORMAT.size
+        self.action_identifiers_offset = self.entries_offset + self.number_of_entries*RECORD_ENTRY_FORMAT.size
+        self.string_heap_offset = self.action_identifiers_offset + number_of_action_identifiers*ACTION_IDENTIFIER_FORMAT.size
+        if self.string_heap_offset + string_heap_size != len(self.memory):
+            self.close()
+            raise InvalidBinaryRecordException(f'{path} has sections that do not match its size')
+
+    def read_string(self, offset: int, length: int) -> str:
+        start = self.string_heap_offset + offset
+        return self.memory[start:start + length].decode('utf-8')
+
+    def get_action(self, identifier: int):
+        action = self.actions[identifier]
+        if action is None:
+            offset, length = VOCABULARY_ENTRY_FORMAT.unpack_from(self.memory, self.vocabulary_table_offset + identifier*VOCABULARY_ENTRY_FORMAT.size)
+            action = self.vocabulary.intern(BasicAction.from_json(self.read_string(offset, length)))
+            self.actions[identifier] = action
+        return action
+
+    def compute_entry(self, index: int):
+        name_offset, name_length, first_action_identifier_index, number_of_actions, seconds_since_action, flags = \
+            RECORD_ENTRY_FORMAT.unpack_from(self.memory, self.entries_offset + index*RECORD_ENTRY_FORMAT.size)
+        if flags & RECORDING_START_FLAG: return RecordingStart()
+        identifiers_start = self.action_identifiers_offset + first_action_identifier_index*ACTION_IDENTIFIER_FORMAT.size
+        actions = [self.get_action(identifier) for (identifier,) in ACTION_IDENTIFIER_FORMAT.iter_unpack(self.memory[identifiers_start:identifiers_start + number_of_actions*ACTION_IDENTIFIER_FORMAT.size])]
+        if not flags & TIME_INFORMATION_FLAG: seconds_since_action = None
+        return Command(self.read_string(name_offset, name_length), actions, seconds_since_action)
+
+    def __len__(self):
+        return self.number_of_entries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice): return [self.compute_entry(entry_index) for entry_index in range(*index.indices(self.number_of_entries))]
+        if index < 0: index += self.number_of_entries
+        if index < 0 or index >= self.number_of_entries: raise IndexError('binary record index out of range')
+        return self.compute_entry(index)
+
+    def __iter__(self):
+        for index in range(self.number_of_entries): yield self.compute_entry(index)
+
+    def close(self):
+        self.memory.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+def stream_binary_record(path: str, vocabulary: ActionVocabulary = None):
+    '''Yields the entries of the binary record decoding each one only when it is reached'''
+    with BinaryRecord(path, vocabulary) as record:
+        yield from record
+
+def read_binary_record(path: str, vocabulary: ActionVocabulary = None):
+    '''Decodes every entry of the binary record into a list. Mining revisits each entry once per chain size, so this decodes entries once up front instead of on every access like BinaryRecord'''
+    with BinaryRecord(path, vocabulary) as record:
+        return list(record)
+
+def compute_default_binary_record_path(input_path: str) -> str:
+    return os.path.splitext(input_path)[0] + BINARY_RECORD_FILE_EXTENSION
+
+def main():
+    input_path = get_input_parameter_from_user(InputParameter(
+        description="the file path to the text command record to convert",
+        is_valid=os.path.exists,
+        explain_error=lambda _: 'Please input a valid path!',
+    ))
+    output_path = get_input_parameter_from_user(InputParameter(
+        description="the file path to write the binary record to",
+        is_valid=lambda x: len(x) > 0,
+        explain_error=lambda _: 'Please input a path!',
+        default_value=compute_default_binary_record_path(input_path),
+    ))
+    convert_record_file_to_binary(input_path, output_path)
+    print('completed')
+
+if __name__ == '__main__':
+    main()
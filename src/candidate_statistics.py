@@ -0,0 +1,56 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#the smallest value the chain column holds, so every chain comes after it
+NO_CHAIN = -2**63
+CONCRETE_COMMAND_NUMBER_OF_INSTANTIATIONS = -1
+
+def is_vectorized_filtering_available() -> bool:
+    return numpy is not None
+
+class CandidateStatisticsColumns:
+    '''The statistics of candidate commands in parallel typed columns with a row per candidate, so filters can go over every candidate at once.
+    The number of actions is the length of the action list, and concrete commands have no number of instantiations'''
+    def __init__(self):
+        self.numbers_of_times_used = array('q')
+        self.total_numbers_of_words_dictated = array('q')
+        self.numbers_of_actions = array('q')
+        self.last_chains = array('q')
+        self.numbers_of_instantiations = array('q')
+
+    def add_row(self, number_of_times_used: int, total_number_of_words_dictated: int, number_of_actions: int, last_chain: int, number_of_instantiations: int) -> int:
+        self.numbers_of_times_used.append(number_of_times_used)
+        self.total_numbers_of_words_dictated.append(total_number_of_words_dictated)
+        self.numbers_of_actions.append(number_of_actions)
+        self.last_chains.append(last_chain)
+        self.numbers_of_instantiations.append(number_of_instantiations)
+        return len(self.numbers_of_times_used) - 1
+
+    def copy_row_from(self, other, row: int) -> int:
+        return self.add_row(other.numbers_of_times_used[row], other.total_numbers_of_words_dictated[row], other.numbers_of_actions[row], other.last_chains[row],
+                            other.numbers_of_instantiations[row])
+
+    def get_size(self) -> int:
+        return len(self.numbers_of_times_used)
+
+def compute_rows_meeting_basic_command_filter(columns: CandidateStatisticsColumns):
+    '''Computes the rows basic_command_filter keeps in one pass over the columns with the same floating point operations it does'''
+    numbers_of_times_used = numpy.frombuffer(columns.numbers_of_times_used, dtype = numpy.int64)
+    total_numbers_of_words_dictated = numpy.frombuffer(columns.total_numbers_of_words_dictated, dtype = numpy.int64)
+    numbers_of_actions = numpy.frombuffer(columns.numbers_of_actions, dtype = numpy.int64).astype(numpy.float64)
+    numbers_of_instantiations = numpy.frombuffer(columns.numbers_of_instantiations, dtype = numpy.int64)
+    with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+        average_words_dictated = total_numbers_of_words_dictated/numbers_of_times_used
+        is_kept = (average_words_dictated >= 2) & (numbers_of_times_used > 1) & \
+            ((numbers_of_instantiations == CONCRETE_COMMAND_NUMBER_OF_INSTANTIATIONS) | (numbers_of_instantiations > 2) & (average_words_dictated > 2)) & \
+            ((numbers_of_actions/average_words_dictated < 2) | (numbers_of_actions*numpy.sqrt(numbers_of_times_used) > average_words_dictated))
+    return numpy.flatnonzero(is_kept)
+
+def sort_rows_by_usage(columns: CandidateStatisticsColumns, rows):
+    '''Sorts the rows from most to least used, keeping rows used equally often in their order like a stable sort in reverse would'''
+    numbers_of_times_used = numpy.frombuffer(columns.numbers_of_times_used, dtype = numpy.int64)
+    return rows[numpy.argsort(-numbers_of_times_used[rows], kind = 'stable')]
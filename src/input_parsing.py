@@ -1,6 +1,19 @@
+import argparse
+import glob
 import os
 
 DEFAULT_MAX_CHAIN_LENGTH = 20
+DEFAULT_NUMBER_OF_WORKERS = 1
+DEFAULT_SESSION_GAP_THRESHOLD_IN_SECONDS = 5*60
+DEFAULT_CHAIN_PIPELINE_CACHE_SIZE = 65536
+TRIE_MINING_ENGINE = 'trie'
+SUFFIX_ARRAY_MINING_ENGINE = 'suffix_array'
+ROLLING_HASH_MINING_ENGINE = 'rolling_hash'
+MINING_ENGINES = (TRIE_MINING_ENGINE, SUFFIX_ARRAY_MINING_ENGINE, ROLLING_HASH_MINING_ENGINE)
+TEXT_OUTPUT_FORMAT = 'text'
+JSON_OUTPUT_FORMAT = 'json'
+OUTPUT_FORMATS = (TEXT_OUTPUT_FORMAT, JSON_OUTPUT_FORMAT)
+GLOB_CHARACTERS = '*?['
 
 class InputParameter:
     def __init__(self, description, is_valid, explain_error, convert_value=lambda x: x, default_value=None):
@@ -14,6 +27,25 @@ class InputParameters:
     def __init__(self):
         self.input_path = ""
         self.max_chain_length = DEFAULT_MAX_CHAIN_LENGTH
+        self.number_of_workers = DEFAULT_NUMBER_OF_WORKERS
+        self.refresh_record_cache = False
+        #checkpoints pickle the whole miner, which can take as much memory and disk space as the analysis itself
+        self.resume_analysis = False
+        self.defer_abstraction = False
+        self.prune_infrequent_chains = False
+        self.mining_engine = TRIE_MINING_ENGINE
+        self.session_gap_threshold_in_seconds = DEFAULT_SESSION_GAP_THRESHOLD_IN_SECONDS
+        #0 disables the cache
+        self.chain_pipeline_cache_size = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE
+        #None analyzes the whole record however long it takes
+        self.time_budget_in_seconds = None
+        #empty paths stand for the defaults inside the program directory
+        self.commands_to_ignore_path = ""
+        self.output_directory = ""
+        self.output_format = TEXT_OUTPUT_FORMAT
+        self.verbose = True
+        self.write_analysis_report = False
+        self.profile_memory = False
 
 def compute_input_text(parameter: InputParameter) -> str:
     text = f"Input {parameter.description}"
@@ -55,12 +87,113 @@ def get_max_chain_length_from_user():
     )
     return get_input_parameter_from_user(max_chain_length_parameter)
 
+def get_number_of_workers_from_user():
+    number_of_workers_parameter = InputParameter(
+        description=f"the number of worker processes to analyze the record with.\nYour computer has {os.cpu_count()} processors",
+        is_valid=lambda x: x.isdigit() and int(x) > 0,
+        explain_error=lambda _: 'Please enter a positive integer value.',
+        default_value=DEFAULT_NUMBER_OF_WORKERS,
+        convert_value=int,
+    )
+    return get_input_parameter_from_user(number_of_workers_parameter)
+
 def get_input_parameters_from_user() -> InputParameters:
     input_parameters = InputParameters()
     input_parameters.input_path = get_file_input_path_from_user()
     input_parameters.max_chain_length = get_max_chain_length_from_user()
+    input_parameters.number_of_workers = get_number_of_workers_from_user()
 
     return input_parameters
 
+def convert_positive_integer_argument(text: str) -> int:
+    if not text.isdigit() or int(text) <= 0: raise argparse.ArgumentTypeError(f'{text} is not a positive integer')
+    return int(text)
+
+def convert_non_negative_integer_argument(text: str) -> int:
+    if not text.isdigit(): raise argparse.ArgumentTypeError(f'{text} is not a non negative integer')
+    return int(text)
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description = 'Recommends commands from the actions in command records. Without arguments, asks for the input interactively.')
+    parser.add_argument('records', nargs = '+', help = 'the record files to analyze. Directories and glob patterns analyze every record they contain in batch mode')
+    parser.add_argument('--max-chain-length', type = convert_positive_integer_argument, default = DEFAULT_MAX_CHAIN_LENGTH,
+                        help = 'the maximum number of consecutive commands to consider as a single potential command')
+    parser.add_argument('--commands-to-ignore', default = '', help = 'the file of commands to leave out of the analysis instead of the one in the data directory')
+    parser.add_argument('--output-directory', default = '', help = 'the directory to write the recommendations to instead of the Recommendations directory')
+    parser.add_argument('--output-format', choices = OUTPUT_FORMATS, default = TEXT_OUTPUT_FORMAT)
+    parser.add_argument('--workers', type = convert_positive_integer_argument, default = DEFAULT_NUMBER_OF_WORKERS,
+                        help = 'the number of worker processes. In batch mode, this many records are analyzed at once with one process each')
+    parser.add_argument('--mining-engine', choices = MINING_ENGINES, default = TRIE_MINING_ENGINE,
+                        help = 'the suffix array and rolling hash engines give approximate results with concrete commands only, dropping the abstract commands the trie engine recommends. ' +
+                        'They do not support --time-budget, --defer-abstraction, --prune-infrequent-chains or --resume')
+    parser.add_argument('--session-gap', type = convert_positive_integer_argument, default = DEFAULT_SESSION_GAP_THRESHOLD_IN_SECONDS,
+                        help = 'the number of seconds between commands after which no chain contains both')
+    parser.add_argument('--chain-pipeline-cache-size', type = convert_non_negative_integer_argument, default = DEFAULT_CHAIN_PIPELINE_CACHE_SIZE,
+                        help = 'the number of recently seen command chains whose abstractions are remembered. 0 disables the cache')
+    parser.add_argument('--time-budget', type = convert_positive_integer_argument, default = None,
+                        help = 'the number of seconds to analyze each record for before recommending from what was analyzed so far. Only the trie engine supports it, and it ignores --defer-abstraction and --prune-infrequent-chains')
+    parser.add_argument('--defer-abstraction', action = 'store_true', help = 'only abstract chains whose abstractions could be recommended')
+    parser.add_argument('--prune-infrequent-chains', action = 'store_true', help = 'stop extending chains that no other part of the record shares')
+    parser.add_argument('--refresh-record-cache', action = 'store_true', help = 'parse the record again instead of using its cached copy')
+    parser.add_argument('--resume', action = 'store_true',
+                        help = 'save a checkpoint of the analysis and continue from it the next time if the record was only appended to. The checkpoint can be as large as the analysis in memory')
+    parser.add_argument('--quiet', action = 'store_true', help = 'do not print progress')
+    parser.add_argument('--report', action = 'store_true', help = 'write the time spent in every stage of the analysis and some counters to a JSON report next to the recommendations')
+    parser.add_argument('--profile-memory', action = 'store_true',
+                        help = 'trace memory allocations and write the peak memory, the top allocation sites, and the sizes of the largest structures to a JSON file next to the recommendations')
+    return parser
+
+def is_record_path_pattern_for_batch(pattern: str) -> bool:
+    return os.path.isdir(pattern) or any(character in pattern for character in GLOB_CHARACTERS)
+
+def expand_record_path_pattern(pattern: str):
+    if os.path.isdir(pattern): paths = [os.path.join(pattern, filename) for filename in os.listdir(pattern)]
+    elif any(character in pattern for character in GLOB_CHARACTERS): paths = glob.glob(pattern)
+    else: paths = [pattern]
+    return sorted(path for path in paths if os.path.isfile(path))
+
+def expand_record_path_patterns(patterns):
+    '''Computes the record files the patterns name without duplicates, keeping the order of the patterns'''
+    paths = []
+    for pattern in patterns:
+        for path in expand_record_path_pattern(pattern):
+            if path not in paths: paths.append(path)
+    return paths
 
+class CommandLineRequest:
+    '''The parameters shared by every record to analyze along with the paths of those records'''
+    def __init__(self, parameters: InputParameters, input_paths, is_batch: bool):
+        self.parameters = parameters
+        self.input_paths = input_paths
+        self.is_batch = is_batch
 
+def parse_command_line_arguments(arguments) -> CommandLineRequest:
+    parser = create_argument_parser()
+    namespace = parser.parse_args(arguments)
+    input_paths = expand_record_path_patterns(namespace.records)
+    if not input_paths: parser.error('no record files match ' + ' '.join(namespace.records))
+    if namespace.commands_to_ignore and not os.path.isfile(namespace.commands_to_ignore): parser.error(f'{namespace.commands_to_ignore} is not a file')
+    if namespace.mining_engine != TRIE_MINING_ENGINE:
+        for option, is_given in (('--time-budget', namespace.time_budget is not None), ('--defer-abstraction', namespace.defer_abstraction),
+                                 ('--prune-infrequent-chains', namespace.prune_infrequent_chains), ('--resume', namespace.resume)):
+            if is_given: parser.error(f'the {namespace.mining_engine} mining engine does not support {option}')
+    parameters = InputParameters()
+    parameters.input_path = input_paths[0]
+    parameters.max_chain_length = namespace.max_chain_length
+    parameters.number_of_workers = namespace.workers
+    parameters.refresh_record_cache = namespace.refresh_record_cache
+    parameters.resume_analysis = namespace.resume
+    parameters.defer_abstraction = namespace.defer_abstraction
+    parameters.prune_infrequent_chains = namespace.prune_infrequent_chains
+    parameters.mining_engine = namespace.mining_engine
+    parameters.session_gap_threshold_in_seconds = namespace.session_gap
+    parameters.time_budget_in_seconds = namespace.time_budget
+    parameters.chain_pipeline_cache_size = namespace.chain_pipeline_cache_size
+    parameters.commands_to_ignore_path = namespace.commands_to_ignore
+    parameters.output_directory = namespace.output_directory
+    parameters.output_format = namespace.output_format
+    parameters.verbose = not namespace.quiet
+    parameters.write_analysis_report = namespace.report
+    parameters.profile_memory = namespace.profile_memory
+    is_batch = len(input_paths) > 1 or any(is_record_path_pattern_for_batch(pattern) for pattern in namespace.records)
+    return CommandLineRequest(parameters, input_paths, is_batch)
@@ -0,0 +1,141 @@
+import collections
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+MEMORY_PROFILE_FILENAME_SUFFIX = ' memory profile.json'
+DEFAULT_NUMBER_OF_ALLOCATION_SITES = 10
+DEFAULT_NUMBER_OF_FRAMES = 1
+DEFAULT_MAXIMUM_NUMBER_OF_SAMPLED_ELEMENTS = 100
+#the deep size of values of these types is not part of the structure holding them
+UNMEASURED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+def compute_deep_size(value, seen_ids) -> int:
+    '''Computes the size of the value and everything it refers to that is not in the seen ids, adding the ids of what it measures to them'''
+    size = 0
+    values = [value]
+    while values:
+        value = values.pop()
+        if id(value) in seen_ids or isinstance(value, UNMEASURED_TYPES): continue
+        seen_ids.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            values.extend(value.keys())
+            values.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset, collections.deque)):
+            values.extend(value)
+        if hasattr(value, '__dict__'): values.append(value.__dict__)
+        for slot in getattr(type(value), '__slots__', ()):
+            if hasattr(value, slot): values.append(getattr(value, slot))
+    return size
+
+def estimate_deep_size(value, maximum_number_of_sampled_elements: int = DEFAULT_MAXIMUM_NUMBER_OF_SAMPLED_ELEMENTS, excluded_values = ()) -> int:
+    '''Estimates the deep size of the value without counting the excluded values or what only they refer to, unless the value is one of them.
+    The deep size of a long list or tuple is extrapolated from that of evenly spaced elements so that measuring stays fast'''
+    seen_ids = {id(excluded_value) for excluded_value in excluded_values if excluded_value is not value}
+    if not isinstance(value, (list, tuple)) or len(value) <= maximum_number_of_sampled_elements: return compute_deep_size(value, seen_ids)
+    seen_ids.add(id(value))
+    step = len(value)/maximum_number_of_sampled_elements
+    sampled_size = sum(compute_deep_size(value[int(index*step)], seen_ids) for index in range(maximum_number_of_sampled_elements))
+    return sys.getsizeof(value) + round(sampled_size*len(value)/maximum_number_of_sampled_elements)
+
+def compute_allocation_site_description(statistic):
+    frame = statistic.traceback[0]
+    return {'site': f'{frame.filename}:{frame.lineno}', 'size_in_bytes': statistic.size, 'number_of_blocks': statistic.count}
+
+class MemoryProfiler:
+    '''Traces memory allocations with tracemalloc while it runs.
+    Every snapshot records the memory in use, the peak since the previous snapshot, and the sites that allocated the most of the memory in use.
+    Every structure size sample records estimated deep sizes of the structures that grow while mining'''
+    def __init__(self, number_of_allocation_sites: int = DEFAULT_NUMBER_OF_ALLOCATION_SITES, number_of_frames: int = DEFAULT_NUMBER_OF_FRAMES):
+        self.number_of_allocation_sites = number_of_allocation_sites
+        self.snapshots = []
+        self.structure_size_samples = []
+        self.peak_memory_in_bytes: int = 0
+        self.starting_wall_time = time.perf_counter()
+        self.was_tracing = tracemalloc.is_tracing()
+        if self.was_tracing: tracemalloc.reset_peak()
+        else: tracemalloc.start(number_of_frames)
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def _compute_elapsed_wall_time(self) -> float:
+        return time.perf_counter() - self.starting_wall_time
+
+    def take_snapshot(self, stage: str):
+        '''Records the memory after the stage. The peak is reset afterwards so that the allocations made to describe the snapshot do not count toward the next one'''
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        self.peak_memory_in_bytes = max(self.peak_memory_in_bytes, peak_memory)
+        snapshot = tracemalloc.take_snapshot()
+        statistics = [statistic for statistic in snapshot.statistics('lineno') if statistic.traceback[0].filename != tracemalloc.__file__][:self.number_of_allocation_sites]
+        del snapshot
+        self.snapshots.append({
+            'stage': stage,
+            'elapsed_wall_time_in_seconds': self._compute_elapsed_wall_time(),
+            'current_memory_in_bytes': current_memory,
+            'peak_memory_in_bytes': peak_memory,
+            'top_allocation_sites': [compute_allocation_site_description(statistic) for statistic in statistics],
+        })
+        tracemalloc.reset_peak()
+
+    def sample_structure_sizes(self, number_of_chains_processed: int, structures, excluded_values = ()):
+        '''Records the estimated deep sizes of the structures given by name, leaving out the excluded values they share'''
+        sizes = {name: estimate_deep_size(structure, excluded_values = excluded_values) for name, structure in structures.items()}
+        self.structure_size_samples.append({
+            'elapsed_wall_time_in_seconds': self._compute_elapsed_wall_time(),
+            'chains_processed': number_of_chains_processed,
+            'estimated_deep_sizes_in_bytes': sizes,
+        })
+
+    def compute_report(self):
+        return {
+            'peak_memory_in_bytes': max(self.peak_memory_in_bytes, tracemalloc.get_traced_memory()[1]),
+            'snapshots': self.snapshots,
+            'structure_size_samples': self.structure_size_samples,
+        }
+
+    def write_report(self, path: str):
+        with open(path, 'w') as file: json.dump(self.compute_report(), file, indent = 4)
+
+    def stop(self):
+        if not self.was_tracing: tracemalloc.stop()
+
+class DisabledMemoryProfiler:
+    '''Stands in for the memory profiler while memory is not being profiled'''
+    def is_enabled(self) -> bool:
+        return False
+
+    def take_snapshot(self, stage: str):
+        pass
+
+    def sample_structure_sizes(self, number_of_chains_processed: int, structures, excluded_values = ()):
+        pass
+
+    def stop(self):
+        pass
+
+DISABLED_MEMORY_PROFILER = DisabledMemoryProfiler()
+current_memory_profiler = DISABLED_MEMORY_PROFILER
+
+def get_memory_profiler():
+    return current_memory_profiler
+
+def start_memory_profiling() -> MemoryProfiler:
+    '''Starts tracing the memory allocations of this process until profiling is stopped'''
+    global current_memory_profiler
+    current_memory_profiler.stop()
+    current_memory_profiler = MemoryProfiler()
+    return current_memory_profiler
+
+def stop_memory_profiling():
+    global current_memory_profiler
+    current_memory_profiler.stop()
+    current_memory_profiler = DISABLED_MEMORY_PROFILER
+
+def compute_memory_profile_path(output_path: str) -> str:
+    '''Computes the path of the memory profile that goes alongside the recommendations file'''
+    return os.path.splitext(output_path)[0] + MEMORY_PROFILE_FILENAME_SUFFIX
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+TERMINAL_REPORTING_INTERVAL_IN_SECONDS = 0.25
+LOG_REPORTING_INTERVAL_IN_SECONDS = 10
+BYTES_PER_MEGABYTE = 1024*1024
+
+def compute_memory_usage_in_bytes():
+    '''Computes the resident memory of the process, falling back to the peak resident memory where the current one is unavailable.
+    Returns None if neither is available'''
+    try:
+        with open('/proc/self/statm') as file: return int(file.read().split()[1])*os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None: return None
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    #macOS reports bytes while other platforms report kilobytes
+    if sys.platform == 'darwin': return peak_memory
+    return peak_memory*1024
+
+def format_duration(seconds: float) -> str:
+    seconds = round(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours > 0: return f'{hours}h {minutes:02}m'
+    if minutes > 0: return f'{minutes}m {seconds:02}s'
+    return f'{seconds}s'
+
+def is_stream_terminal(stream) -> bool:
+    return hasattr(stream, 'isatty') and stream.isatty()
+
+class ProgressReporter:
+    '''Reports how far mining has come at most a few times per second by rewriting a line on a terminal, or as a log line every few seconds otherwise.
+    The total number of chains is None when it is unknown, such as while streaming a record'''
+    def __init__(self, total_number_of_chains: int = None, number_of_chains_processed_before: int = 0, stream = None):
+        self.stream = stream if stream is not None else sys.stderr
+        self.is_terminal = is_stream_terminal(self.stream)
+        self.reporting_interval_in_seconds = TERMINAL_REPORTING_INTERVAL_IN_SECONDS if self.is_terminal else LOG_REPORTING_INTERVAL_IN_SECONDS
+        self.total_number_of_chains = total_number_of_chains
+        self.number_of_chains_processed_before = number_of_chains_processed_before
+        self.starting_time = time.monotonic()
+        self.next_report_time = self.starting_time + self.reporting_interval_in_seconds
+        self.length_of_last_line: int = 0
+        self.has_reported: bool = False
+
+    def update(self, number_of_chains_processed: int, number_of_candidates: int):
+        current_time = time.monotonic()
+        if current_time >= self.next_report_time:
+            self.report(number_of_chains_processed, number_of_candidates, current_time)
+            self.next_report_time = current_time + self.reporting_interval_in_seconds
+
+    def compute_description(self, number_of_chains_processed: int, number_of_candidates: int, elapsed_time_in_seconds: float) -> str:
+        number_of_chains_processed_since_start = number_of_chains_processed - self.number_of_chains_processed_before
+        chains_per_second = number_of_chains_processed_since_start/elapsed_time_in_seconds if elapsed_time_in_seconds > 0 else 0.0
+        if self.total_number_of_chains is None:
+            description = f'chain {number_of_chains_processed}'
+        else:
+            description = f'chain {number_of_chains_processed} of {self.total_number_of_chains}'
+            if self.total_number_of_chains > 0: description += f' ({number_of_chains_processed/self.total_number_of_chains:.1%})'
+        description += f', {chains_per_second:.0f} chains per second'
+        if self.total_number_of_chains is not None and chains_per_second > 0 and number_of_chains_processed < self.total_number_of_chains:
+            description += f', about {format_duration((self.total_number_of_chains - number_of_chains_processed)/chains_per_second)} left'
+        description += f', {number_of_candidates} candidates'
+        memory_usage = compute_memory_usage_in_bytes()
+        if memory_usage is not None: description += f', {memory_usage/BYTES_PER_MEGABYTE:.0f} MB'
+        return description
+
+    def report(self, number_of_chains_processed: int, number_of_candidates: int, current_time: float):
+        description = self.compute_description(number_of_chains_processed, number_of_candidates, current_time - self.starting_time)
+        if self.is_terminal:
+            self.stream.write('\r' + description.ljust(self.length_of_last_line))
+            self.length_of_last_line = len(description)
+        else:
+            self.stream.write(description + '\n')
+        self.stream.flush()
+        self.has_reported = True
+
+    def finish(self, number_of_chains_processed: int, number_of_candidates: int):
+        '''Reports the final progress if any progress was reported, so quick runs stay quiet'''
+        if not self.has_reported: return
+        self.report(number_of_chains_processed, number_of_candidates, time.monotonic())
+        if self.is_terminal:
+            self.stream.write('\n')
+            self.stream.flush()
+
+class DisabledProgressReporter:
+    def update(self, number_of_chains_processed: int, number_of_candidates: int):
+        pass
+
+    def finish(self, number_of_chains_processed: int, number_of_candidates: int):
+        pass
+
+DISABLED_PROGRESS_REPORTER = DisabledProgressReporter()
+
+def create_progress_reporter(verbose: bool, total_number_of_chains: int = None, number_of_chains_processed_before: int = 0):
+    if not verbose: return DISABLED_PROGRESS_REPORTER
+    return ProgressReporter(total_number_of_chains, number_of_chains_processed_before)
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import tempfile
+
+from binary_records import BINARY_RECORD_VERSION, BINARY_RECORD_FILE_EXTENSION, BinaryRecordWriter
+
+RECORD_CACHE_DIRECTORY_NAME = 'RecordCache'
+DEFAULT_MAXIMUM_RECORD_CACHE_SIZE_IN_BYTES = 1024*1024*1024
+TEMPORARY_FILE_EXTENSION = '.tmp'
+FILE_HASHING_CHUNK_SIZE = 1024*1024
+
+def update_hasher_with_file_contents(hasher, path: str):
+    with open(path, 'rb') as file:
+        chunk = file.read(FILE_HASHING_CHUNK_SIZE)
+        while chunk:
+            hasher.update(chunk)
+            chunk = file.read(FILE_HASHING_CHUNK_SIZE)
+
+def compute_temporary_path(path: str) -> str:
+    '''Creates an empty file with a name no other process uses next to the path, so a file can be written there and then moved into place'''
+    file_descriptor, temporary_path = tempfile.mkstemp(dir = os.path.dirname(path), prefix = os.path.basename(path) + '.', suffix = TEMPORARY_FILE_EXTENSION)
+    os.close(file_descriptor)
+    return temporary_path
+
+def replace_file_with_written_file(path: str, write_file):
+    '''Writes the file at a temporary path with the function and then moves it into place, so readers never see a partially written file'''
+    temporary_path = compute_temporary_path(path)
+    try:
+        write_file(temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        remove_file_if_present(temporary_path)
+        raise
+
+def remove_file_if_present(path: str):
+    '''Removes the file unless another process already removed it'''
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def compute_file_size_in_bytes(path: str) -> int:
+    '''Computes the size of the file, which is 0 if another process removed it'''
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+def compute_file_statuses(paths):
+    '''Computes the modification times and sizes of the files at the paths, leaving out the files other processes removed'''
+    statuses = []
+    for path in paths:
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            continue
+        statuses.append((status.st_mtime, status.st_size, path))
+    return statuses
+
+def evict_files_over_maximum_size(paths, maximum_size_in_bytes: int, path_to_keep: str = None):
+    '''Removes the least recently modified files other than the one to keep until the files fit the maximum size.
+    The directories these files are in are shared by every analysis running at once, so files removed by another process are skipped'''
+    statuses = sorted(compute_file_statuses(paths))
+    total_size = sum(size for _, size, _ in statuses)
+    for _, size, path in statuses:
+        if total_size <= maximum_size_in_bytes: break
+        if path == path_to_keep: continue
+        total_size -= size
+        remove_file_if_present(path)
+
+def compute_record_cache_key(input_path: str, commands_to_ignore_path: str) -> str:
+    '''Computes a key identifying the filtered record from the identity of the record file and the contents of the commands to ignore'''
+    status = os.stat(input_path)
+    hasher = hashlib.sha256()
+    hasher.update(f'{BINARY_RECORD_VERSION}\n{os.path.abspath(input_path)}\n{status.st_size}\n{status.st_mtime_ns}\n'.encode('utf-8'))
+    update_hasher_with_file_contents(hasher, commands_to_ignore_path)
+    return hasher.hexdigest()
+
+class RecordCache:
+    '''Stores filtered records in the binary record format, evicting the least recently used records once the cache exceeds its maximum size'''
+    def __init__(self, data_directory: str, maximum_size_in_bytes: int = DEFAULT_MAXIMUM_RECORD_CACHE_SIZE_IN_BYTES):
+        self.directory = os.path.join(data_directory, RECORD_CACHE_DIRECTORY_NAME)
+        self.maximum_size_in_bytes = maximum_size_in_bytes
+
+    def compute_entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + BINARY_RECORD_FILE_EXTENSION)
+
+    def find_entry(self, key: str):
+        '''Obtains the path to the cached record with the key or None if it is not cached'''
+        path = self.compute_entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def remove_entry(self, key: str):
+        remove_file_if_present(self.compute_entry_path(key))
+
+    def store(self, key: str, record):
+        writer = BinaryRecordWriter()
+        for entry in record: writer.add_entry(entry)
+        self.store_written_record(key, writer)
+
+    def store_written_record(self, key: str, writer: BinaryRecordWriter):
+        os.makedirs(self.directory, exist_ok = True)
+        path = self.compute_entry_path(key)
+        replace_file_with_written_file(path, writer.write)
+        self.evict_entries_over_maximum_size(path)
+
+    def compute_entry_paths(self):
+        if not os.path.exists(self.directory): return []
+        return [os.path.join(self.directory, filename) for filename in os.listdir(self.directory) if filename.endswith(BINARY_RECORD_FILE_EXTENSION)]
+
+    def evict_entries_over_maximum_size(self, path_to_keep: str = None):
+        evict_files_over_maximum_size(self.compute_entry_paths(), self.maximum_size_in_bytes, path_to_keep)
+
+    def clear(self):
+        for path in self.compute_entry_paths(): remove_file_if_present(path)
+
+    def get_size_in_bytes(self) -> int:
+        return sum(compute_file_size_in_bytes(path) for path in self.compute_entry_paths())
+
+def generate_entries_while_caching(record, cache: RecordCache, key: str):
+    '''Yields the entries of the record and stores the record in the cache once every entry has been yielded. The writer spills the record to temporary files as it grows, so caching does not hold the streamed record in memory'''
+    writer = BinaryRecordWriter()
+    try:
+        for entry in record:
+            writer.add_entry(entry)
+            yield entry
+        cache.store_written_record(key, writer)
+    finally:
+        writer.close()
@@ -0,0 +1,231 @@
+import itertools
+from action_records import FINGERPRINT_MULTIPLIER
+from suffix_array_mining import RepeatedRun
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def is_rolling_hash_mining_available() -> bool:
+    return numpy is not None
+
+def compute_lengths_until_separators(tokens):
+    '''Computes how many tokens at every position come before the next separator, which is any negative token'''
+    positions = numpy.arange(len(tokens))
+    separator_positions = numpy.append(numpy.flatnonzero(tokens < 0), len(tokens))
+    return separator_positions[numpy.searchsorted(separator_positions, positions)] - positions
+
+def split_colliding_windows(tokens, window_starts, length: int):
+    '''Groups windows whose hashes collided by their actual tokens, which can be any sequence'''
+    windows = {}
+    for start in window_starts: windows.setdefault(tuple(tokens[start:start + length]), []).append(start)
+    for starts in windows.values():
+        if len(starts) > 1: yield RepeatedRun(length, length, starts)
+
+def generate_repeated_runs_of_length(tokens, hashes, lengths_until_separators, length: int):
+    '''Yields the runs of the length occurring more than once, where the hashes are those of every window of the length'''
+    window_starts = numpy.flatnonzero(lengths_until_separators[:len(hashes)] >= length)
+    _, groups, counts = numpy.unique(hashes[window_starts], return_inverse = True, return_counts = True)
+    groups = groups.ravel()
+    is_repeated = counts[groups] > 1
+    window_starts = window_starts[is_repeated]
+    if len(window_starts) == 0: return
+    groups = groups[is_repeated]
+    order = numpy.argsort(groups, kind = 'stable')
+    window_starts = window_starts[order]
+    groups = groups[order]
+    group_beginnings = numpy.flatnonzero(numpy.concatenate(([True], groups[1:] != groups[:-1])))
+    group_sizes = numpy.diff(numpy.append(group_beginnings, len(groups)))
+    representatives = numpy.repeat(window_starts[group_beginnings], group_sizes)
+    is_mismatched = numpy.zeros(len(window_starts), dtype = bool)
+    for offset in range(length): is_mismatched |= tokens[window_starts + offset] != tokens[representatives + offset]
+    has_collision = numpy.logical_or.reduceat(is_mismatched, group_beginnings)
+    for beginning, size, collided in zip(group_beginnings.tolist(), group_sizes.tolist(), has_collision.tolist()):
+        starts = window_starts[beginning:beginning + size].tolist()
+        if collided: yield from split_colliding_windows(tokens, starts, length)
+        else: yield RepeatedRun(length, length, starts)
+
+def find_repeated_runs_with_rolling_hashes(tokens, maximum_length: int):
+    '''Finds every run of at most the maximum length that occurs more than once in the tokens without containing a negative separator token.
+    The polynomial hashes of the windows of a length are computed from those of the previous length for all windows at once,
+    and windows with equal hashes are compared token by token so that collisions cannot merge different runs.
+    Runs of consecutive lengths occurring at the same starts are merged into one run like the suffix array gives them'''
+    tokens = numpy.asarray(tokens, dtype = numpy.int64)
+    lengths_until_separators = compute_lengths_until_separators(tokens)
+    hashed_tokens = numpy.where(tokens < 0, 0, tokens + 1).astype(numpy.uint64)
+    hashes = hashed_tokens.copy()
+    multiplier = numpy.uint64(FINGERPRINT_MULTIPLIER)
+    runs = []
+    runs_of_previous_length = {}
+    for length in range(1, maximum_length + 1):
+        if length > 1: hashes = hashes[:-1]*multiplier + hashed_tokens[length - 1:]
+        if len(hashes) == 0: break
+        runs_of_length = {}
+        for run in generate_repeated_runs_of_length(tokens, hashes, lengths_until_separators, length):
+            starts = tuple(run.starts)
+            previous_run = runs_of_previous_length.get(starts)
+            if previous_run is None: runs.append(run)
+            else:
+                previous_run.maximum_length = length
+                run = previous_run
+            runs_of_length[starts] = run
+        runs_of_previous_length = runs_of_length
+    return runs
+
+def compute_unchanged_span_limits(identifiers, insert_flags, vanishing_flags):
+    '''Computes for every position the end of the longest span of actions starting there that simplification leaves unchanged.
+    Simplification only changes a span where equal actions or inserts follow each other or an insert has no text to insert'''
+    positions = numpy.arange(len(identifiers) + 1)
+    is_merged_with_next = (identifiers[:-1] == identifiers[1:]) | (insert_flags[:-1] & insert_flags[1:])
+    merge_endings = numpy.append(numpy.flatnonzero(is_merged_with_next) + 1, len(identifiers) + 1)
+    vanishing_positions = numpy.append(numpy.flatnonzero(vanishing_flags), len(identifiers))
+    return numpy.minimum(merge_endings[numpy.searchsorted(merge_endings, positions, side = 'right')],
+                         vanishing_positions[numpy.searchsorted(vanishing_positions, positions)])
+
+def compute_unchanged_chain_sizes(entry_action_starts, entry_action_endings, unchanged_span_limits, chain_targets):
+    '''Computes how many sizes of the chain from every start simplify to the actions the chain covers, which are the sizes up to the first that does not'''
+    chains = numpy.arange(len(chain_targets))
+    last_unchanged_entries = numpy.searchsorted(entry_action_endings, unchanged_span_limits[entry_action_starts], side = 'right') - 1
+    return numpy.maximum(numpy.minimum(last_unchanged_entries - chains + 1, chain_targets - chains), 0)
+
+def compute_powers_of_multiplier(number_of_powers: int):
+    powers = numpy.full(number_of_powers, FINGERPRINT_MULTIPLIER, dtype = numpy.uint64)
+    powers[0] = 1
+    return numpy.cumprod(powers, dtype = numpy.uint64)
+
+def compute_weighted_prefix_sums(identifiers, weights):
+    weighted_prefix_sums = numpy.zeros(len(identifiers) + 1, dtype = numpy.uint64)
+    numpy.cumsum((identifiers.astype(numpy.uint64) + numpy.uint64(1))*weights, dtype = numpy.uint64, out = weighted_prefix_sums[1:])
+    return weighted_prefix_sums
+
+def compute_span_hashes(identifiers, span_starts, span_endings):
+    '''Computes polynomial hashes of the spans of actions that are equal for equal spans wherever they start.
+    Every hash comes from the prefix sums of the actions weighted by powers of the multiplier, shifted by the power that lines up its start with the end of the actions'''
+    powers = compute_powers_of_multiplier(len(identifiers) + 1)
+    weighted_prefix_sums = compute_weighted_prefix_sums(identifiers, powers[:-1])
+    return (weighted_prefix_sums[span_endings] - weighted_prefix_sums[span_starts])*powers[len(identifiers) - span_starts]
+
+def compute_sequence_hashes(sequences, length_of_hashed_actions: int):
+    '''Computes the hash compute_span_hashes gives a span of actions of the length with the identifiers of every sequence'''
+    lengths = numpy.fromiter((len(sequence) for sequence in sequences), dtype = numpy.int64, count = len(sequences))
+    identifiers = numpy.fromiter(itertools.chain.from_iterable(sequences), dtype = numpy.int64, count = int(lengths.sum()))
+    sequence_endings = numpy.cumsum(lengths)
+    sequence_starts = sequence_endings - lengths
+    positions = numpy.arange(len(identifiers)) - numpy.repeat(sequence_starts, lengths)
+    powers = compute_powers_of_multiplier(length_of_hashed_actions + int(lengths.max(initial = 0)) + 1)
+    weighted_prefix_sums = compute_weighted_prefix_sums(identifiers, powers[length_of_hashed_actions + positions])
+    return weighted_prefix_sums[sequence_endings] - weighted_prefix_sums[sequence_starts]
+
+class UnchangedChainGroups:
+    '''The chains that simplify to the actions they cover grouped by those actions, with the members of every group in the order the trie engine processes chains.
+    The actions of every entry of the record are a span of the identifiers, and the chain from every start covers the entries up to its chain target.
+    Groups whose members share a hash but not their actions are collided, so their members need to be told apart one by one.
+    A group is overlapped if one of its members overlaps the previous one, so not every member counts as a usage of its command'''
+    def __init__(self, identifiers, insert_flags, vanishing_flags, entry_action_starts, entry_action_endings, words_before_entries, chain_targets):
+        self.identifiers = numpy.frombuffer(identifiers, dtype = numpy.int64)
+        entry_action_starts = numpy.frombuffer(entry_action_starts, dtype = numpy.int64)
+        entry_action_endings = numpy.frombuffer(entry_action_endings, dtype = numpy.int64)
+        unchanged_span_limits = compute_unchanged_span_limits(self.identifiers, numpy.frombuffer(insert_flags, dtype = numpy.bool_),
+                                                              numpy.frombuffer(vanishing_flags, dtype = numpy.bool_))
+        unchanged_chain_sizes = compute_unchanged_chain_sizes(entry_action_starts, entry_action_endings, unchanged_span_limits,
+                                                              numpy.frombuffer(chain_targets, dtype = numpy.int64))
+        self.unchanged_chain_sizes = unchanged_chain_sizes.tolist()
+        number_of_members = int(unchanged_chain_sizes.sum())
+        chains = numpy.repeat(numpy.arange(len(unchanged_chain_sizes)), unchanged_chain_sizes)
+        member_beginnings = numpy.cumsum(unchanged_chain_sizes) - unchanged_chain_sizes
+        chain_ending_indices = chains + numpy.arange(number_of_members) - numpy.repeat(member_beginnings, unchanged_chain_sizes)
+        span_starts = entry_action_starts[chains]
+        span_lengths = entry_action_endings[chain_ending_indices] - span_starts
+        hashes = compute_span_hashes(self.identifiers, span_starts, span_starts + span_lengths)
+        order = numpy.lexsort((span_lengths, hashes))
+        self.member_chains = chains[order]
+        self.member_chain_ending_indices = chain_ending_indices[order]
+        words_before_entries = numpy.frombuffer(words_before_entries, dtype = numpy.int64)
+        self.member_numbers_of_words = words_before_entries[self.member_chain_ending_indices + 1] - words_before_entries[self.member_chains]
+        hashes = hashes[order]
+        span_starts = span_starts[order]
+        span_lengths = span_lengths[order]
+        is_group_beginning = numpy.ones(number_of_members, dtype = bool)
+        is_group_beginning[1:] = (hashes[1:] != hashes[:-1]) | (span_lengths[1:] != span_lengths[:-1])
+        self.group_beginnings = numpy.flatnonzero(is_group_beginning)
+        self.group_sizes = numpy.diff(numpy.append(self.group_beginnings, number_of_members))
+        self.group_hashes = hashes[self.group_beginnings]
+        self.group_span_starts = span_starts[self.group_beginnings]
+        self.group_span_lengths = span_lengths[self.group_beginnings]
+        self.collided_group_flags = self._compute_collided_group_flags(span_starts, span_lengths)
+        is_overlapping = numpy.zeros(number_of_members, dtype = bool)
+        is_overlapping[1:] = self.member_chains[1:] <= self.member_chain_ending_indices[:-1]
+        self.overlapped_group_flags = self._reduce_over_groups(numpy.logical_or, is_overlapping & ~is_group_beginning)
+
+    def _reduce_over_groups(self, operation, member_values):
+        if len(member_values) == 0: return member_values
+        return operation.reduceat(member_values, self.group_beginnings)
+
+    def _compute_collided_group_flags(self, span_starts, span_lengths):
+        '''Compares the actions of every member of a group with more than one member to those of its first member.
+        Going over the longest spans first keeps the members still being compared at every offset a prefix'''
+        members = numpy.flatnonzero(numpy.repeat(self.group_sizes > 1, self.group_sizes))
+        representative_starts = numpy.repeat(self.group_span_starts, self.group_sizes)[members]
+        order = numpy.argsort(-span_lengths[members], kind = 'stable')
+        members = members[order]
+        representative_starts = representative_starts[order]
+        negated_lengths = -span_lengths[members]
+        starts = span_starts[members]
+        is_mismatched = numpy.zeros(len(members), dtype = bool)
+        longest_length = -int(negated_lengths[0]) if len(members) > 0 else 0
+        for offset in range(longest_length):
+            number_compared = numpy.searchsorted(negated_lengths, -offset)
+            is_mismatched[:number_compared] |= self.identifiers[starts[:number_compared] + offset] != self.identifiers[representative_starts[:number_compared] + offset]
+        is_member_mismatched = numpy.zeros(len(self.member_chains), dtype = bool)
+        is_member_mismatched[members] = is_mismatched
+        return self._reduce_over_groups(numpy.logical_or, is_member_mismatched)
+
+    def get_unchanged_chain_sizes(self):
+        '''Obtains how many sizes of the chain from every start simplify to the actions the chain covers, which are the sizes up to the first that does not'''
+        return self.unchanged_chain_sizes
+
+    def get_number_of_groups(self) -> int:
+        return len(self.group_beginnings)
+
+    def get_representation(self, group: int):
+        span_start = int(self.group_span_starts[group])
+        return tuple(self.identifiers[span_start:span_start + int(self.group_span_lengths[group])].tolist())
+
+    def get_members(self, group: int):
+        '''Obtains the chain, chain ending index, and number of words of every member of the group'''
+        beginning = int(self.group_beginnings[group])
+        ending = beginning + int(self.group_sizes[group])
+        return list(zip(self.member_chains[beginning:ending].tolist(), self.member_chain_ending_indices[beginning:ending].tolist(),
+                        self.member_numbers_of_words[beginning:ending].tolist()))
+
+    def find_groups_by_status(self):
+        '''Finds the collided groups, the overlapped groups that are not collided, and the other groups with more than one member'''
+        collided_groups = numpy.flatnonzero(self.collided_group_flags)
+        overlapped_groups = numpy.flatnonzero(self.overlapped_group_flags & ~self.collided_group_flags)
+        counted_groups = numpy.flatnonzero((self.group_sizes > 1) & ~self.overlapped_group_flags & ~self.collided_group_flags)
+        return collided_groups.tolist(), overlapped_groups.tolist(), counted_groups.tolist()
+
+    def compute_statistics_of_groups(self, groups):
+        '''Computes the number of members, the total number of words, the first chain, and the chain ending indices of the first and last members of the groups.
+        Every member of a group that is not overlapped counts as a usage of its command'''
+        groups = numpy.asarray(groups, dtype = numpy.int64)
+        group_beginnings = self.group_beginnings[groups]
+        total_numbers_of_words = self._reduce_over_groups(numpy.add, self.member_numbers_of_words)[groups]
+        return zip(self.group_sizes[groups].tolist(), total_numbers_of_words.tolist(), self.member_chains[group_beginnings].tolist(),
+                   self.member_chain_ending_indices[group_beginnings].tolist(), self.member_chain_ending_indices[group_beginnings + self.group_sizes[groups] - 1].tolist())
+
+    def find_groups(self, representations):
+        '''Finds the group that is not collided covering the actions of every representation, which is None for a representation no such group covers'''
+        hashes = compute_sequence_hashes(representations, len(self.identifiers))
+        beginnings = numpy.searchsorted(self.group_hashes, hashes).tolist()
+        endings = numpy.searchsorted(self.group_hashes, hashes, side = 'right').tolist()
+        found_groups = []
+        for representation, beginning, ending in zip(representations, beginnings, endings):
+            found_group = None
+            for group in range(beginning, ending):
+                if not self.collided_group_flags[group] and self.group_span_lengths[group] == len(representation) and self.get_representation(group) == representation:
+                    found_group = group
+                    break
+            found_groups.append(found_group)
+        return found_groups
@@ -0,0 +1,91 @@
+NO_RANK = -1
+
+class BoundedSuffixArray:
+    '''The suffixes of a token sequence sorted by their first maximum_length tokens, where suffixes sharing those tokens may appear in any order.
+    Keeps the rank of every window of a power of two tokens computed by prefix doubling so that common prefixes can be measured in logarithmic time'''
+    def __init__(self, tokens, maximum_length: int):
+        self.size: int = len(tokens)
+        self.maximum_length: int = maximum_length
+        self.rank_arrays = []
+        self.suffix_array = list(range(self.size))
+        self._sort_suffixes(tokens)
+
+    def _sort_suffixes(self, tokens):
+        token_ranks = {token: rank for rank, token in enumerate(sorted(set(tokens)))}
+        ranks = [token_ranks[token] for token in tokens]
+        self.rank_arrays.append(ranks)
+        window_size = 1
+        while window_size < self.maximum_length:
+            ranks = self._compute_doubled_ranks(ranks, window_size)
+            self.rank_arrays.append(ranks)
+            window_size *= 2
+        self.suffix_array.sort(key = ranks.__getitem__)
+
+    def _compute_doubled_ranks(self, ranks, window_size: int):
+        size = self.size
+        keys = [(ranks[index], ranks[index + window_size] if index + window_size < size else NO_RANK) for index in range(size)]
+        self.suffix_array.sort(key = keys.__getitem__)
+        doubled_ranks = [0]*size
+        rank = 0
+        previous_key = None
+        for index in self.suffix_array:
+            key = keys[index]
+            if previous_key is not None and key != previous_key: rank += 1
+            doubled_ranks[index] = rank
+            previous_key = key
+        return doubled_ranks
+
+    def compute_common_prefix_length(self, first: int, second: int) -> int:
+        '''Computes the length of the common prefix of the suffixes starting at the positions up to the maximum length'''
+        if first == second: return min(self.size - first, self.maximum_length)
+        length = 0
+        for power in range(len(self.rank_arrays) - 1, -1, -1):
+            ranks = self.rank_arrays[power]
+            if first + length < self.size and second + length < self.size and ranks[first + length] == ranks[second + length]:
+                length += 1 << power
+        return min(length, self.maximum_length)
+
+    def compute_longest_common_prefix_array(self):
+        '''Computes the common prefix length of every suffix with the suffix before it in the suffix array, starting with 0 for the first suffix'''
+        suffix_array = self.suffix_array
+        return [0] + [self.compute_common_prefix_length(suffix_array[index - 1], suffix_array[index]) for index in range(1, self.size)]
+
+    def get_suffix_array(self):
+        return self.suffix_array
+
+    def get_ranks(self):
+        '''Obtains the rank of every suffix among the suffixes sorted by their first maximum_length tokens, which is the same for suffixes sharing those tokens'''
+        return self.rank_arrays[-1]
+
+class RepeatedRun:
+    '''Every run of tokens with a length from minimum_length to maximum_length starting at the first of the starts, which occurs at all of the starts and nowhere else'''
+    def __init__(self, minimum_length: int, maximum_length: int, starts):
+        self.minimum_length: int = minimum_length
+        self.maximum_length: int = maximum_length
+        self.starts = starts
+
+def generate_repeated_runs(suffix_array, longest_common_prefixes):
+    '''Yields the repeated runs from the intervals of the suffix array sharing a common prefix, going bottom up through the tree those intervals form'''
+    #every element holds the common prefix length of an interval and the suffix array index where it starts
+    stack = [(0, 0)]
+    for index in range(1, len(suffix_array) + 1):
+        common_prefix_length = longest_common_prefixes[index] if index < len(suffix_array) else 0
+        left = index - 1
+        while common_prefix_length < stack[-1][0]:
+            interval_length, left = stack.pop()
+            parent_length = max(common_prefix_length, stack[-1][0])
+            yield RepeatedRun(parent_length + 1, interval_length, suffix_array[left:index])
+        if common_prefix_length > stack[-1][0]: stack.append((common_prefix_length, left))
+
+def find_repeated_runs(tokens, maximum_length: int):
+    '''Finds every run of at most the maximum length that occurs more than once in the tokens'''
+    suffix_array = BoundedSuffixArray(tokens, maximum_length)
+    return list(generate_repeated_runs(suffix_array.get_suffix_array(), suffix_array.compute_longest_common_prefix_array()))
+
+def compute_longest_repeated_lengths(runs, size: int):
+    '''Computes for every position of the tokens the length of the longest of the runs starting there, which is 0 where none of them starts'''
+    lengths = [0]*size
+    for run in runs:
+        for start in run.starts:
+            if run.maximum_length > lengths[start]: lengths[start] = run.maximum_length
+    return lengths
@@ -1,7 +1,28 @@
 import unittest
+import sys
+import os
+import tempfile
+import pickle
+import json
+import itertools
+from unittest import mock
 from action_records import *
 from basic_action_record_analysis import *
 from text_separation import *
+from binary_records import *
+from record_cache import *
+from analysis_checkpoints import *
+from input_parsing import *
+from suffix_array_mining import *
+from rolling_hash_mining import *
+from analysis_instrumentation import *
+from memory_profiling import *
+from progress_reporting import *
+from candidate_statistics import *
+import io
+import rolling_hash_mining
+import candidate_statistics
+import basic_action_record_analysis
 
 class TestPotentialCommandInformation(unittest.TestCase):
     def test_potential_command_information_for_press_a_has_one_action(self):
@@ -114,6 +135,34 @@ class TestCommandSimplification(unittest.TestCase):
     def assert_command_chains_match(self, actual, expected):
         assert_command_chains_match(self, actual, expected)
     
+class TestSimplifiedCommandChainBuilder(unittest.TestCase):
+    def test_merges_inserts_across_commands(self):
+        commands = [Command('say this', [generate_insert_action('this')]), Command('say is', [generate_insert_action('is')])]
+        self.assert_builder_matches_complete_simplification(commands)
+    
+    def test_counts_repetitions_across_commands(self):
+        commands = [generate_key_pressing_command('air', 'a'), generate_multiple_key_pressing_command('air air', ['a', 'a']), generate_rain_as_down_command()]
+        self.assert_builder_matches_complete_simplification(commands)
+    
+    def test_handles_repetition_before_insert(self):
+        commands = [generate_multiple_key_pressing_command('air twice', ['a', 'a']), Command('say test', [generate_insert_action('te'), generate_insert_action('st')]), generate_press_a_command()]
+        self.assert_builder_matches_complete_simplification(commands)
+    
+    def test_counts_words_of_every_command(self):
+        builder = SimplifiedCommandChainBuilder(0)
+        builder.append_command(generate_copy_all_command())
+        builder.append_command(generate_press_a_command())
+        self.assertEqual(builder.compute_command_chain().get_number_of_words(), 3)
+    
+    def assert_builder_matches_complete_simplification(self, commands):
+        builder = SimplifiedCommandChainBuilder(0)
+        command_chain = CommandChain(None, [], 0)
+        for command in commands:
+            builder.append_command(command)
+            command_chain.append_command(command)
+            expected = compute_repeat_simplified_command_chain(compute_insert_simplified_command_chain(command_chain))
+            assert_command_chains_match(self, builder.compute_command_chain(), expected)
+
 class TestGeneratingCommandSetFromRecord(unittest.TestCase):
     def test_can_handle_simple_record(self):
         record = generate_simple_command_record()
@@ -147,6 +196,341 @@ class TestGeneratingCommandSetFromRecord(unittest.TestCase):
     def _assert_command_set_matches_expected_potential_command_information(self, command_set, expected_command_information):
         self.assertTrue(command_set_matches_expected_potential_command_information(command_set, expected_command_information))
 
+class TestParallelMining(unittest.TestCase):
+    def test_shards_only_start_at_chain_barriers(self):
+        record = generate_simple_command_record() + [RecordingStart()] + generate_simple_command_record() + generate_command_record_with_many_seconds_before_middle_command()
+        boundaries = compute_record_shard_boundaries(record, 8)
+        self.assertEqual(boundaries, [0, 3, 8, len(record)])
+    
+    def test_merging_adds_usage_and_keeps_later_chain(self):
+        earlier = generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air', 'press air'])
+        later = generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air'])
+        earlier.merge(later, 10)
+        self.assertEqual(earlier.get_number_of_times_used(), 3)
+        self.assertEqual(earlier.total_number_of_words_dictated, 4)
+        self.assertFalse(earlier.should_process_usage(9))
+        self.assertTrue(earlier.should_process_usage(10))
+    
+    def test_merging_combines_instantiations(self):
+        abstract_chain = make_abstract_repeat_representation_for(CommandChain('air twice', [generate_press_a_action(), BasicAction('repeat', [1])], 0, 1))
+        earlier = PotentialAbstractCommandInformation(abstract_chain.get_actions())
+        later = PotentialAbstractCommandInformation(abstract_chain.get_actions())
+        earlier.process_usage(abstract_chain, CommandChain('air twice', [generate_press_a_action(), BasicAction('repeat', [1])]))
+        later.process_usage(abstract_chain, CommandChain('air thrice', [generate_press_a_action(), BasicAction('repeat', [2])]))
+        earlier.merge(later, 5)
+        self.assertEqual(earlier.get_number_of_instantiations(), 2)
+    
+    def test_parallel_mining_matches_serial_mining(self):
+        record = (generate_simple_command_record() + [RecordingStart()])*3 + generate_command_record_with_many_seconds_before_middle_command()*2
+        serial = compute_recommendations_from_record(record, 5, filter = return_true)
+        parallel = compute_recommendations_from_record(record, 5, filter = return_true, number_of_workers = 2)
+        self.assertEqual([str(command) for command in parallel], [str(command) for command in serial])
+
+class TestStreamingRecord(unittest.TestCase):
+    def test_streamed_record_matches_read_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            streamed = list(stream_file_record(path))
+            read = read_file_record(path)
+        self.assertEqual(len(streamed), 5)
+        self.assertEqual([describe_record_entry(entry) for entry in streamed], [describe_record_entry(entry) for entry in read])
+    
+    def test_streamed_record_yields_entries_before_reaching_the_end(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            entries = stream_file_record(path)
+            self.assertIsInstance(next(entries), RecordingStart)
+            first_command = next(entries)
+            entries.close()
+        self.assertEqual(first_command.get_name(), 'rain')
+    
+    def test_record_window_exposes_entries_by_record_index(self):
+        window = RecordWindow(2)
+        for entry in generate_simple_command_record(): window.append(entry)
+        self.assertEqual(window.get_starting_index(), 1)
+        self.assertEqual(len(window), 3)
+        self.assertEqual(window[2].get_name(), 'air')
+    
+    def test_streamed_mining_matches_list_mining(self):
+        record = (generate_simple_command_record() + [RecordingStart()])*3 + generate_command_record_with_many_seconds_before_middle_command()*2
+        expected = compute_recommendations_from_record(record, 4, filter = return_true)
+        actual = compute_recommendations_from_record(iter(record), 4, filter = return_true)
+        self.assertEqual([str(command) for command in actual], [str(command) for command in expected])
+
+class TestActionDecodeCache(unittest.TestCase):
+    def test_identical_lines_share_instance(self):
+        cache = ActionDecodeCache(ActionVocabulary())
+        line = generate_press_a_action().to_json()
+        self.assertIs(cache.decode(line), cache.decode(line))
+        self.assertEqual(cache.get_number_of_hits(), 1)
+        self.assertEqual(cache.get_number_of_misses(), 1)
+    
+    def test_differently_formatted_lines_share_vocabulary_instance(self):
+        cache = ActionDecodeCache(ActionVocabulary())
+        self.assertIs(cache.decode('{"name": "key", "arguments": ["a"]}'), cache.decode('{"name":"key","arguments":["a"]}'))
+    
+    def test_size_is_bounded(self):
+        cache = ActionDecodeCache(ActionVocabulary(), 2)
+        for keystroke in ['a', 'b', 'c']: cache.decode(generate_key_press_action(keystroke).to_json())
+        self.assertEqual(cache.get_size(), 2)
+    
+    def test_parser_reuses_decoded_actions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.txt')
+            write_lines_to_file(path, ['Command: air', '{"name": "key", "arguments": ["a"]}']*3)
+            parser = RecordParser(path)
+            record = parser.get_record()
+        self.assertEqual(parser.get_action_decode_cache().get_number_of_hits(), 2)
+        self.assertIs(record[0].get_actions()[0], record[2].get_actions()[0])
+
+class TestBinaryRecord(unittest.TestCase):
+    def test_binary_record_matches_text_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = write_test_record_file(directory)
+            binary_path = os.path.join(directory, 'record.barb')
+            convert_record_file_to_binary(text_path, binary_path)
+            binary_record = read_binary_record(binary_path)
+            text_record = read_file_record(text_path)
+        self.assertEqual([describe_record_entry(entry) for entry in binary_record], [describe_record_entry(entry) for entry in text_record])
+    
+    def test_sections_moved_to_temporary_files_are_written_intact(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = write_test_record_file(directory)
+            binary_path = os.path.join(directory, 'record.barb')
+            writer = BinaryRecordWriter(section_memory_limit_in_bytes = 1)
+            for entry in stream_file_record(text_path): writer.add_entry(entry)
+            writer.write(binary_path)
+            binary_record = read_binary_record(binary_path)
+            text_record = read_file_record(text_path)
+        self.assertEqual([describe_record_entry(entry) for entry in binary_record], [describe_record_entry(entry) for entry in text_record])
+    
+    def test_preserves_time_information(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.barb')
+            write_binary_record(path, generate_command_record_with_many_seconds_before_middle_command())
+            with BinaryRecord(path) as record:
+                self.assertEqual(len(record), 3)
+                self.assertFalse(record[0].is_time_information_available())
+                self.assertEqual(record[1].get_seconds_since_action(), 90000000000)
+                self.assertEqual(record[-1].get_actions(), generate_press_a_action_list())
+    
+    def test_shares_decoded_actions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.barb')
+            write_binary_record(path, [generate_press_a_command(), generate_press_a_command()])
+            with BinaryRecord(path) as record:
+                self.assertIs(record[0].get_actions()[0], record[1].get_actions()[0])
+    
+    def test_detects_format(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text_path = write_test_record_file(directory)
+            binary_path = os.path.join(directory, 'record.barb')
+            convert_record_file_to_binary(text_path, binary_path)
+            self.assertTrue(is_binary_record_file(binary_path))
+            self.assertFalse(is_binary_record_file(text_path))
+
+class TestRecordCache(unittest.TestCase):
+    def test_cached_record_is_used_without_parsing(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            expected = obtain_file_record(directory, path)
+            with mock.patch.object(basic_action_record_analysis, 'read_record_in_detected_format', side_effect = AssertionError('record parsed')):
+                actual = obtain_file_record(directory, path)
+                streamed = list(stream_file_record_without_stuff_to_ignore(directory, path))
+        self.assertEqual([describe_record_entry(entry) for entry in actual], [describe_record_entry(entry) for entry in expected])
+        self.assertEqual([describe_record_entry(entry) for entry in streamed], [describe_record_entry(entry) for entry in expected])
+    
+    def test_streaming_stores_record_once_consumed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            cache = RecordCache(directory)
+            key = compute_record_cache_key(path, compute_commands_to_ignore_path(directory))
+            list(stream_file_record_without_stuff_to_ignore(directory, path))
+            self.assertIsNotNone(cache.find_entry(key))
+    
+    def test_changing_commands_to_ignore_changes_key(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            ignore_path = compute_commands_to_ignore_path(directory)
+            original_key = compute_record_cache_key(path, ignore_path)
+            with open(ignore_path, 'w') as file: file.write(generate_press_a_action().to_json() + '\n')
+            self.assertNotEqual(compute_record_cache_key(path, ignore_path), original_key)
+    
+    def test_refreshing_removes_cached_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            obtain_file_record(directory, path)
+            with mock.patch.object(basic_action_record_analysis, 'read_record_in_detected_format', wraps = read_record_in_detected_format) as reader:
+                obtain_file_record(directory, path, refresh_cache = True)
+            self.assertEqual(reader.call_count, 1)
+    
+    def test_evicts_least_recently_used_records_over_maximum_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RecordCache(directory, 0)
+            cache.store('old', generate_simple_command_record())
+            cache.store('new', generate_simple_command_record())
+            self.assertIsNone(cache.find_entry('old'))
+            self.assertIsNotNone(cache.find_entry('new'))
+
+    def test_eviction_skips_records_removed_by_another_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RecordCache(directory, 0)
+            cache.store('old', generate_simple_command_record())
+            old_path = cache.compute_entry_path('old')
+            with mock.patch('record_cache.os.remove', side_effect = FileNotFoundError(old_path)):
+                evict_files_over_maximum_size([os.path.join(directory, 'removed.barb'), old_path], 0)
+            cache.store('new', generate_simple_command_record())
+            self.assertIsNone(cache.find_entry('old'))
+            self.assertIsNotNone(cache.find_entry('new'))
+    
+    def test_storing_leaves_no_temporary_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = RecordCache(directory)
+            cache.store('key', generate_simple_command_record())
+            with mock.patch.object(BinaryRecordWriter, 'write', side_effect = OSError('disk full')):
+                with self.assertRaises(OSError): cache.store('other key', generate_simple_command_record())
+            self.assertEqual(os.listdir(cache.directory), [os.path.basename(cache.compute_entry_path('key'))])
+    
+    def test_record_evicted_after_being_found_is_parsed_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            expected = obtain_file_record(directory, path)
+            with mock.patch.object(basic_action_record_analysis, 'read_binary_record', side_effect = FileNotFoundError(path)):
+                actual = obtain_file_record(directory, path)
+        self.assertEqual([describe_record_entry(entry) for entry in actual], [describe_record_entry(entry) for entry in expected])
+
+class TestResumingAnalysis(unittest.TestCase):
+    def test_resumed_analysis_matches_full_analysis(self):
+        first_part = ['Command: rain', '{"name": "key", "arguments": ["down"]}', 'Command: air', '{"name": "key", "arguments": ["a"]}']
+        second_part = ['{"name": "key", "arguments": ["b"]}', 'T2', 'Command: rain', '{"name": "key", "arguments": ["down"]}', 'Command: air',
+                       '{"name": "key", "arguments": ["a"]}', '{"name": "key", "arguments": ["b"]}', 'START', 'Command: air', '{"name": "key", "arguments": ["a"]}']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.txt')
+            write_lines_to_file(path, first_part + second_part)
+            expected = create_command_information_set_from_record(read_file_record(path), 5)
+            write_lines_to_file(path, first_part)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            write_lines_to_file(path, first_part + second_part)
+            checkpoint = load_checkpoint(compute_checkpoint_path(directory, path))
+            self.assertTrue(checkpoint.can_resume(path, 5, compute_file_digest(compute_commands_to_ignore_path(directory))))
+            actual = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+        self.assertEqual(str(actual), str(expected))
+    
+    def test_resuming_after_checkpoint_of_partially_written_line_matches_full_analysis(self):
+        first_part = 'Command: rain\n{"name": "key", "arguments": ["down"]}\nCommand: go'
+        second_part = ' line more words\n{"name": "key", "arguments": ["a"]}\nCommand: rain\n{"name": "key", "arguments": ["down"]}\n' + \
+                      'Command: go line more words\n{"name": "key", "arguments": ["a"]}\nCommand: rain\n{"name": "key", "arguments": ["down"]}\n'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.txt')
+            with open(path, 'w') as file: file.write(first_part + second_part)
+            expected = create_command_information_set_from_record(read_file_record(path), 5)
+            with open(path, 'w') as file: file.write(first_part)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            with open(path, 'a') as file: file.write(second_part)
+            actual = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+        self.assertEqual(str(actual), str(expected))
+    
+    def test_record_ending_in_partially_written_action_line_ignores_that_line(self):
+        complete_part = 'Command: rain\n{"name": "key", "arguments": ["down"]}\nCommand: air\n{"name": "key", "arguments": ["a"]}\n'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.txt')
+            with open(path, 'w') as file: file.write(complete_part)
+            expected = create_command_information_set_from_record(read_file_record(path), 5)
+            with open(path, 'w') as file: file.write(complete_part + '{"name": "key", "argu')
+            actual = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            with open(path, 'a') as file: file.write('ments": ["b"]}\n')
+            resumed = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            with open(path, 'w') as file: file.write(complete_part + '{"name": "key", "arguments": ["b"]}\n')
+            expected_after_line_is_finished = create_command_information_set_from_record(read_file_record(path), 5)
+        self.assertEqual(str(actual), str(expected))
+        self.assertEqual(str(resumed), str(expected_after_line_is_finished))
+    
+    def test_record_ending_in_partially_written_time_line_waits_for_that_line(self):
+        complete_part = 'Command: rain\n{"name": "key", "arguments": ["down"]}\nCommand: air\n{"name": "key", "arguments": ["a"]}\n'
+        remaining_part = '0\nCommand: rain\n{"name": "key", "arguments": ["down"]}\nCommand: air\n{"name": "key", "arguments": ["a"]}\n'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'record.txt')
+            with open(path, 'w') as file: file.write(complete_part + 'T4' + remaining_part)
+            expected = create_command_information_set_from_record(read_file_record(path), 5)
+            self.assertEqual(read_file_record(path)[2].get_seconds_since_action(), 40)
+            with open(path, 'w') as file: file.write(complete_part)
+            expected_before_line_is_finished = create_command_information_set_from_record(read_file_record(path), 5)
+            with open(path, 'a') as file: file.write('T')
+            self.assertEqual(str(create_command_information_set_from_record(read_file_record(path), 5)), str(expected_before_line_is_finished))
+            actual_before_line_is_finished = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            with open(path, 'a') as file: file.write('4')
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            parser = RecordParser(path)
+            list(parser.generate_entries(include_unfinished_command = False))
+            with open(path, 'a') as file: file.write(remaining_part)
+            resumed_entries = list(RecordParser(path, resume_point = parser.get_resume_point()).generate_entries())
+            self.assertEqual([entry.get_seconds_since_action() for entry in resumed_entries if entry.is_time_information_available()], [40])
+            actual = create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+        self.assertEqual(str(actual_before_line_is_finished), str(expected_before_line_is_finished))
+        self.assertEqual(str(actual), str(expected))
+    
+    def test_cannot_resume_after_record_is_rewritten(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            write_lines_to_file(path, ['Command: air', '{"name": "key", "arguments": ["a"]}']*10)
+            checkpoint = load_checkpoint(compute_checkpoint_path(directory, path))
+            self.assertFalse(checkpoint.can_resume(path, 5, compute_file_digest(compute_commands_to_ignore_path(directory))))
+    
+    def test_cannot_resume_with_different_max_chain_length(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            checkpoint = load_checkpoint(compute_checkpoint_path(directory, path))
+            self.assertFalse(checkpoint.can_resume(path, 6, compute_file_digest(compute_commands_to_ignore_path(directory))))
+
+    def test_repeated_analysis_keeps_one_checkpoint_per_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            checkpoint_directory = os.path.dirname(compute_checkpoint_path(directory, path))
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            size_after_first_analysis = compute_checkpoint_directory_size_in_bytes(checkpoint_directory)
+            for _ in range(3): create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            self.assertEqual(os.listdir(checkpoint_directory), [os.path.basename(compute_checkpoint_path(directory, path))])
+            self.assertEqual(compute_checkpoint_directory_size_in_bytes(checkpoint_directory), size_after_first_analysis)
+
+    def test_saving_checkpoint_evicts_least_recently_saved_checkpoints_over_maximum_size(self):
+        with tempfile.TemporaryDirectory() as directory:
+            old_path = write_test_record_file(directory)
+            new_path = os.path.join(directory, 'new_record.txt')
+            create_command_information_set_from_record_file_with_checkpoint(directory, old_path, 5)
+            old_checkpoint_path = compute_checkpoint_path(directory, old_path)
+            new_checkpoint_path = compute_checkpoint_path(directory, new_path)
+            save_checkpoint(new_checkpoint_path, load_checkpoint(old_checkpoint_path), os.path.getsize(old_checkpoint_path))
+            self.assertFalse(os.path.exists(old_checkpoint_path))
+            self.assertTrue(os.path.exists(new_checkpoint_path))
+
+    def test_saving_checkpoint_replaces_it_without_leaving_temporary_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            checkpoint_path = compute_checkpoint_path(directory, path)
+            save_checkpoint(checkpoint_path, load_checkpoint(checkpoint_path))
+            self.assertEqual(os.listdir(os.path.dirname(checkpoint_path)), [os.path.basename(checkpoint_path)])
+            self.assertIsNotNone(load_checkpoint(checkpoint_path))
+    
+    def test_saving_checkpoint_larger_than_maximum_size_removes_it(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            create_command_information_set_from_record_file_with_checkpoint(directory, path, 5)
+            checkpoint_path = compute_checkpoint_path(directory, path)
+            save_checkpoint(checkpoint_path, load_checkpoint(checkpoint_path), os.path.getsize(checkpoint_path) - 1)
+            self.assertFalse(os.path.exists(checkpoint_path))
+            self.assertEqual(compute_checkpoint_directory_size_in_bytes(os.path.dirname(checkpoint_path)), 0)
+    
+    def test_analysis_only_resumes_when_requested(self):
+        with tempfile.TemporaryDirectory() as directory:
+            parameters = InputParameters()
+            parameters.input_path = write_test_record_file(directory)
+            self.assertFalse(should_resume_analysis(parameters))
+            parameters.resume_analysis = True
+            self.assertTrue(should_resume_analysis(parameters))
+
 class TestFindingProseInText(unittest.TestCase):
     def test_can_handle_identical_text(self):
         text = 'a'
@@ -295,6 +679,32 @@ class TestFindingProseInText(unittest.TestCase):
         actual: str = analyzer.compute_text_after_prose()
         self.assertEqual(actual, expected)
 
+class TestTextSeparation(unittest.TestCase):
+    def test_handles_trailing_separator(self):
+        self.assert_separation_matches('this_is!', ('this', 'is', ''), ('_', '!'), '')
+    
+    def test_handles_text_without_separated_parts(self):
+        self.assert_separation_matches('!!', ('',), (), '!!')
+    
+    def test_handles_empty_text(self):
+        self.assert_separation_matches('', ('',), (), '')
+    
+    def test_treats_numeric_characters_as_separators(self):
+        self.assert_separation_matches('a\u00bdb2c', ('a', 'b', 'c'), ('\u00bd', '2'), '')
+    
+    def test_handles_custom_character_filter(self):
+        separation = TextSeparation('_a1 b', lambda character: character.isalnum())
+        self.assertEqual((separation.get_separated_parts(), separation.get_separators(), separation.get_prefix()), (('a1', 'b'), (' ',), '_'))
+    
+    def test_analyzers_of_same_text_share_separation(self):
+        self.assertIs(TextSeparationAnalyzer('this_is_a_test').text_separation, TextSeparationAnalyzer('this_is_a_test').text_separation)
+    
+    def assert_separation_matches(self, text, separated_parts, separators, prefix):
+        separation = TextSeparation(text, is_character_alpha)
+        self.assertEqual(separation.get_separated_parts(), separated_parts)
+        self.assertEqual(separation.get_separators(), separators)
+        self.assertEqual(separation.get_prefix(), prefix)
+
 class TestConsistentProseSeparatorDetection(unittest.TestCase):
     def test_handles_single_word_prose(self):
         self.assert_text_with_prose_gives_the_result('this_is_a_test', 'is', True)
@@ -548,6 +958,28 @@ class TestFindProseMatchesForCommandGivenInsert(unittest.TestCase):
         self.assertEqual(actual_text_before, expected_text_before)
         self.assertEqual(actual_text_after, expected_text_after)
 
+class TestProseWindowMatcher(unittest.TestCase):
+    def test_finds_windows_matching_separate_searches(self):
+        words = 'say this is A test'.split(' ')
+        matcher = ProseWindowMatcher('this_is_a test')
+        for starting_index, prose_size, analyzer in matcher.find_prose_windows(words, TEST_MAX_PROSE_SIZE_TO_CONSIDER):
+            expected = TextSeparationAnalyzer('this_is_a test')
+            expected.search_for_prose_in_separated_part(' '.join(words[starting_index:starting_index + prose_size]))
+            self.assertEqual(analyzer.compute_text_before_prose(), expected.compute_text_before_prose())
+            self.assertEqual(analyzer.compute_text_after_prose(), expected.compute_text_after_prose())
+            self.assertEqual(analyzer.compute_prose_portion_of_text(), expected.compute_prose_portion_of_text())
+    
+    def test_windows_stop_at_inconsistent_separator(self):
+        windows = ProseWindowMatcher('this_is a').find_prose_windows(['this', 'is', 'a'], TEST_MAX_PROSE_SIZE_TO_CONSIDER)
+        self.assertEqual([(starting_index, prose_size) for starting_index, prose_size, _ in windows], [(0, 1), (0, 2), (1, 1), (1, 2), (2, 1)])
+    
+    def test_finds_prose_inside_single_part(self):
+        windows = ProseWindowMatcher('hellothere').find_prose_windows(['hello', 'there'], TEST_MAX_PROSE_SIZE_TO_CONSIDER)
+        self.assertEqual([(starting_index, prose_size) for starting_index, prose_size, _ in windows], [(0, 1), (0, 2), (1, 1)])
+    
+    def test_dictation_without_shared_words_gives_no_windows(self):
+        self.assertEqual(ProseWindowMatcher('this is a test').find_prose_windows(['chicken'], TEST_MAX_PROSE_SIZE_TO_CONSIDER), [])
+
 class TestMakeAbstractProseRepresentationsForCommandGivenInserts(unittest.TestCase):
     def test_handles_no_inserts(self):
         no_insert_command_chain = generate_no_insert_command_chain()
@@ -600,6 +1032,682 @@ class MakeAbstractProseRepresentationsForCommand(unittest.TestCase):
         expected_commands = generate_two_inserts_command_chain_abstract_prose_representations()
         for index, expected in enumerate(expected_commands): assert_command_chains_match(self, actual[index], expected)
 
+class TestCandidateTrie(unittest.TestCase):
+    def test_candidates_sharing_a_prefix_share_its_node(self):
+        trie = CandidateTrie()
+        prefix_node = trie.compute_node((1, 2))
+        self.assertIs(trie.compute_node((1, 2, 3)), prefix_node.find_child(3))
+    
+    def test_node_can_be_extended_from_previous_node(self):
+        trie = CandidateTrie()
+        prefix_node = trie.compute_node((1, 2))
+        self.assertIs(trie.compute_node((3,), prefix_node), trie.find_node((1, 2, 3)))
+    
+    def test_find_node_does_not_create_nodes(self):
+        trie = CandidateTrie()
+        trie.compute_node((1,))
+        self.assertIsNone(trie.find_node((1, 2)))
+        self.assertIsNone(trie.find_node((2,)))
+    
+    def test_command_set_only_contains_commands_that_were_used(self):
+        command_set = CommandInformationSet()
+        command_set.process_command_usage(generate_copy_all_command_chain(0, 1))
+        self.assertTrue(command_set.contains_command(generate_copy_all_command()))
+        self.assertFalse(command_set.contains_command(Command('copy', generate_copy_all_action_list()[:1])))
+
+class TestImmutableActions(unittest.TestCase):
+    def test_action_cannot_be_modified(self):
+        action = generate_press_a_action()
+        with self.assertRaises(AttributeError): action.name = 'insert'
+    
+    def test_arguments_are_stored_as_tuple(self):
+        self.assertEqual(generate_press_a_action().get_arguments(), ('a',))
+    
+    def test_equal_actions_can_be_used_as_the_same_key(self):
+        counts = {generate_press_a_action(): 1}
+        self.assertIn(generate_press_a_action(), counts)
+        self.assertNotIn(generate_key_press_action('b'), counts)
+    
+    def test_serialization_matches_argument_list_form(self):
+        self.assertEqual(generate_press_a_action().to_json(), '{"name": "key", "arguments": ["a"]}')
+        action = generate_insert_action("it's")
+        self.assertIs(action.compute_talon_script(), action.compute_talon_script())
+        self.assertEqual(action.compute_talon_script(), "insert('it\\'s')")
+    
+    def test_capture_arguments_are_hashable_and_comparable_to_other_arguments(self):
+        capture_action = BasicAction('repeat', [TalonCapture('number_small', 1, ' - 1')])
+        self.assertEqual(hash(capture_action), hash(BasicAction('repeat', [TalonCapture('number_small', 1, ' - 1')])))
+        self.assertNotEqual(capture_action, BasicAction('repeat', [1]))
+    
+    def test_actions_survive_pickling(self):
+        action = BasicAction('repeat', [TalonCapture('number_small', 1, ' - 1')])
+        self.assertEqual(pickle.loads(pickle.dumps(action)), action)
+
+class TestActionVocabulary(unittest.TestCase):
+    def test_identical_actions_share_identifier(self):
+        vocabulary = ActionVocabulary()
+        self.assertEqual(vocabulary.compute_identifier(generate_press_a_action()), vocabulary.compute_identifier(generate_press_a_action()))
+        self.assertEqual(vocabulary.get_size(), 1)
+    
+    def test_different_actions_have_different_identifiers(self):
+        vocabulary = ActionVocabulary()
+        identifiers = vocabulary.compute_identifiers(generate_copy_all_action_list() + [generate_insert_action('ctrl-a')])
+        self.assertEqual(len(set(identifiers)), 3)
+    
+    def test_distinguishes_boolean_from_integer_arguments(self):
+        vocabulary = ActionVocabulary()
+        self.assertNotEqual(vocabulary.compute_identifier(BasicAction('mouse_click', [1])), vocabulary.compute_identifier(BasicAction('mouse_click', [True])))
+    
+    def test_interning_returns_first_instance(self):
+        vocabulary = ActionVocabulary()
+        original = generate_press_a_action()
+        vocabulary.intern(original)
+        self.assertIs(vocabulary.intern(generate_press_a_action()), original)
+    
+    def test_action_sequence_set_finds_sequence_with_equal_actions(self):
+        sequence_set = ActionSequenceSet()
+        sequence_set.insert(generate_copy_all_action_list())
+        self.assertTrue(sequence_set.contains(generate_copy_all_action_list()))
+        self.assertFalse(sequence_set.contains(generate_copy_all_action_list()[:1]))
+
+class TestChainPipelineCache(unittest.TestCase):
+    def test_recurring_chains_hit_the_cache(self):
+        command_set = create_command_information_set_from_record(generate_recurring_insert_command_record(), 2)
+        cache = command_set.get_chain_pipeline_cache()
+        self.assertEqual(cache.get_number_of_lookups(), 7)
+        self.assertEqual(cache.get_number_of_hits(), 3)
+    
+    def test_caching_does_not_change_mined_commands(self):
+        record = generate_recurring_insert_command_record()
+        cached = create_serial_command_information_set_from_record(record, 3)
+        uncached = CommandInformationSet(chain_pipeline_cache_size = 0)
+        for chain in range(len(record)): uncached.process_chain_usage(record, chain, 3)
+        self.assertEqual(uncached.get_chain_pipeline_cache().get_number_of_hits(), 0)
+        self.assertEqual(describe_command_set(cached), describe_command_set(uncached))
+    
+    def test_cache_size_reaches_every_mining_path(self):
+        record = generate_record_with_recurring_prose()*3
+        for options in ({}, {'number_of_workers': 2}, {'time_budget_in_seconds': 1000}):
+            uncached = create_command_information_set_from_record(record, 3, chain_pipeline_cache_size = 0, **options)
+            cached = create_command_information_set_from_record(record, 3, **options)
+            self.assertEqual(uncached.get_chain_pipeline_cache().get_number_of_hits(), 0)
+            self.assertGreater(cached.get_chain_pipeline_cache().get_number_of_hits(), 0)
+        streamed = create_command_information_set_from_record(iter(record), 3, chain_pipeline_cache_size = 0)
+        self.assertEqual(streamed.get_chain_pipeline_cache().get_number_of_hits(), 0)
+    
+    def test_shrinking_the_cache_evicts_least_recently_used_chains(self):
+        cache = ChainPipelineCache(3)
+        for key in ['first', 'second', 'third']: cache.store(key, ChainAbstraction([], None))
+        cache.set_maximum_size(1)
+        self.assertEqual(list(cache.entries), ['third'])
+    
+    def test_evicts_least_recently_used_chain(self):
+        cache = ChainPipelineCache(2)
+        for key in ['first', 'second']: cache.store(key, ChainAbstraction([], None))
+        cache.find('first')
+        cache.store('third', ChainAbstraction([], None))
+        self.assertIsNone(cache.find('second'))
+        self.assertIsNotNone(cache.find('first'))
+        self.assertEqual(cache.get_size(), 2)
+    
+    def test_statistics_survive_pickling_without_entries(self):
+        command_set = create_command_information_set_from_record(generate_recurring_insert_command_record(), 2)
+        cache = pickle.loads(pickle.dumps(command_set)).get_chain_pipeline_cache()
+        self.assertEqual((cache.get_number_of_hits(), cache.get_number_of_misses(), cache.get_size()), (3, 4, 0))
+
+class TestBasicCommandFilter(unittest.TestCase):
+    def test_keeps_candidates_worth_recommending(self):
+        self.assertEqual([basic_command_filter(candidate) for candidate in generate_candidates_for_filtering()], [False, True, True, False, True])
+    
+    def test_candidates_keep_statistics_in_columns_of_command_set(self):
+        command_set = CommandInformationSet()
+        for candidate in generate_candidates_for_filtering(): command_set.insert_command(candidate, command_set.compute_representation(candidate))
+        statistics = command_set.candidate_statistics
+        self.assertEqual(list(statistics.numbers_of_times_used), [command.get_number_of_times_used() for command in command_set.commands])
+        self.assertEqual(list(statistics.numbers_of_instantiations), [-1, -1, -1, 2, -1])
+    
+    @unittest.skipIf(candidate_statistics.numpy is None, 'numpy is not installed')
+    def test_filtering_over_columns_keeps_same_candidates(self):
+        command_set = CommandInformationSet()
+        for candidate in generate_candidates_for_filtering(): command_set.insert_command(candidate, command_set.compute_representation(candidate))
+        self.assertEqual(list(compute_rows_meeting_basic_command_filter(command_set.candidate_statistics)), [1, 2, 4])
+    
+    @unittest.skipIf(candidate_statistics.numpy is None, 'numpy is not installed')
+    def test_ranking_over_columns_matches_ranking_candidates(self):
+        command_set = create_command_information_set_from_record(generate_recurring_insert_command_record()*3 + generate_simple_command_record()*4, 5)
+        expected = compute_recommendations_from_command_set(command_set, lambda command: basic_command_filter(command))
+        actual = compute_recommendations_from_command_set(command_set)
+        self.assertGreater(len(expected), 1)
+        self.assertEqual([str(command) for command in actual], [str(command) for command in expected])
+
+class TestInstantiationFingerprintSet(unittest.TestCase):
+    def test_fingerprints_do_not_depend_on_vocabulary(self):
+        first_vocabulary, second_vocabulary = ActionVocabulary(), ActionVocabulary()
+        second_vocabulary.compute_identifier(generate_insert_action('other'))
+        actions = generate_copy_all_action_list()
+        self.assertEqual(first_vocabulary.compute_sequence_fingerprint(first_vocabulary.compute_identifiers(actions)), second_vocabulary.compute_sequence_fingerprint(second_vocabulary.compute_identifiers(actions)))
+        self.assertNotEqual(first_vocabulary.compute_sequence_fingerprint(first_vocabulary.compute_identifiers(actions)), first_vocabulary.compute_sequence_fingerprint(first_vocabulary.compute_identifiers(actions[::-1])))
+    
+    def test_counts_distinct_instantiations(self):
+        instantiations = InstantiationFingerprintSet()
+        for actions in [generate_press_a_action_list(), generate_copy_all_action_list(), generate_press_a_action_list()]: instantiations.insert(actions)
+        self.assertEqual(instantiations.get_size(), 2)
+        self.assertFalse(instantiations.is_count_capped())
+    
+    def test_count_stops_at_maximum_exact_count(self):
+        instantiations = InstantiationFingerprintSet(maximum_exact_count = 3)
+        for number in range(5): instantiations.insert([BasicAction('repeat', [number])])
+        other = InstantiationFingerprintSet(maximum_exact_count = 3)
+        other.insert([BasicAction('repeat', [10])])
+        instantiations.merge(other)
+        self.assertEqual(instantiations.get_size(), 3)
+        self.assertTrue(instantiations.is_count_capped())
+    
+    def test_capped_count_is_described_as_lower_bound(self):
+        command = PotentialAbstractCommandInformation(generate_press_a_action_list(), maximum_exact_instantiation_count = 1)
+        command.process_usage(generate_press_a_command_chain(), generate_press_a_command_chain())
+        self.assertEqual(compute_number_of_instantiations_description(command), 'at least 1')
+
+class TestDeferredAbstraction(unittest.TestCase):
+    def test_shape_fingerprint_ignores_replaced_insert(self):
+        vocabulary = ActionVocabulary()
+        first = vocabulary.compute_identifiers([generate_press_a_action(), generate_insert_action('hello')])
+        second = vocabulary.compute_identifiers([generate_press_a_action(), generate_insert_action('world')])
+        first_fingerprint, first_shapes = compute_abstraction_shape_fingerprints(first, vocabulary)
+        second_fingerprint, second_shapes = compute_abstraction_shape_fingerprints(second, vocabulary)
+        self.assertEqual(first_fingerprint, vocabulary.compute_sequence_fingerprint(first))
+        self.assertNotEqual(first_fingerprint, second_fingerprint)
+        self.assertEqual(first_shapes, second_shapes)
+    
+    def test_repeat_shape_needs_more_than_two_actions(self):
+        vocabulary = ActionVocabulary()
+        self.assertEqual(compute_abstraction_shape_fingerprints(vocabulary.compute_identifiers([generate_press_a_action(), BasicAction('repeat', [1])]), vocabulary)[1], [])
+        self.assertEqual(len(compute_abstraction_shape_fingerprints(vocabulary.compute_identifiers(generate_copy_all_action_list() + [BasicAction('repeat', [1])]), vocabulary)[1]), 1)
+    
+    def test_shape_becomes_viable_with_enough_instantiations(self):
+        vocabulary = ActionVocabulary()
+        statistics = AbstractionShapeStatistics(vocabulary)
+        for text in ['hello', 'world', 'hello']: statistics.add_chain(vocabulary.compute_identifiers([generate_insert_action(text)]))
+        self.assertEqual(len(statistics.get_viable_shapes()), 0)
+        statistics.add_chain(vocabulary.compute_identifiers([generate_insert_action('again')]))
+        self.assertEqual(len(statistics.get_viable_shapes()), 1)
+    
+    def test_shape_keeps_fewer_fingerprints_than_minimum(self):
+        vocabulary = ActionVocabulary()
+        statistics = AbstractionShapeStatistics(vocabulary)
+        for text in ['hello', 'world', 'hello', 'world']: statistics.add_chain(vocabulary.compute_identifiers([generate_insert_action(text)]))
+        self.assertEqual([len(instantiations) for instantiations in statistics.instantiations.values()], [2])
+        statistics.add_chain(vocabulary.compute_identifiers([generate_insert_action('again')]))
+        self.assertEqual(statistics.instantiations, {})
+    
+    def test_deferred_abstraction_matches_full_abstraction(self):
+        record = generate_record_with_recurring_prose()
+        expected = compute_recommendations_from_record(record, 3)
+        actual = compute_recommendations_from_record(record, 3, defer_abstraction = True)
+        self.assertTrue(any(command.is_abstract() for command in expected))
+        self.assertEqual([str(command) for command in actual], [str(command) for command in expected])
+    
+    def test_deferred_abstraction_skips_chains_without_viable_shapes(self):
+        record = generate_record_with_recurring_prose()
+        full = create_command_information_set_from_record(record, 3)
+        deferred = create_command_information_set_from_record(record, 3, defer_abstraction = True)
+        self.assertLess(deferred.get_size(), full.get_size())
+
+def compute_common_prefix_length_of_sequences(first, second) -> int:
+    length = 0
+    for first_item, second_item in zip(first, second):
+        if first_item != second_item: break
+        length += 1
+    return length
+
+class TestPruningInfrequentChains(unittest.TestCase):
+    def test_skeleton_leaves_out_insert_text_and_repeat_counts(self):
+        vocabulary = ActionVocabulary()
+        record = [Command('say hello', [generate_insert_action('hello')]), generate_press_a_command(), generate_press_a_command(), generate_press_a_command()]
+        skeleton = compute_longest_chain_skeleton_starting_at(record, 0, 4, vocabulary)
+        self.assertEqual(skeleton, (INSERT_SKELETON_TOKEN, vocabulary.compute_identifier(generate_press_a_action()), REPEAT_SKELETON_TOKEN))
+    
+    def test_frequent_lengths_come_from_skeletons_shared_with_other_starts(self):
+        record = [generate_press_a_command(), generate_rain_as_down_command(), generate_press_a_command(), generate_copy_all_command()]
+        self.assertEqual(compute_frequent_chain_skeleton_lengths(record, 2, ActionVocabulary()), [1, 0, 1, 0])
+    
+    def test_frequent_lengths_match_those_of_skeletons_compared_pairwise(self):
+        press_b_action = BasicAction('key', ['b'])
+        record = [Command('air twice', generate_press_a_action_list()*2), generate_press_a_command(), Command('say nothing', [generate_insert_action('')]), generate_press_a_command(),
+                  Command('say hello', [generate_insert_action('hel'), generate_insert_action('lo')]), Command('say', [generate_insert_action('')]), generate_press_a_command(),
+                  Command('bat air', [press_b_action, generate_press_a_action()]), RecordingStart(), Command('air bat', [generate_press_a_action(), press_b_action]),
+                  Command('say hi', [generate_insert_action(''), generate_insert_action('hi')]), generate_press_a_command(), Command('air twice', generate_press_a_action_list()*2)]
+        vocabulary = ActionVocabulary()
+        for max_command_chain_considered in range(1, 6):
+            skeletons = [compute_longest_chain_skeleton_starting_at(record, chain, max_command_chain_considered, vocabulary) for chain in range(len(record))]
+            expected = [max([compute_common_prefix_length_of_sequences(skeleton, other) for other_chain, other in enumerate(skeletons) if other_chain != chain], default = 0)
+                        for chain, skeleton in enumerate(skeletons)]
+            self.assertEqual(compute_frequent_chain_skeleton_lengths(record, max_command_chain_considered, vocabulary), expected)
+    
+    def test_frequent_lengths_fall_back_to_whole_skeletons_when_neighbors_do_not_settle(self):
+        record = [generate_press_a_command(), generate_rain_as_down_command(), generate_press_a_command(), generate_copy_all_command()]
+        vocabulary = ActionVocabulary()
+        expected = [len(compute_longest_chain_skeleton_starting_at(record, chain, 2, vocabulary)) for chain in range(len(record))]
+        with mock.patch.object(basic_action_record_analysis, 'MAXIMUM_NUMBER_OF_NEIGHBORING_SKELETONS_COMPARED', 0):
+            self.assertEqual(compute_frequent_chain_skeleton_lengths(record, 2, vocabulary), expected)
+        self.assertEqual(compute_frequent_chain_skeleton_lengths(record, 2, vocabulary), [1, 0, 1, 0])
+    
+    def test_pruned_mining_matches_full_mining(self):
+        record = (generate_simple_command_record() + [RecordingStart()])*3 + generate_record_with_recurring_prose() + generate_command_record_with_many_seconds_before_middle_command()*2
+        expected = compute_recommendations_from_record(record, 5)
+        actual = compute_recommendations_from_record(record, 5, prune_infrequent_chains = True)
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual([str(command) for command in actual], [str(command) for command in expected])
+    
+    def test_pruned_mining_stops_extending_unique_chains(self):
+        record = generate_simple_command_record() + [RecordingStart(), generate_press_a_command()]
+        pruned = create_command_information_set_from_record(record, 4, prune_infrequent_chains = True)
+        self.assertEqual([command.get_actions() for command in pruned.commands], [generate_press_a_action_list()])
+        self.assertEqual(pruned.get_mining_statistics().number_of_partial_chains_processed, 2)
+        self.assertEqual(create_command_information_set_from_record(record, 4).get_mining_statistics().number_of_partial_chains_processed, 7)
+
+class TestSuffixArrayMining(unittest.TestCase):
+    def test_finds_every_repeated_run_with_its_starts(self):
+        tokens = [0, 1, 0, 1, 2, 0, 1]
+        runs = {}
+        for run in find_repeated_runs(tokens, 3):
+            for length in range(run.minimum_length, run.maximum_length + 1): runs[tuple(tokens[run.starts[0]:run.starts[0] + length])] = sorted(run.starts)
+        self.assertEqual(runs, {(0,): [0, 2, 5], (1,): [1, 3, 6], (0, 1): [0, 2, 5]})
+    
+    def test_common_prefix_lengths_stop_at_the_maximum_length(self):
+        suffix_array = BoundedSuffixArray([0]*10, 3)
+        self.assertEqual(suffix_array.compute_common_prefix_length(0, 4), 3)
+        self.assertEqual(suffix_array.compute_common_prefix_length(0, 8), 2)
+    
+    def test_action_run_stream_merges_runs_and_separates_barriers(self):
+        record = [Command('say hello', [generate_insert_action('hello')]), Command('say world', [generate_insert_action(' world')]), generate_press_a_command(), generate_press_a_command(),
+                  Command('air twice', [generate_press_a_action(), BasicAction('repeat', [1])]), RecordingStart(), generate_press_a_command()]
+        stream = ActionRunStream(record, ActionVocabulary())
+        self.assertEqual(stream.get_tokens(), [0, 1, -3, 1])
+        self.assertEqual([stream.get_chain_first_token_index(index) for index in range(len(record))], [0, 0, 1, 1, 1, 3, 3])
+        self.assertEqual([stream.is_chain_first_token_index_shared(index) for index in [0, 1, 3]], [True, True, False])
+        self.assertEqual(stream.compute_number_of_words(0, 2), 4)
+    
+    def test_matches_trie_engine_on_concrete_commands(self):
+        record = generate_record_for_engine_comparison()
+        trie_command_set = create_command_information_set_from_record(record, 4)
+        expected = [str(command) for command in trie_command_set.commands if not command.is_abstract() and command.get_number_of_times_used() > 1]
+        suffix_array_command_set = create_command_information_set_from_record(record, 4, mining_engine = SUFFIX_ARRAY_MINING_ENGINE)
+        actual = [str(command) for command in suffix_array_command_set.commands if command.get_number_of_times_used() > 1]
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual(actual, expected)
+    
+    def test_matches_trie_engine_on_differently_split_commands_simplifying_to_the_same_actions(self):
+        record = generate_record_with_differently_split_inserts()
+        trie_command_set = create_command_information_set_from_record(record, 3)
+        expected = [str(command) for command in trie_command_set.commands if not command.is_abstract() and command.get_number_of_times_used() > 1]
+        suffix_array_command_set = create_command_information_set_from_record(record, 3, mining_engine = SUFFIX_ARRAY_MINING_ENGINE)
+        actual = [str(command) for command in suffix_array_command_set.commands if command.get_number_of_times_used() > 1]
+        self.assertIn(str(generate_potential_command_information_with_uses([generate_insert_action('hello world'), generate_press_a_action()], ['say hello say world air', 'say hello world air'])), expected)
+        self.assertEqual(actual, expected)
+    
+    def test_counts_overlapping_runs_once(self):
+        record = [generate_press_a_command()]*3
+        command_set = create_command_information_set_from_record(record, 2, mining_engine = SUFFIX_ARRAY_MINING_ENGINE)
+        self.assertEqual([(str(command.get_actions()), command.get_number_of_times_used()) for command in command_set.commands],
+                         [(str(generate_press_a_action_list()), 3), (str(generate_press_a_action_list() + [BasicAction('repeat', [1])]), 1)])
+    
+    def test_counts_chains_split_into_commands_differently_from_repeated_runs(self):
+        assert_engine_counts_mixed_command_splits_like_trie_engine(self, SUFFIX_ARRAY_MINING_ENGINE)
+    
+    def test_counts_chains_with_inserts_without_text_like_trie_engine(self):
+        assert_engine_counts_inserts_without_text_like_trie_engine(self, SUFFIX_ARRAY_MINING_ENGINE)
+
+def generate_record_with_mixed_command_splits():
+    doubled_press_a_command = Command('press air twice', generate_press_a_action_list()*2)
+    press_x_command = Command('press x', [BasicAction('key', ['x'])])
+    return [doubled_press_a_command, press_x_command, doubled_press_a_command, press_x_command, generate_press_a_command(), generate_press_a_command(), press_x_command]
+
+def compute_concrete_command_usage(command_set):
+    return {str(command.get_actions()): (command.get_number_of_times_used(), command.get_average_words_dictated()) for command in command_set.commands if not command.is_abstract()}
+
+def assert_engine_counts_mixed_command_splits_like_trie_engine(test_case, mining_engine):
+    record = generate_record_with_mixed_command_splits()
+    expected = compute_concrete_command_usage(create_command_information_set_from_record(record, 4))
+    actual = compute_concrete_command_usage(create_command_information_set_from_record(record, 4, mining_engine = mining_engine))
+    test_case.assertEqual(actual[str(generate_press_a_action_list() + [BasicAction('repeat', [1])])][0], 3)
+    test_case.assertEqual(actual, {representation: expected[representation] for representation in actual})
+
+def assert_engine_counts_inserts_without_text_like_trie_engine(test_case, mining_engine):
+    record = [Command('say nothing', [generate_insert_action('')]), generate_press_a_command(), Command('press x', [BasicAction('key', ['x'])]), generate_press_a_command()]
+    expected = compute_concrete_command_usage(create_command_information_set_from_record(record, 2))
+    actual = compute_concrete_command_usage(create_command_information_set_from_record(record, 2, mining_engine = mining_engine))
+    test_case.assertEqual(actual[str(generate_press_a_action_list())], (2, 2))
+    test_case.assertEqual(actual, {representation: expected[representation] for representation in actual})
+
+def generate_record_with_differently_split_inserts():
+    return [Command('say hello', [generate_insert_action('hello')]), Command('say world', [generate_insert_action(' world')]), generate_press_a_command(), RecordingStart(),
+            Command('say hello world', [generate_insert_action('hello world')]), generate_press_a_command()]
+
+def generate_record_for_engine_comparison():
+    return (generate_simple_command_record() + [RecordingStart()])*3 + generate_command_record_with_many_seconds_before_middle_command()*2 + \
+        [generate_press_a_command()]*5 + generate_recurring_insert_command_record() + generate_simple_command_record()
+
+class TestRollingHashMining(unittest.TestCase):
+    def assert_rolling_hash_engine_matches_suffix_array_engine(self):
+        record = generate_record_for_engine_comparison()
+        expected = create_command_information_set_from_record(record, 4, mining_engine = SUFFIX_ARRAY_MINING_ENGINE)
+        actual = create_command_information_set_from_record(record, 4, mining_engine = ROLLING_HASH_MINING_ENGINE)
+        self.assertTrue(expected.get_size() > 0)
+        self.assertEqual(str(actual), str(expected))
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_matches_suffix_array_engine(self):
+        self.assert_rolling_hash_engine_matches_suffix_array_engine()
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_hash_collisions_do_not_merge_runs(self):
+        with mock.patch.object(rolling_hash_mining, 'FINGERPRINT_MULTIPLIER', 0):
+            self.assert_rolling_hash_engine_matches_suffix_array_engine()
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_runs_do_not_contain_separators(self):
+        runs = find_repeated_runs_with_rolling_hashes([0, 1, -1, 0, 1, -2, 1], 3)
+        self.assertEqual(sorted((run.minimum_length, run.maximum_length, run.starts) for run in runs), [(1, 1, [1, 4, 6]), (1, 2, [0, 3])])
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_merges_consecutive_lengths_with_the_same_starts(self):
+        runs = find_repeated_runs_with_rolling_hashes([0, 1, 2, 0, 1, 2, 0, 1], 4)
+        self.assertEqual(sorted((run.minimum_length, run.maximum_length, run.starts) for run in runs), [(1, 1, [1, 4, 7]), (1, 2, [0, 3, 6]), (1, 3, [2, 5]), (2, 4, [1, 4]), (3, 4, [0, 3])])
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_matches_trie_engine_on_differently_split_commands_simplifying_to_the_same_actions(self):
+        record = generate_record_with_differently_split_inserts()
+        expected = compute_concrete_command_usage(create_command_information_set_from_record(record, 3))
+        actual = compute_concrete_command_usage(create_command_information_set_from_record(record, 3, mining_engine = ROLLING_HASH_MINING_ENGINE))
+        self.assertEqual(actual[str([generate_insert_action('hello world'), generate_press_a_action()])], (2, 4.5))
+        self.assertEqual(actual, {representation: expected[representation] for representation in actual})
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_counts_chains_split_into_commands_differently_from_repeated_runs(self):
+        assert_engine_counts_mixed_command_splits_like_trie_engine(self, ROLLING_HASH_MINING_ENGINE)
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_counts_chains_with_inserts_without_text_like_trie_engine(self):
+        assert_engine_counts_inserts_without_text_like_trie_engine(self, ROLLING_HASH_MINING_ENGINE)
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_counts_overlapping_unchanged_chains_like_trie_engine(self):
+        record = [generate_press_a_command(), Command('wait', []), generate_press_a_command()]
+        expected = compute_concrete_command_usage(create_command_information_set_from_record(record, 2))
+        actual = compute_concrete_command_usage(create_command_information_set_from_record(record, 2, mining_engine = ROLLING_HASH_MINING_ENGINE))
+        self.assertEqual(actual[str(generate_press_a_action_list())], (2, 1.5))
+        self.assertEqual(actual, {representation: expected[representation] for representation in actual})
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_unchanged_span_limits_stop_before_merged_and_dropped_actions(self):
+        numpy = rolling_hash_mining.numpy
+        limits = compute_unchanged_span_limits(numpy.array([0, 1, 1, 2, 3, 4]), numpy.array([False, False, False, True, True, False]),
+                                               numpy.array([False, False, False, False, False, True]))
+        self.assertEqual(limits.tolist(), [2, 2, 4, 4, 5, 5, 6])
+    
+    @unittest.skipIf(rolling_hash_mining.numpy is None, 'numpy is not installed')
+    def test_sequence_hashes_match_span_hashes(self):
+        numpy = rolling_hash_mining.numpy
+        identifiers = numpy.array([3, 1, 2, 3, 1, 2, 5])
+        span_hashes = compute_span_hashes(identifiers, numpy.array([0, 3, 1, 6]), numpy.array([3, 6, 3, 6]))
+        sequence_hashes = compute_sequence_hashes([(3, 1, 2), (1, 2), ()], len(identifiers))
+        self.assertEqual(span_hashes.tolist(), [sequence_hashes[0], sequence_hashes[0], sequence_hashes[1], sequence_hashes[2]])
+        self.assertNotEqual(sequence_hashes[0], sequence_hashes[1])
+    
+    def test_colliding_windows_are_split_by_their_tokens(self):
+        runs = split_colliding_windows([0, 1, 2, 0, 1, 3, 0, 1, 2, 5, 3], [0, 3, 6, 9], 2)
+        self.assertEqual([(run.minimum_length, run.maximum_length, run.starts) for run in runs], [(2, 2, [0, 3, 6])])
+    
+    def test_falls_back_to_suffix_array_engine_with_warning_without_numpy(self):
+        with mock.patch.object(basic_action_record_analysis, 'is_rolling_hash_mining_available', return_value = False), \
+             mock.patch('sys.stderr', new_callable = io.StringIO) as error_stream:
+            self.assert_rolling_hash_engine_matches_suffix_array_engine()
+        self.assertIn('suffix array engine is used instead of the rolling hash engine', error_stream.getvalue())
+
+class TestRecordSegmentation(unittest.TestCase):
+    def generate_record(self):
+        return generate_simple_command_record() + [RecordingStart()] + generate_command_record_with_many_seconds_before_middle_command()
+    
+    def test_chain_targets_stop_at_barriers(self):
+        segmentation = RecordSegmentation(self.generate_record())
+        self.assertEqual([segmentation.compute_chain_target(chain, 2) for chain in range(7)], [2, 3, 3, 3, 5, 7, 7])
+        self.assertEqual(segmentation.get_barrier_indices(), [3, 5])
+    
+    def test_sessions_leave_out_recording_starts(self):
+        self.assertEqual(RecordSegmentation([RecordingStart()] + self.generate_record()).compute_sessions(), [(1, 4), (5, 6), (6, 8)])
+    
+    def test_gap_threshold_is_configurable(self):
+        segmentation = RecordSegmentation(self.generate_record(), 100000000000)
+        self.assertEqual(segmentation.get_barrier_indices(), [3])
+        command_set = create_command_information_set_from_record(generate_command_record_with_many_seconds_before_middle_command()*2, 3, gap_threshold_in_seconds = 100000000000)
+        self.assertTrue(command_set.contains_command_with_representation(
+            command_set.vocabulary.compute_identifiers(generate_multiple_key_pressing_actions(['down', 'ctrl-a', 'ctrl-c', 'a']))))
+    
+    def test_streaming_segmentation_matches_record_segmentation(self):
+        record = self.generate_record() + [generate_copy_all_command(90000000000), RecordingStart(), RecordingStart()] + generate_simple_command_record()
+        segmentation = RecordSegmentation(record)
+        streaming_segmentation = StreamingRecordSegmentation()
+        for entry in record: streaming_segmentation.add_entry(entry)
+        for chain in range(len(record)):
+            self.assertEqual(streaming_segmentation.compute_chain_target(chain, 4), segmentation.compute_chain_target(chain, 4))
+            self.assertEqual(segmentation.compute_chain_target(chain, 4), compute_chain_target(record, chain, 4))
+
+class TestCommandLine(unittest.TestCase):
+    def test_single_record_arguments_fill_input_parameters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            request = parse_command_line_arguments([path, '--max-chain-length', '7', '--workers', '2', '--output-format', 'json', '--resume', '--defer-abstraction',
+                                                    '--chain-pipeline-cache-size', '0'])
+        parameters = request.parameters
+        self.assertFalse(request.is_batch)
+        self.assertEqual(request.input_paths, [path])
+        self.assertEqual((parameters.input_path, parameters.max_chain_length, parameters.number_of_workers, parameters.output_format), (path, 7, 2, JSON_OUTPUT_FORMAT))
+        self.assertTrue(parameters.resume_analysis)
+        self.assertTrue(parameters.defer_abstraction)
+        self.assertFalse(parameters.prune_infrequent_chains)
+        self.assertEqual(parameters.chain_pipeline_cache_size, 0)
+    
+    def test_directories_and_globs_give_batches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first_path = write_lines_to_file_at(directory, 'first.txt')
+            second_path = write_lines_to_file_at(directory, 'second.txt')
+            self.assertEqual(parse_command_line_arguments([directory]).input_paths, [first_path, second_path])
+            request = parse_command_line_arguments([os.path.join(directory, 's*.txt')])
+        self.assertTrue(request.is_batch)
+        self.assertEqual(request.input_paths, [second_path])
+    
+    def test_rejects_invalid_arguments(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch('sys.stderr'):
+            path = write_test_record_file(directory)
+            for arguments in ([os.path.join(directory, 'missing.txt')], [path, '--max-chain-length', '0'], [path, '--mining-engine', 'unknown']):
+                with self.assertRaises(SystemExit): parse_command_line_arguments(arguments)
+    
+    def test_other_mining_engines_reject_options_of_trie_engine(self):
+        with tempfile.TemporaryDirectory() as directory, mock.patch('sys.stderr'):
+            path = write_test_record_file(directory)
+            self.assertEqual(parse_command_line_arguments([path, '--mining-engine', SUFFIX_ARRAY_MINING_ENGINE]).parameters.mining_engine, SUFFIX_ARRAY_MINING_ENGINE)
+            for option in ('--defer-abstraction', '--prune-infrequent-chains', '--resume'):
+                with self.assertRaises(SystemExit): parse_command_line_arguments([path, '--mining-engine', ROLLING_HASH_MINING_ENGINE, option])
+    
+    def test_text_output_says_when_recommendations_are_approximate(self):
+        command = generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air', 'press air'])
+        with tempfile.TemporaryDirectory() as directory:
+            with open(output_recommendations([command], directory, record_name = 'trie')) as file: trie_output = file.read()
+            with open(output_recommendations([command], directory, record_name = 'suffix', mining_engine = SUFFIX_ARRAY_MINING_ENGINE)) as file: suffix_array_output = file.read()
+        self.assertNotIn('#Approximate', trie_output)
+        self.assertEqual(suffix_array_output, f'#Approximate: {compute_mining_engine_caveat(SUFFIX_ARRAY_MINING_ENGINE)}\n\n\n' + trie_output)
+    
+    def test_json_output_describes_commands(self):
+        command = generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air', 'press air'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = output_recommendations([command], directory, JSON_OUTPUT_FORMAT, 'record')
+            self.assertTrue(os.path.basename(path).startswith(OUTPUT_FILENAME_PREFIX + 'record '))
+            with open(path) as file: descriptions = json.load(file)
+        self.assertEqual(descriptions, [{'number_of_times_used': 2, 'average_words_dictated': 1.5, 'actions': ["key('a')"]}])
+    
+    def test_batch_writes_recommendations_and_summary_for_every_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [write_test_record_file(directory), write_lines_to_file_at(directory, 'broken.barb', ['BARB'])]
+            output_directory = os.path.join(directory, 'output')
+            os.makedirs(output_directory)
+            parameters = InputParameters()
+            parameters.verbose = False
+            summary_path = generate_batch_recommendations(output_directory, directory, parameters, paths)
+            with open(summary_path) as file: summaries = json.load(file)['records']
+            self.assertEqual([summary['input_path'] for summary in summaries], paths)
+            self.assertTrue(os.path.exists(summaries[0]['output_path']))
+            self.assertNotIn('error', summaries[0])
+            self.assertIn('error', summaries[1])
+
+class TestAnalysisInstrumentation(unittest.TestCase):
+    def test_nested_stage_time_only_counts_toward_inner_stage(self):
+        instrumentation = AnalysisInstrumentation()
+        with mock.patch('time.perf_counter', side_effect = [1, 2, 5, 6]), mock.patch('time.process_time', return_value = 0):
+            instrumentation.enter_stage(CHAIN_MINING_STAGE)
+            instrumentation.enter_stage(ABSTRACTION_STAGE)
+            instrumentation.exit_stage()
+            instrumentation.exit_stage()
+        stages = instrumentation.compute_report()['stages']
+        self.assertEqual(stages[CHAIN_MINING_STAGE]['wall_time_in_seconds'], 2)
+        self.assertEqual(stages[ABSTRACTION_STAGE]['wall_time_in_seconds'], 3)
+    
+    def test_timed_entries_count_toward_stage(self):
+        instrumentation = AnalysisInstrumentation()
+        self.assertEqual(list(instrumentation.generate_timed_entries(range(3), PARSING_STAGE)), [0, 1, 2])
+        self.assertEqual(instrumentation.compute_report()['stages'][PARSING_STAGE]['number_of_entries'], 4)
+    
+    def test_disabled_instrumentation_passes_entries_through(self):
+        entries = iter(range(3))
+        self.assertFalse(get_instrumentation().is_enabled())
+        self.assertIs(get_instrumentation().generate_timed_entries(entries, PARSING_STAGE), entries)
+    
+    def test_report_is_written_alongside_recommendations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            parameters = InputParameters()
+            parameters.input_path = write_test_record_file(directory)
+            parameters.verbose = False
+            parameters.write_analysis_report = True
+            parameters.resume_analysis = False
+            output_path = generate_recommendations(directory, directory, parameters)
+            with open(compute_report_path(output_path)) as file: report = json.load(file)
+        self.assertFalse(get_instrumentation().is_enabled())
+        self.assertTrue({PARSING_STAGE, IGNORE_FILTERING_STAGE, CHAIN_MINING_STAGE, FILTERING_STAGE, SORTING_STAGE, OUTPUT_STAGE} <= set(report['stages']))
+        self.assertGreater(report['counters']['chains_processed'], 0)
+        self.assertEqual(report['counters']['record_cache_misses'], 1)
+
+class TestMemoryProfiling(unittest.TestCase):
+    def test_deep_size_counts_shared_values_once(self):
+        shared = list(range(100))
+        self.assertEqual(compute_deep_size([shared, shared], set()), sys.getsizeof([shared, shared]) + compute_deep_size(shared, set()))
+    
+    def test_deep_size_leaves_out_excluded_values(self):
+        excluded = 'x'*1000
+        self.assertEqual(estimate_deep_size([excluded], excluded_values = (excluded,)), sys.getsizeof([excluded]))
+    
+    def test_deep_size_of_long_list_is_extrapolated_from_samples(self):
+        values = [(index, index) for index in range(1000)]
+        self.assertAlmostEqual(estimate_deep_size(values, 10), compute_deep_size(values, set()), delta = compute_deep_size(values, set())*0.05)
+    
+    def test_estimated_deep_size_of_commands_leaves_out_shared_statistics_columns(self):
+        record = (generate_recurring_insert_command_record() + generate_simple_command_record() + generate_record_with_recurring_prose())*20
+        command_set = create_command_information_set_from_record(record, 10)
+        excluded_values = (command_set.vocabulary, command_set.candidate_statistics)
+        size = compute_deep_size(command_set.commands, {id(value) for value in excluded_values})
+        self.assertGreater(len(command_set.commands), DEFAULT_MAXIMUM_NUMBER_OF_SAMPLED_ELEMENTS)
+        self.assertAlmostEqual(estimate_deep_size(command_set.commands, excluded_values = excluded_values), size, delta = size*0.3)
+        self.assertEqual(estimate_deep_size(command_set.candidate_statistics, excluded_values = excluded_values), compute_deep_size(command_set.candidate_statistics, set()))
+    
+    def test_memory_profile_is_written_alongside_recommendations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            parameters = InputParameters()
+            parameters.input_path = write_test_record_file(directory)
+            parameters.verbose = False
+            parameters.profile_memory = True
+            output_path = generate_recommendations(directory, directory, parameters)
+            with open(compute_memory_profile_path(output_path)) as file: profile = json.load(file)
+        self.assertFalse(get_memory_profiler().is_enabled())
+        self.assertEqual([snapshot['stage'] for snapshot in profile['snapshots']], [CHAIN_MINING_STAGE, FILTERING_STAGE, SORTING_STAGE, OUTPUT_STAGE])
+        self.assertGreater(profile['peak_memory_in_bytes'], 0)
+        self.assertEqual(set(profile['structure_size_samples'][-1]['estimated_deep_sizes_in_bytes']), {'record', 'commands', 'abstract_instantiation_sets', 'candidate_statistics'})
+
+class TestProgressReporting(unittest.TestCase):
+    def test_reports_at_most_once_per_interval(self):
+        stream = io.StringIO()
+        with mock.patch('time.monotonic', return_value = 0): reporter = ProgressReporter(100, stream = stream)
+        with mock.patch('time.monotonic', return_value = LOG_REPORTING_INTERVAL_IN_SECONDS - 1):
+            for chain in range(50): reporter.update(chain + 1, 0)
+        self.assertEqual(stream.getvalue(), '')
+        with mock.patch('time.monotonic', return_value = LOG_REPORTING_INTERVAL_IN_SECONDS):
+            for chain in range(50, 60): reporter.update(chain + 1, 3)
+        self.assertEqual(len(stream.getvalue().splitlines()), 1)
+        self.assertTrue(stream.getvalue().startswith('chain 51 of 100 (51.0%), 5 chains per second, about 10s left, 3 candidates'))
+    
+    def test_quick_runs_stay_quiet(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(10, stream = stream)
+        reporter.update(10, 1)
+        reporter.finish(10, 1)
+        self.assertEqual(stream.getvalue(), '')
+    
+    def test_formats_durations(self):
+        self.assertEqual([format_duration(seconds) for seconds in (5, 65, 3725)], ['5s', '1m 05s', '1h 02m'])
+
+class TestTimeBudget(unittest.TestCase):
+    def generate_record(self):
+        return (generate_simple_command_record() + [RecordingStart()])*3 + generate_record_with_recurring_prose() + generate_command_record_with_many_seconds_before_middle_command()*2
+    
+    def test_spread_out_order_samples_the_whole_range_first(self):
+        self.assertEqual(compute_spread_out_order(8), [0, 4, 2, 6, 1, 5, 3, 7])
+        self.assertEqual(sorted(compute_spread_out_order(5)), list(range(5)))
+    
+    def test_generous_budget_matches_mining_without_budget(self):
+        record = self.generate_record()
+        expected = compute_recommendations_from_record(record, 5)
+        actual = compute_recommendations_from_record(record, 5, time_budget_in_seconds = 1000)
+        self.assertTrue(len(expected) > 0)
+        self.assertEqual(sorted(str(command) for command in actual), sorted(str(command) for command in expected))
+        coverage = create_command_information_set_from_record(record, 5, time_budget_in_seconds = 1000).get_mining_coverage()
+        self.assertTrue(coverage.is_complete())
+    
+    def test_exhausted_budget_keeps_the_short_chains(self):
+        record = self.generate_record()
+        with mock.patch('time.monotonic', side_effect = itertools.count()):
+            command_set = create_budgeted_command_information_set_from_record(record, 5, len(record) + 10)
+        coverage = command_set.get_mining_coverage()
+        self.assertEqual(coverage.compute_fraction_of_short_partial_chains_mined(), 1.0)
+        self.assertEqual(coverage.compute_fraction_of_long_partial_chains_mined(), 0.0)
+        self.assertFalse(coverage.is_complete())
+        self.assertIn('of the chains of up to 2 commands', coverage.compute_description())
+    
+    def test_budget_running_out_during_long_chains_keeps_the_short_chains_of_every_session(self):
+        record = []
+        for session in range(16):
+            press_command = Command(f'press {session}', [BasicAction('key', [str(session)])])
+            record += [RecordingStart(), press_command, press_command, Command('enter', [BasicAction('key', ['enter'])])]
+        with mock.patch('time.monotonic', side_effect = itertools.count()):
+            command_set = create_budgeted_command_information_set_from_record(record, 3, 100)
+        coverage = command_set.get_mining_coverage()
+        self.assertEqual(coverage.compute_fraction_of_short_partial_chains_mined(), 1.0)
+        self.assertTrue(0 < coverage.compute_fraction_of_long_partial_chains_mined() < 1)
+        short_command_set = create_command_information_set_from_record(record, 2)
+        expected = compute_concrete_command_usage(short_command_set)
+        actual = compute_concrete_command_usage(command_set)
+        self.assertEqual({representation: actual.get(representation) for representation in expected}, expected)
+        self.assertGreater(command_set.get_size(), short_command_set.get_size())
+    
+    def test_other_mining_engines_reject_a_time_budget(self):
+        with self.assertRaises(UnsupportedTimeBudgetException):
+            create_command_information_set_from_record(generate_simple_command_record(), 3, mining_engine = SUFFIX_ARRAY_MINING_ENGINE, time_budget_in_seconds = 10)
+    
+    def test_time_budget_argument(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_test_record_file(directory)
+            self.assertEqual(parse_command_line_arguments([path, '--time-budget', '60']).parameters.time_budget_in_seconds, 60)
+            self.assertIsNone(parse_command_line_arguments([path]).parameters.time_budget_in_seconds)
+            with mock.patch('sys.stderr'), self.assertRaises(SystemExit):
+                parse_command_line_arguments([path, '--time-budget', '60', '--mining-engine', SUFFIX_ARRAY_MINING_ENGINE])
+
 def generate_rain_potential_command_information():
     return generate_potential_command_information_with_uses(generate_rain_as_down_command().get_actions(), ['rain'])
 
@@ -692,6 +1800,51 @@ def generate_command_record_with_many_seconds_before_middle_command():
     record = [generate_rain_as_down_command(), generate_copy_all_command(90000000000), generate_press_a_command()]
     return record
 
+def generate_recurring_insert_command_record():
+    say_hello = Command('say hello', [generate_insert_action('hello')])
+    return [say_hello, generate_press_a_command(), say_hello, generate_press_a_command()]
+
+def describe_command_set(command_set):
+    return [(str(command), command.get_number_of_instantiations() if command.is_abstract() else None) for command in command_set.commands]
+
+def generate_candidates_for_filtering():
+    abstract_chain = make_abstract_repeat_representation_for(CommandChain('air twice', [generate_press_a_action(), BasicAction('repeat', [1])], 0, 1))
+    abstract_candidate = PotentialAbstractCommandInformation(abstract_chain.get_actions())
+    for number in range(3): abstract_candidate.process_usage(CommandChain('air air air', abstract_chain.get_actions(), number*3, 1), CommandChain('air', [generate_press_a_action(), BasicAction('repeat', [number % 2 + 1])]))
+    return [
+        generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air air']),
+        generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air air', 'air air']),
+        generate_potential_command_information_with_uses(generate_press_a_action_list(), ['air air air']*3),
+        abstract_candidate,
+        generate_potential_command_information_with_uses(generate_copy_all_action_list(), ['copy all now', 'copy all now', 'copy all now please']),
+    ]
+
+def generate_record_with_recurring_prose():
+    record = []
+    for words in ['hello world', 'big test', 'good day', 'new line']:
+        record.append(Command(f'say {words} now', [generate_insert_action(words.replace(' ', '_')), generate_key_press_action('enter')]))
+        record.append(generate_press_a_command())
+    return record
+
+def describe_record_entry(entry):
+    if entry.is_command_record(): return str(entry)
+    return RECORDING_START_MESSAGE
+
+def write_lines_to_file(path, lines):
+    with open(path, 'w') as file: file.write('\n'.join(lines) + '\n')
+
+def write_test_record_file(directory):
+    path = os.path.join(directory, 'record.txt')
+    lines = ['START', 'Command: rain', '{"name": "key", "arguments": ["down"]}', 'T2', 'Command: copy all', '{"name": "key", "arguments": ["ctrl-a"]}',
+            '{"name": "key", "arguments": ["ctrl-c"]}', 'START', 'Command: say test', '{"name": "insert", "arguments": ["test"]}']
+    write_lines_to_file(path, lines)
+    return path
+
+def write_lines_to_file_at(directory, filename, lines = ()):
+    path = os.path.join(directory, filename)
+    write_lines_to_file(path, lines)
+    return path
+
 def generate_insert_action(text: str):
     return BasicAction('insert', [text])
 
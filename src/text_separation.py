@@ -1,50 +1,71 @@
+import functools
+import itertools
+import re
 from typing import List
 
 def is_character_alpha(character: str):
     return character.isalpha()
 
+ALPHABETIC_RUN_PATTERN = re.compile(r'([^\W\d_]+)')
+TEXT_SEPARATION_CACHE_SIZE = 4096
+
+def split_alphabetic_runs(string: str):
+    '''Splits the string into alternating separators and alphabetic runs starting and ending with a possibly empty separator.
+    Returns None in the rare case that the pattern accepts a character that str.isalpha rejects'''
+    pieces = ALPHABETIC_RUN_PATTERN.split(string)
+    for index in range(1, len(pieces), 2):
+        if not pieces[index].isalpha(): return None
+    return pieces
+
+def split_runs_with_filter(string: str, character_filter):
+    pieces = []
+    for is_separated_part, characters in itertools.groupby(string, key = character_filter):
+        if is_separated_part and not pieces: pieces.append('')
+        pieces.append(''.join(characters))
+    if len(pieces) % 2 == 0 or not pieces: pieces.append('')
+    return pieces
+
 class TextSeparation:
+    '''The immutable separation of a string into the parts that satisfy the character filter and the separators between them'''
     def __init__(self, string: str, character_filter):
-        self.separated_parts = []
-        self.separators = []
-        self.current_separated_part = ''
-        self.current_separator = ''
-        self.text_prefix = ''
-        for character in string: self._process_character(character, character_filter)
-        if not self.current_separated_part: self._handle_separator()
-        if not self.current_separator: self._add_separated_part()
-    
-    def _process_character(self, character, character_filter):
-        if character_filter(character): 
-            if not self.current_separated_part: self._handle_separator()
-            self.current_separated_part += character
-        else:
-            if not self.current_separator and self.current_separated_part: self._add_separated_part()
-            self.current_separator += character
-
-    def _handle_separator(self):
-        if len(self.separated_parts) > 0:
-            self.separators.append(self.current_separator)
-        else:
-            self.text_prefix = self.current_separator
-        self.current_separator = ''
-    
-    def _add_separated_part(self):
-        self.separated_parts.append(self.current_separated_part)
-        self.current_separated_part = ''
+        pieces = None
+        if character_filter is is_character_alpha: pieces = split_alphabetic_runs(string)
+        if pieces is None: pieces = split_runs_with_filter(string, character_filter)
+        self.text_prefix = pieces[0]
+        separated_parts = pieces[1::2]
+        separators = pieces[2:-1:2]
+        final_separator = pieces[-1] if len(pieces) > 1 else ''
+        if final_separator or not separated_parts:
+            if separated_parts: separators.append(final_separator)
+            separated_parts.append('')
+        self.separated_parts = tuple(separated_parts)
+        self.lowercase_separated_parts = tuple(part.lower() for part in self.separated_parts)
+        self.separators = tuple(separators)
     
     def get_separated_parts(self):
         return self.separated_parts
 
+    def get_lowercase_separated_parts(self):
+        return self.lowercase_separated_parts
+
     def get_separators(self):
         return self.separators
     
     def get_prefix(self):
         return self.text_prefix
 
+@functools.lru_cache(maxsize = TEXT_SEPARATION_CACHE_SIZE)
+def compute_text_separation(string: str, character_filter = is_character_alpha) -> TextSeparation:
+    '''Obtains the separation of the string, sharing it between every analyzer of the same string and filter'''
+    return TextSeparation(string, character_filter)
+
 class TextSeparationAnalyzer:
+    #counts every construction in the process for the analysis report
+    number_of_constructions: int = 0
+
     def __init__(self, text: str, character_filter = is_character_alpha):
-        self.text_separation = TextSeparation(text, character_filter)
+        TextSeparationAnalyzer.number_of_constructions += 1
+        self.text_separation = compute_text_separation(text, character_filter)
         self.prose_index = None
         self.final_prose_index_into_separated_parts = None
         self.prose_beginning_index = None
@@ -53,6 +74,15 @@ class TextSeparationAnalyzer:
         self.found_prose: bool = False
         self.prose: str = None
 
+    def set_found_prose(self, prose: str, prose_index: int, prose_beginning_index: int, prose_ending_index: int, final_prose_index_into_separated_parts: int):
+        self.prose = prose
+        self.number_of_prose_words = len(prose.split(' '))
+        self.prose_index = prose_index
+        self.prose_beginning_index = prose_beginning_index
+        self.prose_ending_index = prose_ending_index
+        self.final_prose_index_into_separated_parts = final_prose_index_into_separated_parts
+        self.found_prose = True
+
     def search_for_prose_beginning_at_separated_part_index(self, words, separated_parts, index):
         initial_separated_part = separated_parts[index].lower()
         first_word = words[0]
@@ -191,4 +221,90 @@ class TextSeparationAnalyzer:
 
     def compute_prose_portion_of_text(self) -> List[str]:
         if self.prose_index == self.final_prose_index_into_separated_parts: return self._compute_prose_portion_of_nonseparated_text()
-        else: return self._compute_prose_portion_of_separated_text(self.final_prose_index_into_separated_parts)
\ No newline at end of file
+        else: return self._compute_prose_portion_of_separated_text(self.final_prose_index_into_separated_parts)
+
+class ProseWindowMatcher:
+    '''Finds the windows of dictated words that appear as prose in the text.
+    The separated parts are lowercased and indexed by word once, and the windows beginning at a word are found in one pass
+    by narrowing the candidate parts as the window grows, giving the same results as searching for every window separately'''
+    def __init__(self, text: str, character_filter = is_character_alpha):
+        self.text = text
+        self.character_filter = character_filter
+        self.text_separation = compute_text_separation(text, character_filter)
+        self.lowercase_parts = self.text_separation.get_lowercase_separated_parts()
+        self.joined_lowercase_parts = ' '.join(self.lowercase_parts)
+        self.part_positions = {}
+        for index, part in enumerate(self.lowercase_parts): self.part_positions.setdefault(part, set()).add(index)
+
+    def contains_word(self, lowercase_word: str) -> bool:
+        return lowercase_word in self.joined_lowercase_parts
+
+    def shares_words_with(self, lowercase_words) -> bool:
+        return any(self.contains_word(word) for word in lowercase_words)
+
+    def is_word_at_position(self, lowercase_word: str, index: int) -> bool:
+        positions = self.part_positions.get(lowercase_word)
+        return positions is not None and index in positions
+
+    def compute_analyzer_for_window(self, words, lowercase_words, starting_index: int, prose_size: int, containing_parts, spanning_parts):
+        '''Computes the analyzer for the first part where searching for the prose of the window succeeds or None if none does.
+        containing_parts holds the parts containing the prose without spaces and spanning_parts the parts that can begin the prose across several parts'''
+        first_containing_part = containing_parts[0] if containing_parts else None
+        first_spanning_part = None
+        if prose_size > 1:
+            last_word = lowercase_words[starting_index + prose_size - 1]
+            for index in spanning_parts:
+                if first_containing_part is not None and index >= first_containing_part: break
+                final_index = index + prose_size - 1
+                if final_index >= len(self.lowercase_parts): break
+                if self.lowercase_parts[final_index].startswith(last_word):
+                    first_spanning_part = index
+                    break
+        prose = ' '.join(words[starting_index:starting_index + prose_size])
+        analyzer = TextSeparationAnalyzer(self.text, self.character_filter)
+        if first_spanning_part is not None:
+            beginning_index = self.lowercase_parts[first_spanning_part].rfind(lowercase_words[starting_index])
+            analyzer.set_found_prose(prose, first_spanning_part, beginning_index, len(last_word), first_spanning_part + prose_size - 1)
+        elif first_containing_part is not None:
+            prose_without_spaces = ''.join(lowercase_words[starting_index:starting_index + prose_size])
+            beginning_index = self.lowercase_parts[first_containing_part].find(prose_without_spaces)
+            analyzer.set_found_prose(prose, first_containing_part, beginning_index, beginning_index + len(prose_without_spaces), first_containing_part)
+        else: return None
+        return analyzer
+
+    def generate_analyzers_for_windows_starting_at(self, words, lowercase_words, starting_index: int, maximum_prose_size: int):
+        '''Yields the analyzers for the windows beginning at the starting word in order of increasing size
+        until a window is not found in the text or has an inconsistent separator'''
+        first_word = lowercase_words[starting_index]
+        if not self.contains_word(first_word): return
+        containing_parts = [index for index, part in enumerate(self.lowercase_parts) if first_word in part]
+        spanning_parts = [index for index, part in enumerate(self.lowercase_parts) if part.endswith(first_word)]
+        prose_without_spaces = first_word
+        for prose_size in range(1, maximum_prose_size + 1):
+            if prose_size > 1:
+                prose_without_spaces += lowercase_words[starting_index + prose_size - 1]
+                containing_parts = [index for index in containing_parts if prose_without_spaces in self.lowercase_parts[index]]
+            if prose_size > 2:
+                middle_word = lowercase_words[starting_index + prose_size - 2]
+                spanning_parts = [index for index in spanning_parts if self.is_word_at_position(middle_word, index + prose_size - 2)]
+            analyzer = self.compute_analyzer_for_window(words, lowercase_words, starting_index, prose_size, containing_parts, spanning_parts)
+            if analyzer is None or not analyzer.is_prose_separator_consistent(): return
+            yield analyzer
+
+    def find_prose_windows(self, words, maximum_prose_size: int, is_acceptable = lambda analyzer: True):
+        '''Finds the starting index, size, and analyzer of every acceptable window of at most the maximum size.
+        The windows beginning at a word stop at the first window that is not found, not separator consistent, or not acceptable'''
+        lowercase_words = ' '.join(words).lower().split(' ')
+        windows = []
+        if not self.shares_words_with(lowercase_words): return windows
+        for starting_index in range(len(words)):
+            largest_prose_size = min(maximum_prose_size, len(words) - starting_index)
+            analyzers = self.generate_analyzers_for_windows_starting_at(words, lowercase_words, starting_index, largest_prose_size)
+            for prose_size, analyzer in enumerate(analyzers, 1):
+                if not is_acceptable(analyzer): break
+                windows.append((starting_index, prose_size, analyzer))
+        return windows
+
+@functools.lru_cache(maxsize = TEXT_SEPARATION_CACHE_SIZE)
+def compute_prose_window_matcher(text: str, character_filter = is_character_alpha) -> ProseWindowMatcher:
+    return ProseWindowMatcher(text, character_filter)